@@ -0,0 +1,296 @@
+# agents.py - Decentralized coordination: one asyncio agent per friendly, talking over a simulated radio
+#
+# In coordination.py every friendly sees the global assignment the moment it is
+# made. Here each friendly only knows what its own sensors see and what it has
+# heard on the radio:
+#   - hostiles come from its own sensor (R_SENSE, no communication needed),
+#   - neighbour positions and target claims arrive as radio messages, late
+#     (latency), sometimes not at all (drop rate) and only from within range.
+# Claims are settled locally: an agent gives up a hostile when it hears a
+# better (lower cost, then lower id) claim for it.
+#
+# Agents are coroutines on a private event loop driven by the simulation's
+# virtual clock: each tick they all wake up, decide and post one message, so
+# runs are deterministic and as fast as the CPU allows.
+#
+# Usage:
+#   sim = AgentSimulation(SCENARIO_B, radio=Radio(latency=0.3, drop_rate=0.1))
+#   result = sim.run()
+
+import asyncio
+from collections import deque
+
+import numpy as np
+
+from constants import DELTA_TIME, R_SENSE, MAX_SPEED
+from spatial_index import UniformGrid
+from coordination import (
+    calculate_steering_force, clamp_speed, aim_speed, INTERCEPT_SPEED
+)
+from intercept import solve_intercept, intercept_cost
+from scenario_data import INITIAL_DRONE_DATA
+from simulation import Simulation
+
+# One message per agent per tick: its position plus its current claim (target -1 for none)
+MESSAGE_DTYPE = np.dtype([
+    ('sender', np.int64),
+    ('time', np.float64),   # Send time
+    ('x', np.float64),
+    ('y', np.float64),
+    ('target', np.int64),
+    ('cost', np.float64),   # Claim cost (interceptor flight distance), lower wins
+])
+
+CLAIM_TTL = 1.0 # Seconds a heard claim stays valid without being repeated
+
+
+class Radio:
+    """Broadcast radio: every message reaches the agents within `range` of the
+    sender (at send time) after `latency` seconds, except a random `drop_rate`
+    fraction of deliveries. Messages are handled as one batch per tick."""
+
+    def __init__(self, latency: float = 0.2, drop_rate: float = 0.0, range: float = R_SENSE, seed: int = 0):
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.range = range
+        self._rng = np.random.default_rng(seed)
+        self._in_flight = deque() # (deliver_time, messages, recipient ids, recipient positions)
+        self.sent = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def send(self, time: float, messages: np.ndarray, recipient_ids: np.ndarray, recipient_pos: np.ndarray):
+        """Queues a tick's messages; the possible recipients are the agents at recipient_pos now."""
+        if messages.size:
+            self._in_flight.append((time + self.latency, messages, recipient_ids, recipient_pos))
+            self.sent += messages.size
+
+    def deliver(self, time: float):
+        """Returns (recipient_ids, messages) for every delivery due by `time`,
+        sorted by recipient (then by send order)."""
+        recipients, delivered = [], []
+        while self._in_flight and self._in_flight[0][0] <= time + 1e-9:
+            _, messages, ids, pos = self._in_flight.popleft()
+            if ids.size == 0:
+                continue
+            senders = np.column_stack((messages['x'], messages['y']))
+            m, r, _, _ = UniformGrid(pos, self.range).pairs_within(senders, self.range)
+            not_self = ids[r] != messages['sender'][m]
+            m, r = m[not_self], r[not_self]
+            kept = self._rng.random(m.size) >= self.drop_rate
+            self.dropped += int(np.count_nonzero(~kept))
+            recipients.append(ids[r[kept]])
+            delivered.append(messages[m[kept]])
+        if not recipients:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=MESSAGE_DTYPE)
+        recipients = np.concatenate(recipients)
+        delivered = np.concatenate(delivered)
+        order = np.argsort(recipients, kind='stable')
+        self.delivered += recipients.size
+        return recipients[order], delivered[order]
+
+
+class FriendlyAgent:
+    """One friendly's decision loop. It only touches its own drone's velocity and target."""
+
+    __slots__ = ('id', 'runtime', 'claims', 'target')
+
+    def __init__(self, drone_id: int, runtime: 'AgentSimulation'):
+        self.id = drone_id
+        self.runtime = runtime
+        self.claims = {} # hostile id -> (cost, claimant id, time heard)
+        self.target = -1
+
+    async def run(self):
+        runtime = self.runtime
+        while True:
+            await runtime.tick_started
+            try:
+                row = runtime.row_of(self.id)
+                if row < 0:
+                    return # Sacrificed: the agent leaves the swarm
+                runtime.publish(row, *self.decide(row))
+            except Exception as exc:
+                runtime.agent_failed(exc)
+                raise
+            finally:
+                runtime.agent_done() # Always, or the tick would wait for this agent forever
+
+    def _hear(self, inbox: np.ndarray, now: float):
+        """Updates the claim table from this tick's messages. A sender holds at most one
+        claim, so its latest message replaces whatever it claimed before."""
+        claims = self.claims
+        if inbox.size:
+            heard = set(inbox['sender'].tolist())
+            for target in [t for t, c in claims.items() if c[1] in heard]:
+                del claims[target]
+            claiming = inbox['target'] >= 0
+            for sender, target, cost in zip(
+                inbox['sender'][claiming].tolist(), inbox['target'][claiming].tolist(), inbox['cost'][claiming].tolist()
+            ):
+                known = claims.get(target)
+                if known is None or (cost, sender) < known[:2]:
+                    claims[target] = (cost, sender, now)
+        for target in [t for t, c in claims.items() if now - c[2] > CLAIM_TTL]:
+            del claims[target]
+
+    def decide(self, row: int):
+        """Returns (new velocity, target id, claim cost) for this tick."""
+        runtime = self.runtime
+        swarm = runtime.swarm
+        tuning = runtime.tuning
+        pos, vel = swarm.pos[row], swarm.velocity[row]
+        inbox = runtime.inbox(self.id)
+        self._hear(inbox, runtime.time)
+
+        # 1. Formation from the neighbour positions heard this tick
+        # (get_swarm_vectors for a single drone: separation + cohesion, same weights)
+        swarm_vector = np.zeros(2)
+        if inbox.size:
+            neighbours = np.column_stack((inbox['x'], inbox['y']))
+            offset = pos - neighbours
+            distance_sq = np.einsum('ij,ij->i', offset, offset)
+            near = distance_sq < R_SENSE ** 2
+            if near.any():
+                close = near & (distance_sq < tuning.r_safe_sep ** 2)
+                separation = (offset[close] / (distance_sq[close] + 1e-6)[:, None]).sum(axis=0)
+                cohesion = neighbours[near].mean(axis=0) - pos
+                swarm_vector = separation * tuning.separation_weight + cohesion * tuning.cohesion_weight
+
+        # 2. Own claim: cheapest sensed threat nobody else holds a better claim on
+        hostile_rows = runtime.sensed_hostiles(row)
+        target, cost = -1, 0.0
+        if hostile_rows.size:
+            costs = intercept_cost(pos, swarm.pos[hostile_rows], swarm.velocity[hostile_rows], INTERCEPT_SPEED) * MAX_SPEED
+            for k in np.argsort(costs, kind='stable').tolist():
+                hostile_id = int(swarm.ids[hostile_rows[k]])
+                claim = self.claims.get(hostile_id)
+                if claim is None or (costs[k], self.id) < claim[:2]:
+                    target, cost = hostile_id, float(costs[k])
+                    hostile_row = hostile_rows[k]
+                    break
+        self.target = target
+
+        # 3. Attack vector + steering (same rules as coordination.get_move_vectors)
+        desired_velocity = swarm_vector
+        if target != -1:
+            point, _, _ = solve_intercept(pos, swarm.pos[hostile_row], swarm.velocity[hostile_row], aim_speed(vel))
+            raw = point - pos
+            norm = np.linalg.norm(raw)
+            direction = raw / norm if norm > 0 else np.zeros(2)
+            desired_velocity = direction * MAX_SPEED * tuning.attack_weight + swarm_vector * tuning.formation_weight
+        steering_force = calculate_steering_force(vel, desired_velocity, tuning.max_acceleration)
+        return clamp_speed(vel + steering_force * runtime.step_dt, MAX_SPEED), target, cost
+
+
+class AgentSimulation(Simulation):
+    """Simulation whose coordination phase is run by independent FriendlyAgents.
+
+    Sensing, physics and bookkeeping are the ones of Simulation; only the
+    decision making changes. Call close() (run() does) to stop the agents.
+    """
+
+    def __init__(self, scenario=INITIAL_DRONE_DATA, dt: float = DELTA_TIME, radio: Radio = None, **kwargs):
+        super().__init__(scenario, dt, **kwargs)
+        self.radio = radio or Radio()
+        self.step_dt = dt
+        self._loop = asyncio.new_event_loop()
+        self.tick_started = self._loop.create_future()
+        self._all_done = None
+        self._running = 0
+
+        friendly = self.swarm.friendly_mask()
+        self.agents = [FriendlyAgent(int(i), self) for i in self.swarm.ids[friendly]]
+        self._tasks = [self._loop.create_task(agent.run()) for agent in self.agents]
+        self._running = len(self.agents)
+        self._loop.run_until_complete(asyncio.sleep(0)) # Let every agent reach its first tick
+
+    # --- Per-tick data handed to the agents (built once per tick, in batch) ---
+
+    def row_of(self, drone_id: int) -> int:
+        return self.swarm.registry.slot_of(drone_id)
+
+    def inbox(self, drone_id: int) -> np.ndarray:
+        lo, hi = np.searchsorted(self._recipients, [drone_id, drone_id + 1])
+        return self._messages[lo:hi]
+
+    def sensed_hostiles(self, row: int) -> np.ndarray:
+        """Rows of the live hostiles inside r_threat of friendly `row` (its own sensor)."""
+        lo, hi = self._sensed_start[row], self._sensed_start[row + 1]
+        return self._sensed_rows[lo:hi]
+
+    def publish(self, row: int, velocity, target: int, cost: float):
+        self._new_velocity[row] = velocity
+        self.swarm.target_id[row] = target
+        self._outbox.append((int(self.swarm.ids[row]), self.time, *self.swarm.pos[row], target, cost))
+
+    def agent_failed(self, exc: Exception):
+        """Fails the current tick with an agent's error (the step raises it)."""
+        if self._all_done is not None and not self._all_done.done():
+            self._all_done.set_exception(exc)
+
+    def agent_done(self):
+        self._running -= 1
+        if self._running == 0 and self._all_done is not None and not self._all_done.done():
+            self._all_done.set_result(None)
+
+    # --- Coordination phase ---
+
+    def coordinate(self, index, dt: float) -> np.ndarray:
+        swarm = self.swarm
+        self.step_dt = dt
+
+        # Radio deliveries due now
+        self._recipients, self._messages = self.radio.deliver(self.time)
+
+        # Own-sensor threats: live hostiles within r_threat of each friendly, from the tick's pair cache
+        hostile = swarm.live_hostiles()
+        friendly = swarm.live_friendlies()
+        counts = np.zeros(len(swarm) + 1, dtype=np.intp)
+        self._sensed_rows = np.zeros(0, dtype=np.intp)
+        if hostile.size and friendly.size:
+            fi, hj, _, _ = swarm.pair_cache().pairs(friendly, hostile, self.tuning.r_threat)
+            self._sensed_rows = hostile[hj]
+            np.add.at(counts, friendly[fi] + 1, 1)
+        self._sensed_start = np.cumsum(counts)
+
+        # Wake every agent for this tick and wait until all have posted
+        self._new_velocity = swarm.velocity.copy()
+        swarm.is_claimed[:] = False
+        swarm.target_id[friendly] = -1
+        self._outbox = []
+        self._loop.run_until_complete(self._tick())
+        # Claimed hostiles, as the batched coordinator marks them
+        claimed = swarm.target_id[friendly]
+        swarm.is_claimed[swarm.registry.slot_of(claimed[claimed >= 0])] = True
+
+        # Post this tick's messages as one batch (recipients: friendlies where they are now)
+        messages = np.array(self._outbox, dtype=MESSAGE_DTYPE)
+        self.radio.send(self.time, messages, swarm.ids[friendly].copy(), swarm.pos[friendly].copy())
+        return self._new_velocity
+
+    async def _tick(self):
+        if self._running == 0:
+            return
+        self._all_done = self._loop.create_future()
+        started, self.tick_started = self.tick_started, self._loop.create_future()
+        started.set_result(None)
+        try:
+            await self._all_done
+        finally:
+            self._running = sum(1 for task in self._tasks if not task.done())
+
+    def run(self, *args, **kwargs):
+        try:
+            return super().run(*args, **kwargs)
+        finally:
+            self.close()
+
+    def close(self):
+        """Stops every agent and the event loop."""
+        if self._loop.is_closed():
+            return
+        for task in self._tasks:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*self._tasks, return_exceptions=True))
+        self._loop.close()
@@ -0,0 +1,277 @@
+# assignment.py - Per-tick global assignment of friendlies to threatening hostiles
+#
+# Replaces the greedy "first friendly in list order claims it" rule with an
+# auction (Bertsekas, Jacobi variant) over the sparse friendly/hostile pairs
+# inside R_THREAT. Every unassigned friendly bids for its best hostile at the
+# same time; each hostile goes to its highest bidder. Prices carry over from
+# the previous tick, so a tick whose assignment is still optimal finishes in a
+# single vectorized round. covering_auction() makes sure no assignment that
+# covers more threats is passed over for a cheaper one.
+
+import numpy as np
+from constants import MAX_SPEED
+from intercept import MAX_INTERCEPT_TIME
+
+AUCTION_EPSILON = 0.05      # Minimum bid increment (distance units); final cost is within F * eps of optimal
+MAX_AUCTION_ROUNDS = 1000   # Hard cap on bidding rounds per tick
+
+# Costs are interceptor flight distances (time to intercept * MAX_SPEED, capped at
+# MAX_INTERCEPT_TIME). The auction maximizes sum(reward - cost): with
+# ASSIGNMENT_REWARD every allowed pair is worth taking, but a cheaper matching
+# can still beat one that covers more threats. covering_auction() settles
+# coverage first (see there).
+MAX_ASSIGNMENT_COST = MAX_INTERCEPT_TIME * MAX_SPEED
+ASSIGNMENT_REWARD = MAX_ASSIGNMENT_COST + 1.0
+
+
+def covering_reward(n_rows: int, n_cols: int, epsilon: float = AUCTION_EPSILON) -> float:
+    """A reward above the total cost of any matching (plus the auction's n * epsilon slack):
+    under it, covering one more column always beats any saving in cost."""
+    return np.minimum(n_rows, n_cols) * MAX_ASSIGNMENT_COST + n_rows * epsilon + 1.0
+
+
+def auction_assign(rows, cols, benefit, n_rows, n_cols, prices=None, row_to_col=None,
+                   epsilon=AUCTION_EPSILON, max_rounds=MAX_AUCTION_ROUNDS):
+    """Sparse asymmetric auction. Each row (person) gets at most one column (object).
+
+    rows/cols/benefit describe the allowed pairs; a person may also stay
+    unassigned (benefit 0). `prices` and `row_to_col` warm-start the solve:
+    kept pairs must still be allowed and within epsilon of their best option.
+    Ties go to the lowest column for a bidder and the lowest row for an object,
+    so the result depends only on the index order the caller chose.
+
+    Returns (row_to_col, prices); row_to_col[i] is -1 for an unassigned row.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    cols = np.asarray(cols, dtype=np.intp)
+    benefit = np.asarray(benefit, dtype=float)
+    prices = np.zeros(n_cols) if prices is None else np.array(prices, dtype=float)
+    assigned = np.full(n_rows, -1, dtype=np.intp) if row_to_col is None else np.array(row_to_col, dtype=np.intp)
+    if rows.size == 0:
+        return np.full(n_rows, -1, dtype=np.intp), np.zeros(n_cols)
+
+    # Group the pairs by row
+    order = np.lexsort((cols, rows))
+    rows, cols, benefit = rows[order], cols[order], benefit[order]
+    group_rows, starts = np.unique(rows, return_index=True)
+    counts = np.diff(np.append(starts, rows.size))
+    edge_index = np.arange(rows.size)
+
+    def best_two(values, seg_starts, seg_counts, seg_edges):
+        """Per segment: best value, index of the (first) best edge, and second best (>= 0)."""
+        best = np.maximum.reduceat(values, seg_starts)
+        is_best = values == np.repeat(best, seg_counts)
+        best_edge = np.minimum.reduceat(np.where(is_best, seg_edges, rows.size), seg_starts)
+        others = np.where(seg_edges == np.repeat(best_edge, seg_counts), -np.inf, values)
+        second = np.maximum(np.maximum.reduceat(others, seg_starts), 0.0)
+        return best, best_edge, second
+
+    # 1. Warm start: keep last assignment's pairs that are still allowed and eps-optimal
+    col_to_row = np.full(n_cols, -1, dtype=np.intp)
+    has_pairs = np.zeros(n_rows, dtype=bool)
+    has_pairs[group_rows] = True
+    kept = (assigned >= 0) & has_pairs
+    assigned[~kept] = -1
+    if kept.any():
+        held_value = np.full(n_rows, -np.inf)
+        match = assigned[rows] == cols
+        held_value[rows[match]] = benefit[match] - prices[cols[match]]
+        best, _, _ = best_two(benefit - prices[cols], starts, counts, edge_index)
+        best_by_row = np.full(n_rows, -np.inf)
+        best_by_row[group_rows] = best
+        kept &= held_value >= np.maximum(best_by_row, 0.0) - epsilon
+        assigned[~kept] = -1
+        col_to_row[assigned[kept]] = np.flatnonzero(kept)
+    prices[col_to_row < 0] = 0.0 # Unheld objects start from zero
+
+    # 2. Bidding rounds (each round only touches the pairs of the current bidders)
+    bidding = np.zeros(n_rows, dtype=bool)
+    bidding[group_rows] = assigned[group_rows] < 0
+    for _ in range(max_rounds):
+        active_groups = np.flatnonzero(bidding[group_rows])
+        if active_groups.size == 0:
+            break
+        seg_counts = counts[active_groups]
+        seg_starts = np.cumsum(seg_counts) - seg_counts
+        seg_edges = np.repeat(starts[active_groups] - seg_starts, seg_counts) + np.arange(seg_counts.sum())
+        best, best_edge, second = best_two(
+            benefit[seg_edges] - prices[cols[seg_edges]], seg_starts, seg_counts, seg_edges
+        )
+        group_rows_active = group_rows[active_groups]
+
+        # A bidder whose best option is worth nothing stays unassigned for good
+        bidding[group_rows_active[best <= 0]] = False
+        bids = best > 0
+        if not bids.any():
+            break
+        bidder = group_rows_active[bids]
+        wanted = cols[best_edge[bids]]
+        offer = prices[wanted] + best[bids] - second[bids] + epsilon
+
+        # Each object goes to its highest offer (lowest row on ties)
+        top = np.full(n_cols, -np.inf)
+        np.maximum.at(top, wanted, offer)
+        winner = np.full(n_cols, n_rows, dtype=np.intp)
+        is_top = offer == top[wanted]
+        np.minimum.at(winner, wanted[is_top], bidder[is_top])
+        won = np.unique(wanted)
+        new_owner = winner[won]
+
+        evicted = col_to_row[won]
+        evicted = evicted[evicted >= 0]
+        assigned[evicted] = -1
+        bidding[evicted] = True
+
+        col_to_row[won] = new_owner
+        assigned[new_owner] = won
+        prices[won] = top[won]
+        bidding[new_owner] = False
+
+    return assigned, prices
+
+
+def augmenting_columns(rows, cols, row_to_col, n_rows, n_cols) -> np.ndarray:
+    """Mask of the unassigned columns an alternating path from an unassigned row leads to:
+    the matching is of maximum size (Berge) in every connected part without one.
+    Breadth-first, one layer per pass."""
+    rows = np.asarray(rows, dtype=np.intp)
+    cols = np.asarray(cols, dtype=np.intp)
+    owner = np.full(n_cols, -1, dtype=np.intp)
+    held = np.flatnonzero(row_to_col >= 0)
+    owner[row_to_col[held]] = held
+    seen_rows = row_to_col < 0
+    seen_cols = np.zeros(n_cols, dtype=bool)
+    free = np.zeros(n_cols, dtype=bool)
+    frontier = seen_rows.copy()
+    while frontier.any():
+        reached = np.unique(cols[frontier[rows]])
+        reached = reached[~seen_cols[reached]]
+        seen_cols[reached] = True
+        next_rows = owner[reached]
+        free[reached[next_rows < 0]] = True
+        next_rows = next_rows[next_rows >= 0]
+        frontier = np.zeros(n_rows, dtype=bool)
+        frontier[next_rows[~seen_rows[next_rows]]] = True
+        seen_rows |= frontier
+    return free
+
+
+def covering_auction(rows, cols, cost, n_rows, n_cols, prices=None, row_to_col=None,
+                     epsilon=AUCTION_EPSILON, max_rounds=MAX_AUCTION_ROUNDS, row_group=None, col_group=None):
+    """auction_assign over costs with a lexicographic objective: as many columns covered as
+    possible, then the lowest total cost.
+
+    The auction runs with ASSIGNMENT_REWARD, which keeps price wars short and is warm-started
+    tick to tick. Only if its matching could cover more (augmenting_columns) is it solved
+    again, from there, under covering_reward(); a matching of maximum size that is optimal for
+    sum(ASSIGNMENT_REWARD - cost) already has the lowest cost among those of its size.
+    Prices are taken and returned on the ASSIGNMENT_REWARD scale.
+
+    `row_group` / `col_group` split the problem into independent sub-problems (e.g. the
+    episodes of a batch; -1 = a row or column in none, which must have no pairs). Each one is
+    checked, rewarded by its own size and re-solved over its own pairs, so its result is the
+    same as solving it alone. Without them everything is one problem.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    cols = np.asarray(cols, dtype=np.intp)
+    cost = np.asarray(cost, dtype=float)
+    if row_group is None:
+        row_group, col_group = np.zeros(n_rows, dtype=np.intp), np.zeros(n_cols, dtype=np.intp)
+    n_groups = max(row_group.max(initial=-1), col_group.max(initial=-1)) + 1
+
+    row_to_col, prices = auction_assign(rows, cols, ASSIGNMENT_REWARD - cost, n_rows, n_cols,
+                                        prices, row_to_col, epsilon, max_rounds)
+
+    def short_groups():
+        """Groups whose matching could cover more."""
+        short = np.zeros(n_groups + 1, dtype=bool) # Last entry: group -1
+        short[col_group[augmenting_columns(rows, cols, row_to_col, n_rows, n_cols)]] = True
+        return short[:-1]
+
+    short = short_groups()
+    if not short.any():
+        return row_to_col, prices
+    # Raising every benefit by the same `lift` keeps the held pairs eps-optimal; only the
+    # rows left out find their options worth bidding for again
+    in_group = row_group >= 0
+    sizes = np.bincount(row_group[in_group], minlength=n_groups), np.bincount(col_group[col_group >= 0], minlength=n_groups)
+    lift = covering_reward(*sizes, epsilon) - ASSIGNMENT_REWARD
+
+    def resolve(groups, warm: bool):
+        """Re-solves the `groups` under the covering reward over their own pairs only."""
+        nonlocal row_to_col, prices
+        pick = groups[row_group[rows]]
+        solved_rows, solved_prices = auction_assign(
+            rows[pick], cols[pick], ASSIGNMENT_REWARD + lift[row_group[rows[pick]]] - cost[pick], n_rows, n_cols,
+            prices if warm else None, row_to_col if warm else None, epsilon, max_rounds,
+        )
+        mine = in_group & groups[row_group]
+        row_to_col[mine] = solved_rows[mine]
+        mine = (col_group >= 0) & groups[col_group]
+        prices[mine] = solved_prices[mine]
+
+    resolve(short, warm=True)
+    stuck = short & short_groups()
+    if stuck.any():
+        # The warm start held it back: a cold solve under the covering reward cannot
+        resolve(stuck, warm=False)
+    lifted = (col_group >= 0) & short[col_group]
+    prices[lifted] = np.maximum(prices[lifted] - lift[col_group[lifted]], 0.0)
+    return row_to_col, prices
+
+
+class TargetAssigner:
+    """Keeps the auction's prices and assignment between ticks, keyed by drone id,
+    so each tick starts from the previous solution."""
+
+    def __init__(self, epsilon=AUCTION_EPSILON, max_rounds=MAX_AUCTION_ROUNDS):
+        self.epsilon = epsilon
+        self.max_rounds = max_rounds
+        self._friendly_ids = np.zeros(0, dtype=np.int64) # Last tick's assignment (by id)
+        self._target_ids = np.zeros(0, dtype=np.int64)
+        self._hostile_ids = np.zeros(0, dtype=np.int64)  # Last tick's prices (by id)
+        self._prices = np.zeros(0)
+
+    def assign(self, friendly_ids, hostile_ids, fi, hj, cost) -> np.ndarray:
+        """Assigns friendlies to hostiles over the allowed pairs (fi[k], hj[k]) with cost[k].
+
+        fi / hj index into friendly_ids / hostile_ids. Returns, per friendly,
+        the index of its hostile or -1. Persons and objects are ranked by id,
+        so the answer does not depend on the order of the input arrays.
+        """
+        friendly_ids = np.asarray(friendly_ids, dtype=np.int64)
+        hostile_ids = np.asarray(hostile_ids, dtype=np.int64)
+        f_order = np.argsort(friendly_ids, kind='stable')
+        h_order = np.argsort(hostile_ids, kind='stable')
+        f_rank = np.empty_like(f_order)
+        f_rank[f_order] = np.arange(f_order.size)
+        h_rank = np.empty_like(h_order)
+        h_rank[h_order] = np.arange(h_order.size)
+        sorted_hostiles = hostile_ids[h_order]
+
+        # Warm start: previous prices and pairs, translated to this tick's ranks
+        prices = np.zeros(hostile_ids.size)
+        known = np.isin(self._hostile_ids, sorted_hostiles)
+        prices[np.searchsorted(sorted_hostiles, self._hostile_ids[known])] = self._prices[known]
+        row_to_col = np.full(friendly_ids.size, -1, dtype=np.intp)
+        sorted_friendlies = friendly_ids[f_order]
+        known = np.isin(self._friendly_ids, sorted_friendlies) & np.isin(self._target_ids, sorted_hostiles)
+        row_to_col[np.searchsorted(sorted_friendlies, self._friendly_ids[known])] = (
+            np.searchsorted(sorted_hostiles, self._target_ids[known])
+        )
+
+        row_to_col, prices = covering_auction(
+            f_rank[fi], h_rank[hj], cost, friendly_ids.size, hostile_ids.size,
+            prices, row_to_col, self.epsilon, self.max_rounds,
+        )
+
+        # Remember this tick's solution (by id) for the next one
+        paired = row_to_col >= 0
+        self._friendly_ids = sorted_friendlies[paired]
+        self._target_ids = sorted_hostiles[row_to_col[paired]]
+        self._hostile_ids = sorted_hostiles
+        self._prices = prices
+
+        target = np.full(friendly_ids.size, -1, dtype=np.intp)
+        target[f_order[paired]] = h_order[row_to_col[paired]]
+        return target
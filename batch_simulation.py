@@ -0,0 +1,297 @@
+# batch_simulation.py - Many small episodes advanced together in one set of arrays
+#
+# Every array has a leading episode axis: positions are (B, N_max, 2), flags are
+# (B, N_max). Slots beyond an episode's drone count, sacrificed friendlies and
+# hostiles that finished blinking are simply marked dead in `alive` instead of
+# being compacted away. The rules are the same as Simulation (coordination.py
+# and physics.py), slot order standing in for row order.
+
+import numpy as np
+
+from constants import DELTA_TIME, R_SENSE, R_INTERCEPT, MAX_SPEED
+from coordination import calculate_steering_force, clamp_speed, aim_speed, INTERCEPT_SPEED
+from intercept import solve_intercept, intercept_cost
+from assignment import covering_auction
+from physics import BLINK_DURATION, MAX_ADAPTIVE_STEP, closest_approach
+from simulation import SimulationResult, DEFAULT_MAX_TIME
+from hostile_policies import HostilePolicy
+from tuning import Tuning, DEFAULT_TUNING
+
+
+class BatchedSimulation:
+    """Steps B independent episodes at once. Finished episodes drop out of the
+    active set, so the per-tick cost shrinks as the batch resolves. With
+    `adaptive`, each episode picks its own step length like Simulation does.
+    `policy` steers the hostiles of every episode in one call per tick, and
+    `tuning` sets the coordination ranges and weights of all of them."""
+
+    def __init__(self, scenarios: list, dt: float = DELTA_TIME, adaptive: bool = False,
+                 max_step: float = MAX_ADAPTIVE_STEP, policy: HostilePolicy = None, tuning: Tuning = None):
+        batch = len(scenarios)
+        n_max = max((len(s) for s in scenarios), default=0)
+        self.dt = dt
+        self.adaptive = adaptive
+        self.max_step = max_step
+        self.policy = policy
+        self.tuning = tuning or DEFAULT_TUNING
+        self.batch = batch
+
+        self.ids = np.full((batch, n_max), -1, dtype=np.int64)
+        self.pos = np.zeros((batch, n_max, 2))
+        self.velocity = np.zeros((batch, n_max, 2))
+        self.is_friendly = np.zeros((batch, n_max), dtype=bool)
+        self.is_hostile = np.zeros((batch, n_max), dtype=bool)
+        self.alive = np.zeros((batch, n_max), dtype=bool)
+        self.is_neutralized = np.zeros((batch, n_max), dtype=bool)
+        self.blink_timer = np.zeros((batch, n_max))
+        self.target_slot = np.full((batch, n_max), -1, dtype=np.int64)
+
+        # Auction state carried between ticks (one entry per episode slot)
+        self._prices = np.zeros(batch * n_max)
+        self._assignment = np.full(batch * n_max, -1, dtype=np.intp)
+
+        for b, scenario in enumerate(scenarios):
+            for k, data in enumerate(scenario):
+                self.ids[b, k] = data[0]
+                self.pos[b, k] = (data[1], data[2])
+                self.velocity[b, k] = data[4]
+                self.is_friendly[b, k] = data[3] == 'FRIENDLY'
+                self.is_hostile[b, k] = data[3] != 'FRIENDLY'
+                self.alive[b, k] = True
+
+        # Per-episode bookkeeping (indexed by episode, not by active position)
+        self.time = np.zeros(batch)
+        self.ticks = np.zeros(batch, dtype=np.int64)
+        self.finished = np.zeros(batch, dtype=bool)
+        self.friendly_losses = np.zeros(batch, dtype=np.int64)
+        self.hostiles_neutralized = np.zeros(batch, dtype=np.int64)
+        self.last_neutralization_time = np.full(batch, np.nan)
+
+        self.active = np.arange(batch) # Episodes still running
+        self._pairs = None             # This tick's _pairwise() result
+
+    # --- Active-set views ---
+
+    def _drop_finished(self, done: np.ndarray):
+        """Removes the active episodes flagged in `done` from the active set."""
+        self.finished[self.active[done]] = True
+        self.active = self.active[~done]
+
+    def _live_counts(self, e):
+        live = self.alive[e] & ~self.is_neutralized[e]
+        return (
+            np.count_nonzero(live & self.is_friendly[e], axis=1),
+            np.count_nonzero(live & self.is_hostile[e], axis=1),
+        )
+
+    # --- Tick stages ---
+
+    def _pairwise(self, e):
+        """(offsets, distances) between every two slots of the episodes `e`, offsets[b, i, j] =
+        pos[i] - pos[j]. Computed once per tick and shared by every stage until physics
+        moves the drones."""
+        if self._pairs is None:
+            pos = self.pos[e]
+            offsets = pos[:, :, None, :] - pos[:, None, :, :]
+            self._pairs = offsets, np.sqrt(np.einsum('bijk,bijk->bij', offsets, offsets))
+        return self._pairs
+
+    def _step_lengths(self, e):
+        """Per-episode step (physics.adaptive_step): the longest multiple of dt, up to
+        max_step, before any hostile can reach r_threat of a friendly."""
+        if not self.adaptive:
+            return np.full(len(e), self.dt)
+        pos, vel = self.pos[e], self.velocity[e]
+        live = self.alive[e] & ~self.is_neutralized[e]
+        hostile = live & self.is_hostile[e]
+        friendly = live & self.is_friendly[e]
+        _, distances = self._pairwise(e)
+        pair = hostile[:, :, None] & friendly[:, None, :]
+        nearest = np.where(pair, distances, np.inf).min(axis=(1, 2))
+        hostile_speed = np.where(hostile, np.sqrt(np.einsum('bik,bik->bi', vel, vel)), 0.0).max(axis=1)
+        closing_speed = hostile_speed + MAX_SPEED
+
+        gap = nearest - self.tuning.r_threat
+        max_steps = int(round(self.max_step / self.dt))
+        with np.errstate(invalid='ignore'):
+            steps = np.where(gap > 0, np.floor(np.minimum(gap / closing_speed / self.dt, max_steps)), 1)
+        steps = np.where(pair.any(axis=(1, 2)), np.clip(steps, 1, max_steps), 1)
+        return steps * self.dt
+
+    def _coordinate(self, e, dt):
+        """Batched get_move_vectors over the episodes `e`. Writes velocity and target_slot."""
+        pos, vel = self.pos[e], self.velocity[e]
+        live = self.alive[e] & ~self.is_neutralized[e]
+        friendly = live & self.is_friendly[e]
+        hostile = live & self.is_hostile[e]
+        n = pos.shape[1]
+        tuning = self.tuning
+
+        offsets, distances = self._pairwise(e) # (B, N, N, 2): pos[i] - pos[j]
+
+        # 1. Perception: friendly i sees friendly j (j != i) within R_SENSE
+        sees = friendly[:, :, None] & friendly[:, None, :] & (distances < R_SENSE)
+        sees &= ~np.eye(n, dtype=bool)
+
+        # 2. Separation + cohesion (same weights as get_coordination_vector)
+        close = sees & (distances < tuning.r_safe_sep)
+        push = offsets / (distances ** 2 + 1e-6)[..., None]
+        separation = np.where(close[..., None], push, 0.0).sum(axis=2)
+        neighbour_count = sees.sum(axis=2)
+        neighbour_sum = np.where(sees[..., None], pos[:, None, :, :], 0.0).sum(axis=2)
+        has_neighbours = neighbour_count > 0
+        safe_count = np.maximum(neighbour_count, 1)[..., None]
+        cohesion = np.where(has_neighbours[..., None], neighbour_sum / safe_count - pos, 0.0)
+        swarm_vector = np.where(has_neighbours[..., None],
+                                separation * tuning.separation_weight + cohesion * tuning.cohesion_weight, 0.0)
+
+        # 3. Target choice: one auction over every (friendly, hostile) pair inside r_threat,
+        # ranked by time to intercept. Persons and objects are numbered episode * N_max + slot,
+        # so the episodes are disjoint sub-problems solved in the same rounds; prices persist per slot.
+        # Each episode's live friendlies and hostiles form its own group, so coverage is settled
+        # per episode exactly as Simulation settles it (the batch's make-up does not matter).
+        b, i, j = np.nonzero(friendly[:, :, None] & hostile[:, None, :] & (distances < tuning.r_threat))
+        base = (e * n)[b]
+        cost = intercept_cost(pos[b, i], pos[b, j], vel[b, j], INTERCEPT_SPEED) * MAX_SPEED
+        slots = (e * n)[:, None] + np.arange(n)
+        episode = np.broadcast_to(e[:, None], slots.shape)
+        row_group = np.full(self.batch * n, -1, dtype=np.intp)
+        row_group[slots[friendly]] = episode[friendly]
+        col_group = np.full(self.batch * n, -1, dtype=np.intp)
+        col_group[slots[hostile]] = episode[hostile]
+        assigned, prices = covering_auction(
+            base + i, base + j, cost, self.batch * n, self.batch * n,
+            self._prices, self._assignment, row_group=row_group, col_group=col_group,
+        )
+        self._prices, self._assignment = prices, assigned
+        mine = assigned.reshape(self.batch, n)[e]
+        target = np.where(mine >= 0, mine - (e * n)[:, None], -1)
+
+        # 4. Attack vector: aim at the intercept point of the claimed hostile
+        attacking = target >= 0
+        safe_target = np.where(attacking, target, 0)
+        target_pos = np.take_along_axis(pos, safe_target[..., None], axis=1)
+        target_vel = np.take_along_axis(vel, safe_target[..., None], axis=1)
+        intercept_point, _, _ = solve_intercept(pos, target_pos, target_vel, aim_speed(vel))
+        target_vector_raw = intercept_point - pos
+        norm = np.linalg.norm(target_vector_raw, axis=-1, keepdims=True)
+        target_vector = np.divide(target_vector_raw, norm, out=np.zeros_like(target_vector_raw), where=norm > 0)
+        desired_velocity = np.where(
+            attacking[..., None],
+            target_vector * MAX_SPEED * tuning.attack_weight + swarm_vector * tuning.formation_weight, swarm_vector
+        )
+
+        # 5. Steering + speed clamp (friendlies only; hostiles keep their velocity)
+        steering_force = calculate_steering_force(vel, desired_velocity, tuning.max_acceleration)
+        new_velocity = clamp_speed(vel + steering_force * dt[:, None, None], MAX_SPEED)
+        self.velocity[e] = np.where(friendly[..., None], new_velocity, vel)
+        self.target_slot[e] = np.where(friendly, target, -1)
+
+    def _steer_hostiles(self, e, dt):
+        """Applies the hostile policy to the live hostiles of the episodes `e` (one call for all)."""
+        pos, vel = self.pos[e], self.velocity[e]
+        live = self.alive[e] & ~self.is_neutralized[e]
+        b, k = np.nonzero(live & self.is_hostile[e])
+        distance = None
+        if self.policy.needs_friendlies:
+            # Distance to the closest live friendly of the same episode, inf beyond the policy's range
+            distances = self._pairwise(e)[1][b, k]
+            distances = np.where((live & self.is_friendly[e])[b], distances, np.inf).min(axis=1, initial=np.inf)
+            distance = np.where(distances < self.policy.friendly_range, distances, np.inf)
+        vel[b, k] = self.policy.steer(pos[b, k], vel[b, k], self.ids[e][b, k], self.time[e][b], dt[b], distance)
+        self.velocity[e] = vel
+
+    def _physics(self, e, dt):
+        """Batched update_physics over the episodes `e`. Returns engagements per episode."""
+        alive, neutralized = self.alive[e], self.is_neutralized[e]
+        live = alive & ~neutralized
+        vel = self.velocity[e]
+        start_pos = self.pos[e]
+        blink = self.blink_timer[e] + np.where(alive & neutralized, dt[:, None], 0.0)
+        pos = start_pos + np.where(live[..., None], vel * dt[:, None, None], 0.0)
+
+        # Swept test: closest approach along each pair's straight-line motion over the step
+        hostile = live & self.is_hostile[e]
+        friendly = live & self.is_friendly[e]
+        offsets, _ = self._pairwise(e) # Start positions: the drones have not moved yet this tick
+        relative_velocity = vel[:, :, None, :] - vel[:, None, :, :]
+        in_range = hostile[:, :, None] & friendly[:, None, :] & (
+            closest_approach(offsets, relative_velocity, dt[:, None, None]) < R_INTERCEPT
+        )
+
+        # One-to-one: hostiles in slot order take the first friendly slot in range not yet used
+        rows = np.arange(len(e))
+        used = np.zeros_like(friendly)
+        kills = np.zeros(len(e), dtype=np.int64)
+        for k in range(pos.shape[1]):
+            free = in_range[:, k, :] & ~used
+            has = free.any(axis=1)
+            first = np.argmax(free, axis=1)
+            used[rows[has], first[has]] = True
+            neutralized[has, k] = True
+            kills += has
+
+        # Sacrificed friendlies and hostiles that finished blinking leave the episode
+        expired = neutralized & (blink >= BLINK_DURATION)
+        self.alive[e] = alive & ~used & ~expired
+        self.is_neutralized[e] = neutralized
+        self.blink_timer[e] = blink
+        self.pos[e] = pos
+        self._pairs = None # Positions moved
+        return kills
+
+    # --- Driver ---
+
+    def step(self, max_time: float = DEFAULT_MAX_TIME):
+        """Advances every active episode by one tick, retiring the ones that are decided."""
+        e = self.active
+        if e.size == 0:
+            return
+
+        # Same stop rules as Simulation.run(): no hostile rows left, nobody left
+        # to intercept with, or out of time
+        friendlies, hostiles = self._live_counts(e)
+        no_hostiles = ~np.any(self.alive[e] & self.is_hostile[e], axis=1)
+        done = no_hostiles | ((friendlies == 0) & (hostiles > 0)) | (self.time[e] >= max_time)
+        if done.any():
+            self._drop_finished(done)
+            e = self.active
+            if e.size == 0:
+                return
+
+        self._pairs = None # The active set may have changed
+        dt = self._step_lengths(e)
+        self._coordinate(e, dt)
+        if self.policy is not None:
+            self._steer_hostiles(e, dt)
+        kills = self._physics(e, dt)
+        self.ticks[e] += 1
+        self.time[e] += dt
+
+        self.hostiles_neutralized[e] += kills
+        self.friendly_losses[e] += kills
+        scored = kills > 0
+        self.last_neutralization_time[e[scored]] = self.time[e[scored]]
+
+    def run(self, max_time: float = DEFAULT_MAX_TIME) -> list:
+        """Runs every episode to completion and returns one SimulationResult per episode."""
+        while self.active.size:
+            self.step(max_time)
+        return self.results()
+
+    def results(self) -> list:
+        _, hostiles = self._live_counts(np.arange(self.batch))
+        results = []
+        for b in range(self.batch):
+            cleared = bool(hostiles[b] == 0)
+            last = self.last_neutralization_time[b]
+            results.append(SimulationResult(
+                cleared=cleared,
+                time_to_clear=(0.0 if np.isnan(last) else float(last)) if cleared else None,
+                friendly_losses=int(self.friendly_losses[b]),
+                hostiles_neutralized=int(self.hostiles_neutralized[b]),
+                leaked_hostiles=int(hostiles[b]),
+                ticks=int(self.ticks[b]),
+                sim_time=float(self.time[b]),
+            ))
+        return results
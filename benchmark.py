@@ -0,0 +1,212 @@
+# benchmark.py - Scaling benchmark for the tick pipeline
+#
+# Builds synthetic swarms (constant density, so each drone sees a similar number
+# of neighbours at every size) and times each stage of a tick on its own.
+#
+# Usage:
+#   python benchmark.py                                   # 10 .. 100k drones, all stages
+#   python benchmark.py --sizes 100 1000 --out before.json
+#   python benchmark.py --compare before.json             # print speedups vs an earlier run
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+from drone import Drone, DroneType
+from swarm_state import SwarmState
+from sensing import get_local_view, update_spatial_index, clear_spatial_index
+from coordination import get_move_vector, get_move_vectors
+from physics import update_physics
+from assignment import TargetAssigner
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+STAGES = ['spatial_index', 'pair_cache', 'get_local_view', 'get_move_vector', 'get_move_vectors', 'handle_physics_update',
+          'draw_simulation']
+
+SPACING = 20.0          # Average distance between neighbouring drones
+FRIENDLY_FRACTION = 0.7
+SAMPLE_DRONES = 200     # Per-drone stages are timed on this many drones and scaled up to N
+STAGE_BUDGET = 2.0      # Seconds per tick; a stage slower than this is skipped at larger sizes
+
+
+def make_swarm(n: int, seed: int = 0) -> SwarmState:
+    """Synthetic swarm: friendlies spread over a square, hostiles inbound from its right half."""
+    rng = np.random.default_rng(seed)
+    side = SPACING * np.sqrt(max(n, 1))
+    pos = rng.uniform(-side / 2, side / 2, (n, 2))
+    is_friendly = rng.random(n) < FRIENDLY_FRACTION
+    velocity = np.where(is_friendly[:, None], 0.0, rng.uniform(-20.0, -10.0, (n, 1)) * np.array([1.0, 0.0]))
+    drones = [
+        Drone(id=i + 1, pos=pos[i], velocity=list(velocity[i]),
+              type=DroneType.FRIENDLY if is_friendly[i] else DroneType.HOSTILE)
+        for i in range(n)
+    ]
+    return SwarmState.from_drones(drones)
+
+
+def _copy_swarm(swarm: SwarmState) -> SwarmState:
+    drones = [
+        Drone(id=d.id, pos=d.pos.copy(), velocity=list(d.velocity), type=d.type) for d in swarm.drones
+    ]
+    return SwarmState.from_drones(drones)
+
+
+# --- Stage runners: each returns a callable doing one tick's worth of that stage ---
+# (per-drone stages run on a sample and report `scale` = N / sample size)
+
+def _stage(name, swarm, screen):
+    n = len(swarm)
+    sample = swarm.drones[:min(n, SAMPLE_DRONES)]
+    scale = n / max(len(sample), 1)
+
+    if name == 'spatial_index':
+        return (lambda: update_spatial_index(swarm.drones, swarm.pos, swarm.friendly_mask())), 1.0
+    if name == 'get_local_view':
+        update_spatial_index(swarm.drones, swarm.pos, swarm.friendly_mask())
+        return (lambda: [get_local_view(d, swarm.drones) for d in sample]), scale
+    if name == 'get_move_vector':
+        update_spatial_index(swarm.drones, swarm.pos, swarm.friendly_mask())
+        friendlies = [d for d in sample if not d.is_hostile()]
+        scale = n / max(len(friendlies), 1) * FRIENDLY_FRACTION
+        return (lambda: [get_move_vector(d, swarm.drones) for d in friendlies]), scale
+    if name == 'pair_cache':
+        index = update_spatial_index(swarm.drones, swarm.pos, swarm.friendly_mask())
+        def run():
+            swarm._pairs = None # Positions never change here: a kept cache would be reused for free
+            swarm.pair_cache(grid=index.grid)
+        return run, 1.0
+    if name == 'get_move_vectors':
+        # Pays what a real tick does: the tick's pair cache (also timed alone as pair_cache)
+        # and a cold assignment, not the ones left over from the previous repetition
+        index = update_spatial_index(swarm.drones, swarm.pos, swarm.friendly_mask())
+        def run():
+            swarm._pairs = None
+            get_move_vectors(swarm, index.grid, TargetAssigner())
+        return run, 1.0
+    if name == 'handle_physics_update':
+        # Physics removes drones, so every repetition works on a fresh copy
+        copies = []
+        def run():
+            update_physics(copies.pop() if copies else _copy_swarm(swarm))
+        def prepare(k):
+            copies[:] = [_copy_swarm(swarm) for _ in range(k)]
+        run.prepare = prepare
+        return run, 1.0
+    if name == 'draw_simulation':
+        import visualization
+        visualization.screen = screen
+        return (lambda: visualization.draw_simulation(swarm.drones)), 1.0
+    raise ValueError(f"Unknown stage: {name}")
+
+
+def time_stage(name, swarm, screen, repeat):
+    run, scale = _stage(name, swarm, screen)
+    if hasattr(run, 'prepare'):
+        run.prepare(repeat + 1)
+
+    run() # Warm-up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    # Peak memory is measured on a separate run: tracemalloc slows everything down
+    if hasattr(run, 'prepare'):
+        run.prepare(1)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = float(np.median(times)) * scale
+    return {
+        'stage': name,
+        'n': len(swarm),
+        'seconds_per_tick': seconds,
+        'ticks_per_sec': 1.0 / seconds if seconds > 0 else float('inf'),
+        'us_per_drone': seconds / max(len(swarm), 1) * 1e6,
+        'peak_mem_bytes': int(peak * scale),
+        'sampled': scale != 1.0,
+    }
+
+
+def _offscreen_surface():
+    """Dummy-driver display so draw_simulation can run without a window."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import visualization
+    visualization.setup_display()
+    return visualization.set_screen_mode()
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, stages=STAGES, repeat=5, seed=0, budget=STAGE_BUDGET) -> dict:
+    screen = _offscreen_surface() if 'draw_simulation' in stages else None
+    results = []
+    too_slow = set()
+    for n in sorted(sizes):
+        swarm = make_swarm(n, seed)
+        for name in stages:
+            if name in too_slow:
+                print(f"{n:>7} drones  {name:<22} skipped (over {budget:g} s/tick at a smaller size)")
+                continue
+            reps = repeat if n <= 10000 else max(1, repeat // 3)
+            row = time_stage(name, swarm, screen, reps)
+            results.append(row)
+            print(f"{n:>7} drones  {name:<22} {row['seconds_per_tick'] * 1e3:10.3f} ms/tick"
+                  f"  {row['us_per_drone']:9.2f} us/drone  {row['peak_mem_bytes'] / 1e6:8.2f} MB peak"
+                  f"{'  (sampled)' if row['sampled'] else ''}")
+            if row['seconds_per_tick'] > budget:
+                too_slow.add(name)
+        clear_spatial_index()
+    return {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict):
+    """Prints per-stage speedups of `current` over `baseline`."""
+    before = {(r['n'], r['stage']): r for r in baseline['results']}
+    print(f"\nvs {baseline.get('commit') or 'baseline'}:")
+    for row in current['results']:
+        old = before.get((row['n'], row['stage']))
+        if old:
+            speedup = old['seconds_per_tick'] / row['seconds_per_tick']
+            print(f"{row['n']:>7} drones  {row['stage']:<22} {speedup:6.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage scaling benchmark for the simulation tick.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=STAGE_BUDGET, help="Skip a stage at larger sizes once it exceeds this many seconds per tick")
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.stages, args.repeat, args.seed, args.budget)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {len(report['results'])} results to {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
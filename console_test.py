@@ -89,5 +89,115 @@ def run_handoff_scenario():
              # CRITICAL CHECK: Print the target ID to confirm handoff!
              print(f"[{d.type.name}] ID={d.id} Pos={d.pos.round(1)}, **Target={d.target_id}**")
              
+# console_test.py - Consistency checks: assignment coverage and engine parity
+
+def run_assignment_coverage_check(cases: int = 400, seed: int = 0):
+    """Compares TargetAssigner with brute force on small random problems: it must cover as many
+    threats as any assignment can. From a cold start the total cost must also be within the
+    auction's epsilon of the cheapest such cover (warm starts only keep it close)."""
+    import itertools
+    from assignment import TargetAssigner, MAX_ASSIGNMENT_COST, AUCTION_EPSILON
+
+    rng = np.random.default_rng(seed)
+    failures = 0
+    for case in range(cases):
+        n_friendly, n_hostile = rng.integers(1, 6), rng.integers(1, 6)
+        allowed = rng.random((n_friendly, n_hostile)) < 0.6
+        fi, hj = np.nonzero(allowed)
+        cost = rng.uniform(0.0, MAX_ASSIGNMENT_COST, fi.size)
+        cost_of = {(f, h): c for f, h, c in zip(fi.tolist(), hj.tolist(), cost.tolist())}
+
+        # Brute force: every partial assignment, best (coverage, -cost) wins
+        best = (0, 0.0)
+        for choice in itertools.product(range(-1, n_hostile), repeat=n_friendly):
+            taken = [h for h in choice if h >= 0]
+            if len(taken) != len(set(taken)) or any((f, h) not in cost_of for f, h in enumerate(choice) if h >= 0):
+                continue
+            total = sum(cost_of[f, h] for f, h in enumerate(choice) if h >= 0)
+            best = max(best, (len(taken), -total))
+
+        assigner = TargetAssigner()
+        if case % 2:
+            # Odd cases: warm start from a previous tick with different costs, as in a running simulation
+            assigner.assign(np.arange(n_friendly) + 1, np.arange(n_hostile) + 100, fi, hj,
+                            cost * rng.uniform(0.5, 1.5, fi.size))
+        target = assigner.assign(np.arange(n_friendly) + 1, np.arange(n_hostile) + 100, fi, hj, cost)
+        covered = int(np.count_nonzero(target >= 0))
+        total = sum(cost_of[f, h] for f, h in enumerate(target.tolist()) if h >= 0)
+        warm = case % 2 == 1
+        if covered != best[0] or (not warm and total > -best[1] + n_friendly * AUCTION_EPSILON + 1e-9):
+            failures += 1
+            print(f"case {case}: covered {covered} at cost {total:.1f}, best {best[0]} at cost {-best[1]:.1f}")
+    print(f"Assignment coverage: {cases - failures}/{cases} cases optimal")
+    return failures == 0
+
+def _differing_rows(a, b) -> np.ndarray:
+    """Episode numbers whose rows differ between two results tables (NaN == NaN)."""
+    return np.flatnonzero([x.tobytes() != y.tobytes() for x, y in zip(a, b)])
+
+def run_batched_parity_check(episodes: int = 200):
+    """BatchedSimulation must give every episode the same row as its own Simulation,
+    whatever else shares its batch."""
+    from monte_carlo import run_monte_carlo
+
+    configs = [{}, {'adaptive': True}, {'n_friendly': 10, 'n_hostile': 8},
+               {'n_friendly': 3, 'n_hostile': 10, 'adaptive': True}]
+    failures = 0
+    for config in configs:
+        batched = run_monte_carlo(episodes, batched=True, **config)
+        alone = run_monte_carlo(episodes, batched=False, **config)
+        differ = _differing_rows(batched, alone)
+        failures += differ.size
+        print(f"Batched vs Simulation {config}: {episodes - differ.size}/{episodes} episodes identical"
+              + (f", first differing {differ[:5].tolist()}" if differ.size else ""))
+    return failures == 0
+
+def run_sweep_cache_check(episodes: int = 120, cached: int = 60, chunk_size: int = 16):
+    """A sweep that finds part of its episodes cached must return the same rows as a fresh one:
+    the missing episodes are re-chunked, so a row may not depend on its batch. 10v8 raids
+    need the most coverage re-solves, which is where batch make-up used to leak in."""
+    import tempfile
+    from sweep import run_sweep
+
+    points = [{}, {'r_threat': 40.0}]
+    scenario = {'n_friendly': 10, 'n_hostile': 8}
+    with tempfile.TemporaryDirectory() as partial, tempfile.TemporaryDirectory() as fresh:
+        run_sweep(points, cached, cache_dir=partial, chunk_size=chunk_size, **scenario)
+        extended = run_sweep(points, episodes, cache_dir=partial, chunk_size=chunk_size, **scenario)
+        reference = run_sweep(points, episodes, cache_dir=fresh, chunk_size=chunk_size, **scenario)
+    failures = 0
+    for (tuning, table), (_, expected) in zip(extended, reference):
+        differ = _differing_rows(table, expected)
+        failures += differ.size
+        print(f"Sweep cache r_threat={tuning.r_threat:g}: {episodes - differ.size}/{episodes} rows match a fresh sweep"
+              + (f", first differing {differ[:5].tolist()}" if differ.size else ""))
+    return failures == 0
+
+def run_tiled_parity_check(seeds: int = 5, workers=(1, 2, 4)):
+    """TiledSimulation must end every run like Simulation: on generated raids (all drones
+    inside one halo) and on a wide field where the tiles really split the swarm."""
+    from scenario_data import generate_scenario
+    from simulation import Simulation
+    from domain import TiledSimulation
+
+    wide = {'friendly_region': ((-400.0, 400.0), (-400.0, 400.0)), 'hostile_region': ((500.0, 800.0), (-400.0, 400.0))}
+    failures = 0
+    for name, counts, params in (('generated', (5, 3), {}), ('wide', (60, 40), wide)):
+        for seed in range(seeds):
+            scenario = generate_scenario(seed, *counts, **params)
+            expected = Simulation(scenario).run(max_time=60.0)
+            for count in workers:
+                with TiledSimulation(scenario, workers=count) as sim:
+                    result = sim.run(max_time=60.0)
+                if result != expected:
+                    failures += 1
+                    print(f"{name} seed {seed}, {count} workers: {result} != {expected}")
+        print(f"Tiled vs Simulation ({name}): {seeds * len(workers)} runs checked")
+    return failures == 0
+
 if __name__ == "__main__":
-    run_handoff_scenario() # Run the new test
\ No newline at end of file
+    run_handoff_scenario() # Run the new test
+    run_assignment_coverage_check()
+    run_batched_parity_check()
+    run_sweep_cache_check()
+    run_tiled_parity_check()
@@ -1,29 +1,50 @@
 import numpy as np
 from drone import Drone, DroneType
 from sensing import get_local_view 
-from constants import (
-    R_SENSE, R_THREAT, R_SAFE_SEP, MAX_SPEED, ZERO_VECTOR, 
-    MAX_ACCELERATION, DELTA_TIME 
-) 
+from spatial_index import UniformGrid
+from assignment import TargetAssigner
+from intercept import solve_intercept, intercept_cost
+from tuning import Tuning, DEFAULT_TUNING
+from constants import R_SENSE, MAX_SPEED, ZERO_VECTOR, DELTA_TIME
+
+# Speed of the attack vector; threats are ranked by the intercept time at this speed
+INTERCEPT_SPEED = MAX_SPEED * 0.95
+
+def aim_speed(velocity):
+    """Speed to solve the aiming intercept for: the friendly's current speed (it can only
+    accelerate at MAX_ACCELERATION), but at least half the attack speed."""
+    return np.maximum(np.linalg.norm(velocity, axis=-1), INTERCEPT_SPEED * 0.5)
 
 # --- HELPER FUNCTIONS ---
 
 def calculate_steering_force(current_velocity, desired_velocity, max_acceleration):
     """Calculates the acceleration vector required to smoothly transition 
     from the current velocity to the desired velocity, limited by max_acceleration.
+    Works on a single vector or on an (N, 2) array of vectors (one row per drone).
     """
     steering_force = desired_velocity - current_velocity
-    force_magnitude = np.linalg.norm(steering_force)
+    force_magnitude = np.linalg.norm(steering_force, axis=-1, keepdims=True)
     
-    if force_magnitude > max_acceleration:
-        steering_force = (steering_force / force_magnitude) * max_acceleration
+    too_strong = force_magnitude > max_acceleration
+    if np.any(too_strong):
+        safe_magnitude = np.where(too_strong, force_magnitude, 1.0)
+        steering_force = np.where(too_strong, (steering_force / safe_magnitude) * max_acceleration, steering_force)
         
     return steering_force
 
-def get_coordination_vector(current_drone: Drone, friendlies: list):
+def clamp_speed(velocity, max_speed):
+    """Scales down any velocity (single vector or (N, 2) rows) faster than max_speed."""
+    speed = np.linalg.norm(velocity, axis=-1, keepdims=True)
+    too_fast = speed > max_speed
+    if np.any(too_fast):
+        safe_speed = np.where(too_fast, speed, 1.0)
+        velocity = np.where(too_fast, (velocity / safe_speed) * max_speed, velocity)
+    return velocity
+
+def get_coordination_vector(current_drone: Drone, friendlies: list, tuning: Tuning = DEFAULT_TUNING):
     """Calculates the vector to maintain swarm cohesion and separation (Boids-like)."""
-    cohesion_vec = ZERO_VECTOR
-    separation_vec = ZERO_VECTOR
+    cohesion_vec = np.zeros(2)
+    separation_vec = np.zeros(2) # Fresh array: += below must not mutate ZERO_VECTOR
     
     if not friendlies:
         return ZERO_VECTOR
@@ -31,7 +52,7 @@ def get_coordination_vector(current_drone: Drone, friendlies: list):
     # 1. Separation (Anti-Collision) - Strongest weight
     for other in friendlies:
         distance = current_drone.distance_to(other)
-        if distance < R_SAFE_SEP:
+        if distance < tuning.r_safe_sep:
             away_vector = current_drone.pos - other.pos
             # Force is inverse square of distance, but clamped to avoid singularities
             separation_vec += away_vector / (distance**2 + 1e-6)
@@ -41,11 +62,11 @@ def get_coordination_vector(current_drone: Drone, friendlies: list):
     cohesion_vec = center_of_mass - current_drone.pos
     
     # Apply weights: Separation is much higher priority than Cohesion
-    return separation_vec * 2.0 + cohesion_vec * 0.5
+    return separation_vec * tuning.separation_weight + cohesion_vec * tuning.cohesion_weight
 
 # --- CORE ALGORITHM ---
 
-def get_move_vector(current_drone: Drone, all_drones: list) -> np.ndarray:
+def get_move_vector(current_drone: Drone, all_drones: list, tuning: Tuning = DEFAULT_TUNING) -> np.ndarray:
     
     # 1. Perception
     local_view = get_local_view(current_drone, all_drones)
@@ -54,7 +75,7 @@ def get_move_vector(current_drone: Drone, all_drones: list) -> np.ndarray:
     all_friendlies = [current_drone] + friendlies
 
     # 2. Base Coordination (Defensive/Formation Vector)
-    swarm_vector = get_coordination_vector(current_drone, friendlies)
+    swarm_vector = get_coordination_vector(current_drone, friendlies, tuning)
     
     # Reset target ID for this drone
     current_drone.target_id = -1
@@ -72,15 +93,17 @@ def get_move_vector(current_drone: Drone, all_drones: list) -> np.ndarray:
         
         if available_hostiles:
             
-            # Sort available hostiles by closeness to THIS friendly drone
-            available_hostiles.sort(key=lambda h: current_drone.distance_to(h))
+            # Sort available hostiles by how soon THIS friendly drone can intercept them
+            available_hostiles.sort(
+                key=lambda h: float(intercept_cost(current_drone.pos, h.pos, h.velocity, INTERCEPT_SPEED))
+            )
             
             # Iterate only through potential threats
             for hostile in available_hostiles:
                 h_dist = current_drone.distance_to(hostile)
 
                 # Condition 1: Must be an immediate threat to trigger an attack
-                if h_dist < R_THREAT:
+                if h_dist < tuning.r_threat:
                     
                     # Condition 2: Check if THIS drone is the best choice (Closest)
                     all_nearby_friendlies = [f for f in all_friendlies if not f.is_neutralized]
@@ -96,10 +119,11 @@ def get_move_vector(current_drone: Drone, all_drones: list) -> np.ndarray:
                         hostile.is_claimed = True 
                         current_drone.target_id = hostile.id
                         
-                        # 2. CALCULATE ATTACK VECTOR (Aggressive Pursuit)
-                        TIME_TO_LEAD = 1.0 
-                        hostile_future_pos = hostile.pos + hostile.velocity * TIME_TO_LEAD 
-                        target_vector_raw = hostile_future_pos - current_drone.pos 
+                        # 2. CALCULATE ATTACK VECTOR (Aim at the intercept point)
+                        intercept_point, _, _ = solve_intercept(
+                            current_drone.pos, hostile.pos, hostile.velocity, aim_speed(current_drone.velocity)
+                        )
+                        target_vector_raw = intercept_point - current_drone.pos 
                         
                         # Normalize and scale to MAX_SPEED for desired velocity
                         if np.linalg.norm(target_vector_raw) > 0:
@@ -108,7 +132,7 @@ def get_move_vector(current_drone: Drone, all_drones: list) -> np.ndarray:
                             target_vector = ZERO_VECTOR
                         
                         # Desired velocity is aggressive attack vector + small influence from formation
-                        desired_velocity = target_vector * MAX_SPEED * 0.95 + swarm_vector * 0.05
+                        desired_velocity = target_vector * MAX_SPEED * tuning.attack_weight + swarm_vector * tuning.formation_weight
                         
                         break # Exit loop immediately after claiming/attacking
 
@@ -118,7 +142,7 @@ def get_move_vector(current_drone: Drone, all_drones: list) -> np.ndarray:
     steering_force = calculate_steering_force(
         current_drone.velocity, 
         desired_velocity, 
-        MAX_ACCELERATION
+        tuning.max_acceleration
     )
     
     # Calculate the new velocity
@@ -128,4 +152,101 @@ def get_move_vector(current_drone: Drone, all_drones: list) -> np.ndarray:
     if np.linalg.norm(new_velocity) > MAX_SPEED:
         new_velocity = (new_velocity / np.linalg.norm(new_velocity)) * MAX_SPEED
     
-    return new_velocity
\ No newline at end of file
+    return new_velocity
+
+# --- BATCHED ALGORITHM (all friendlies in one pass) ---
+
+def get_swarm_vectors(friendly_pos: np.ndarray, i, j, offset, distance, tuning: Tuning = DEFAULT_TUNING) -> np.ndarray:
+    """Batched get_coordination_vector: separation + cohesion for every friendly.
+    (i, j, offset, distance) lists the friendly pairs within R_SENSE of each other
+    (offset = pos[i] - pos[j]), sorted by i then j, without self pairs."""
+    n = len(friendly_pos)
+
+    # 1. Separation (inverse square push away from friendlies closer than r_safe_sep)
+    separation = np.zeros((n, 2))
+    close = distance < tuning.r_safe_sep
+    np.add.at(separation, i[close], offset[close] / (distance[close] ** 2 + 1e-6)[:, None])
+
+    # 2. Cohesion (towards the centre of the visible friendlies)
+    neighbour_count = np.bincount(i, minlength=n)
+    neighbour_sum = np.zeros((n, 2))
+    np.add.at(neighbour_sum, i, friendly_pos[j])
+    has_neighbours = neighbour_count > 0
+    cohesion = np.zeros((n, 2))
+    cohesion[has_neighbours] = (
+        neighbour_sum[has_neighbours] / neighbour_count[has_neighbours, None] - friendly_pos[has_neighbours]
+    )
+
+    # A drone with no visible friendlies gets no swarm vector at all
+    return np.where(has_neighbours[:, None],
+                    separation * tuning.separation_weight + cohesion * tuning.cohesion_weight, 0.0)
+
+def get_move_vectors(state, grid: UniformGrid = None, assigner: TargetAssigner = None,
+                     dt: float = DELTA_TIME, tuning: Tuning = DEFAULT_TUNING) -> np.ndarray:
+    """Batched get_move_vector for every live friendly in a SwarmState.
+
+    Returns the new velocity of every row (hostile rows keep their velocity),
+    and writes target_id / is_claimed back into the state. Targets come from a
+    global assignment (assignment.py) rather than the per-drone greedy claim,
+    so they do not depend on row order.
+    Neighbours come from the state's per-tick PairCache (shared with the
+    other stages of the tick); `grid` is an optional UniformGrid over
+    state.pos built earlier this tick (e.g. the sensing index) that the cache
+    can be built from. Pass the same
+    `assigner` every tick to warm-start the assignment. `dt` is the step the
+    steering is integrated over; `tuning` holds the ranges and weights.
+    """
+    new_velocity = state.velocity.copy()
+    friendly = state.live_friendlies()
+    hostile = state.live_hostiles()
+
+    state.is_claimed[:] = False
+    state.target_id[friendly] = -1
+    if friendly.size == 0:
+        return new_velocity
+
+    friendly_pos = state.pos[friendly]
+    friendly_vel = state.velocity[friendly]
+
+    # 1. Perception: every (friendly, drone) pair within R_SENSE, from the tick's pair cache
+    i, row, offset, distance = state.pair_cache(R_SENSE, grid).pairs(friendly, None, R_SENSE)
+    friendly_slot = np.full(len(state), -1)
+    friendly_slot[friendly] = np.arange(friendly.size)
+    hostile_slot = np.full(len(state), -1)
+    hostile_slot[hostile] = np.arange(hostile.size)
+
+    # 2. Base Coordination (Defensive/Formation Vector)
+    ff = (friendly_slot[row] >= 0) & (row != friendly[i])
+    swarm_vector = get_swarm_vectors(friendly_pos, i[ff], friendly_slot[row[ff]], offset[ff], distance[ff], tuning)
+    desired_velocity = swarm_vector.copy()
+
+    # 3. Target Choice: one global assignment of friendlies to the hostiles inside their
+    # r_threat (auction over the sparse pairs, warm-started from the previous tick),
+    # ranked by time to intercept (as interceptor flight distance)
+    fh = (hostile_slot[row] >= 0) & (distance < tuning.r_threat)
+    fi, hj = i[fh], hostile_slot[row[fh]]
+    h_rows = hostile[hj]
+    cost = intercept_cost(friendly_pos[fi], state.pos[h_rows], state.velocity[h_rows], INTERCEPT_SPEED) * MAX_SPEED
+    if assigner is None:
+        assigner = TargetAssigner()
+    target = assigner.assign(state.ids[friendly], state.ids[hostile], fi, hj, cost)
+    if fi.size:
+        attackers = np.flatnonzero(target >= 0)
+        targets = hostile[target[attackers]]
+        state.is_claimed[targets] = True
+        state.target_id[friendly[attackers]] = state.ids[targets]
+
+        # 4. Attack Vector (aim at the intercept point)
+        intercept_point, _, _ = solve_intercept(
+            friendly_pos[attackers], state.pos[targets], state.velocity[targets], aim_speed(friendly_vel[attackers])
+        )
+        target_vector_raw = intercept_point - friendly_pos[attackers]
+        norm = np.linalg.norm(target_vector_raw, axis=-1, keepdims=True)
+        target_vector = np.divide(target_vector_raw, norm, out=np.zeros_like(target_vector_raw), where=norm > 0)
+        desired_velocity[attackers] = (target_vector * MAX_SPEED * tuning.attack_weight
+                                       + swarm_vector[attackers] * tuning.formation_weight)
+
+    # 5. Steering + speed clamp for every friendly at once
+    steering_force = calculate_steering_force(friendly_vel, desired_velocity, tuning.max_acceleration)
+    new_velocity[friendly] = clamp_speed(friendly_vel + steering_force * dt, MAX_SPEED)
+    return new_velocity
@@ -0,0 +1,327 @@
+# domain.py - Multi-process spatial domain decomposition for very large swarms
+#
+# The battlefield is split into tiles (vertical x bands times horizontal y bands,
+# cut at quantiles of the starting positions so every tile starts with about
+# the same number of drones). Each tile is owned by one worker process.
+#
+# Every per-drone array lives in shared memory, one row per drone for the whole
+# run (removed drones are flagged dead instead of compacted away), so workers
+# read each other's drones without copying:
+#   - ownership: a drone belongs to the tile its position falls in, recomputed
+#     every tick, so drones crossing a border migrate to the next owner;
+#   - halo: a worker also reads the live drones within R_SENSE outside its tile;
+#   - coordination: each worker runs get_move_vectors on its drones plus halo and
+#     writes back the velocity/target of the friendlies it owns;
+#   - engagement: each worker reports the swept R_INTERCEPT candidates of the
+#     hostiles it owns; the parent resolves them one-to-one (same rule as
+#     physics.find_engagements) and does the O(N) integration.
+#
+# Usage:
+#   with TiledSimulation(scenario, workers=8) as sim:
+#       result = sim.run(max_time=120)
+
+import os
+from multiprocessing import Pipe, Process
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from constants import DELTA_TIME, R_SENSE, R_INTERCEPT
+from swarm_state import SwarmState, FRIENDLY, HOSTILE
+from spatial_index import UniformGrid
+from coordination import get_move_vectors
+from assignment import TargetAssigner
+from physics import BLINK_DURATION, closest_approach
+from simulation import SimulationResult, DEFAULT_MAX_TIME, build_drones
+from hostile_policies import HostilePolicy, nearest_friendly_distance
+from tuning import Tuning, DEFAULT_TUNING
+
+# Shared per-drone arrays: name -> (dtype, trailing shape)
+SHARED_FIELDS = {
+    'ids': (np.int64, ()),
+    'types': (np.int8, ()),
+    'pos': (np.float64, (2,)),
+    'velocity': (np.float64, (2,)),
+    'target_id': (np.int64, ()),
+    'is_neutralized': (np.bool_, ()),
+    'is_claimed': (np.bool_, ()),
+    'blink_timer': (np.float64, ()),
+    'alive': (np.bool_, ()),
+}
+
+
+def _attach(names: dict, count: int):
+    """Maps the shared blocks `names` (field -> block name) as numpy arrays."""
+    blocks, arrays = [], {}
+    for field, name in names.items():
+        dtype, shape = SHARED_FIELDS[field]
+        block = SharedMemory(name=name)
+        blocks.append(block)
+        arrays[field] = np.ndarray((count,) + shape, dtype=dtype, buffer=block.buf)
+    return blocks, arrays
+
+
+def _max_speed(velocity: np.ndarray) -> float:
+    return float(np.sqrt(np.einsum('ij,ij->i', velocity, velocity)).max())
+
+
+def tile_grid(workers: int) -> tuple:
+    """(tiles_x, tiles_y) with tiles_x * tiles_y == workers, as square as possible."""
+    tiles_y = int(np.sqrt(workers))
+    while workers % tiles_y:
+        tiles_y -= 1
+    return workers // tiles_y, tiles_y
+
+
+class _Tile:
+    """Worker-side view of one tile: its bounds, the shared arrays, its assigner and the tuning."""
+
+    def __init__(self, index, x_edges, y_edges, arrays, tuning):
+        tiles_x = len(x_edges) - 1
+        self.x0, self.x1 = x_edges[index % tiles_x], x_edges[index % tiles_x + 1]
+        self.y0, self.y1 = y_edges[index // tiles_x], y_edges[index // tiles_x + 1]
+        self.a = arrays
+        self.assigner = TargetAssigner() # Warm-started across ticks, like Simulation's
+        self.tuning = tuning
+
+    def _rows(self, margin):
+        """(owned rows, owned + halo rows) of the live drones, both in row order."""
+        a = self.a
+        x, y = a['pos'][:, 0], a['pos'][:, 1]
+        alive = a['alive']
+        owned = alive & (x >= self.x0) & (x < self.x1) & (y >= self.y0) & (y < self.y1)
+        local = alive & (x >= self.x0 - margin) & (x < self.x1 + margin) & (y >= self.y0 - margin) & (y < self.y1 + margin)
+        return np.flatnonzero(owned), np.flatnonzero(local)
+
+    def coordinate(self, dt):
+        a = self.a
+        owned, local = self._rows(R_SENSE)
+        state = SwarmState(local.size)
+        for field in ('ids', 'types', 'pos', 'velocity', 'target_id', 'is_neutralized', 'is_claimed', 'blink_timer'):
+            getattr(state, field)[:] = a[field][local]
+        velocity = get_move_vectors(state, None, self.assigner, dt, self.tuning)
+
+        # Write back only the friendlies this tile owns
+        mine = np.isin(local, owned) & (state.types == FRIENDLY) & ~state.is_neutralized
+        rows = local[mine]
+        a['velocity'][rows] = velocity[mine]
+        a['target_id'][rows] = state.target_id[mine]
+        return None
+
+    def engage(self, dt):
+        """Swept engagement candidates (hostile_row, friendly_row) for the hostiles this tile owns."""
+        a = self.a
+        owned, local = self._rows(R_SENSE)
+        live = ~a['is_neutralized']
+        hostile = owned[(a['types'][owned] == HOSTILE) & live[owned]]
+        friendly = local[(a['types'][local] == FRIENDLY) & live[local]]
+        if hostile.size == 0 or friendly.size == 0:
+            return np.zeros((0, 2), dtype=np.int64)
+        reach = R_INTERCEPT + (_max_speed(a['velocity'][hostile]) + _max_speed(a['velocity'][friendly])) * dt
+        hi, fj, offset, _ = UniformGrid(a['pos'][friendly], reach).pairs_within(a['pos'][hostile], reach)
+        relative_velocity = a['velocity'][hostile[hi]] - a['velocity'][friendly[fj]]
+        hit = closest_approach(offset, relative_velocity, dt) < R_INTERCEPT
+        return np.column_stack((hostile[hi[hit]], friendly[fj[hit]]))
+
+
+def _worker(index, x_edges, y_edges, names, count, conn, tuning):
+    blocks, arrays = _attach(names, count)
+    tile = _Tile(index, x_edges, y_edges, arrays, tuning)
+    try:
+        while True:
+            command, dt = conn.recv()
+            if command == 'stop':
+                break
+            conn.send(getattr(tile, command)(dt))
+    finally:
+        del tile, arrays
+        for block in blocks:
+            block.close()
+
+
+class TiledSimulation:
+    """Simulation split across worker processes by spatial tile.
+
+    Same tick as Simulation (sensing -> coordination -> swept physics), same
+    results interface. Target assignments near tile borders are solved by
+    each side over its drones plus halo; they match the single-process
+    assignment unless a chain of contested claims reaches past R_SENSE.
+    """
+
+    def __init__(self, scenario, workers: int = None, dt: float = DELTA_TIME, policy: HostilePolicy = None,
+                 tuning: Tuning = None):
+        state = scenario if isinstance(scenario, SwarmState) else SwarmState.from_drones(build_drones(scenario))
+        self.dt = dt
+        self.policy = policy
+        self.tuning = tuning or DEFAULT_TUNING
+        self.count = len(state)
+        self.workers = workers or os.cpu_count() or 1
+        self.tiles_x, self.tiles_y = tile_grid(self.workers)
+
+        # Shared arrays, initialized from the scenario
+        self._blocks, names = [], {}
+        self.a = {}
+        for field, (dtype, shape) in SHARED_FIELDS.items():
+            size = max(int(np.prod((self.count,) + shape)) * np.dtype(dtype).itemsize, 1)
+            block = SharedMemory(create=True, size=size)
+            self._blocks.append(block)
+            names[field] = block.name
+            self.a[field] = np.ndarray((self.count,) + shape, dtype=dtype, buffer=block.buf)
+        for field in SHARED_FIELDS:
+            if field != 'alive':
+                self.a[field][:] = getattr(state, field)
+        self.a['alive'][:] = True
+
+        # Tile edges at quantiles of the start positions; outer edges are unbounded
+        x_edges = np.quantile(state.pos[:, 0], np.linspace(0, 1, self.tiles_x + 1)) if self.count else np.zeros(self.tiles_x + 1)
+        y_edges = np.quantile(state.pos[:, 1], np.linspace(0, 1, self.tiles_y + 1)) if self.count else np.zeros(self.tiles_y + 1)
+        x_edges[0], x_edges[-1] = -np.inf, np.inf
+        y_edges[0], y_edges[-1] = -np.inf, np.inf
+
+        self._conns, self._procs = [], []
+        for index in range(self.workers):
+            parent, child = Pipe()
+            proc = Process(target=_worker, args=(index, x_edges, y_edges, names, self.count, child, self.tuning), daemon=True)
+            proc.start()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+        self.time = 0.0
+        self.ticks = 0
+        self.finished = False
+        self.friendly_losses = 0
+        self.hostiles_neutralized = 0
+        self.last_neutralization_time = None
+
+    def _broadcast(self, command, dt):
+        for conn in self._conns:
+            conn.send((command, dt))
+        return [conn.recv() for conn in self._conns]
+
+    def live_counts(self):
+        """Returns (live friendlies, live hostiles)."""
+        live = self.a['alive'] & ~self.a['is_neutralized']
+        return (
+            int(np.count_nonzero(live & (self.a['types'] == FRIENDLY))),
+            int(np.count_nonzero(live & (self.a['types'] == HOSTILE))),
+        )
+
+    def swarm(self) -> SwarmState:
+        """Copy of the live drones as a SwarmState (e.g. for drawing)."""
+        rows = np.flatnonzero(self.a['alive'])
+        state = SwarmState(rows.size)
+        for field in SHARED_FIELDS:
+            if field != 'alive':
+                getattr(state, field)[:] = self.a[field][rows]
+        return state
+
+    def _steer_hostiles(self, dt):
+        """Hostile policy over every live hostile, in the parent (O(N), like the integration)."""
+        a = self.a
+        live = a['alive'] & ~a['is_neutralized']
+        hostile = np.flatnonzero(live & (a['types'] == HOSTILE))
+        distance = None
+        if self.policy.needs_friendlies:
+            friendly = live & (a['types'] == FRIENDLY)
+            distance = nearest_friendly_distance(a['pos'][hostile], a['pos'][friendly], self.policy.friendly_range)
+        a['velocity'][hostile] = self.policy.steer(
+            a['pos'][hostile], a['velocity'][hostile], a['ids'][hostile], self.time, dt, distance
+        )
+
+    def step(self) -> list:
+        """Advances one tick. Returns that tick's engagements as (hostile_id, friendly_id)."""
+        if self.finished:
+            return []
+        a = self.a
+        if not np.any(a['alive'] & (a['types'] == HOSTILE)):
+            self.finished = True
+            return []
+        dt = self.dt
+
+        # 1. Coordination, per tile in parallel (workers write velocity / target_id of their friendlies)
+        friendly = a['alive'] & (a['types'] == FRIENDLY) & ~a['is_neutralized']
+        a['target_id'][friendly] = -1
+        self._broadcast('coordinate', dt)
+        targeted = a['target_id'][friendly]
+        a['is_claimed'][:] = np.isin(a['ids'], targeted[targeted != -1]) & a['alive']
+        if self.policy is not None:
+            self._steer_hostiles(dt)
+
+        # 2. Engagement candidates per tile, resolved one-to-one here in row order
+        candidates = np.concatenate(self._broadcast('engage', dt))
+        engagements = []
+        if candidates.size:
+            candidates = candidates[np.lexsort((candidates[:, 1], candidates[:, 0]))]
+            used = set()
+            last_hostile = -1
+            for h, f in candidates.tolist():
+                if h == last_hostile or f in used:
+                    continue
+                used.add(f)
+                last_hostile = h
+                engagements.append((h, f))
+
+        # 3. Integration and removal (cheap O(N) array work)
+        live = a['alive'] & ~a['is_neutralized']
+        a['blink_timer'][a['alive'] & a['is_neutralized']] += dt
+        a['pos'][live] += a['velocity'][live] * dt
+        for h, f in engagements:
+            a['is_neutralized'][h] = True
+            a['alive'][f] = False
+        a['alive'] &= ~(a['is_neutralized'] & (a['blink_timer'] >= BLINK_DURATION))
+
+        self.ticks += 1
+        self.time += dt
+        events = [(int(a['ids'][h]), int(a['ids'][f])) for h, f in engagements]
+        if events:
+            self.hostiles_neutralized += len(events)
+            self.friendly_losses += len(events)
+            self.last_neutralization_time = self.time
+        return events
+
+    def decided(self, max_time: float = DEFAULT_MAX_TIME) -> bool:
+        if self.finished or self.time >= max_time:
+            return True
+        friendlies, hostiles = self.live_counts()
+        return friendlies == 0 and hostiles > 0
+
+    def run(self, max_time: float = DEFAULT_MAX_TIME) -> SimulationResult:
+        while not self.decided(max_time):
+            self.step()
+        return self.result()
+
+    def result(self) -> SimulationResult:
+        _, hostiles = self.live_counts()
+        cleared = hostiles == 0
+        return SimulationResult(
+            cleared=cleared,
+            time_to_clear=(self.last_neutralization_time or 0.0) if cleared else None,
+            friendly_losses=self.friendly_losses,
+            hostiles_neutralized=self.hostiles_neutralized,
+            leaked_hostiles=hostiles,
+            ticks=self.ticks,
+            sim_time=self.time,
+        )
+
+    def close(self):
+        """Stops the workers and frees the shared memory."""
+        for conn in self._conns:
+            try:
+                conn.send(('stop', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+        self._conns, self._procs = [], []
+        self.a = {}
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -6,15 +6,99 @@ class DroneType(Enum):
     FRIENDLY = 1
     HOSTILE = 2
 
+# Position writes through Drone.pos on drones without a SwarmState (states count their own
+# in SwarmState.version). Indexes compare it to tell whether such drones have moved.
+_standalone_moves = 0
+
+def standalone_moves() -> int:
+    return _standalone_moves
+
 class Drone:
+    """A single drone. Fields live in small arrays so that a SwarmState can
+    re-point them at its own rows (see swarm_state.py); a Drone that is not
+    attached to a state simply owns its own storage. Every field is declared
+    in __slots__, so a drone carries no per-instance __dict__."""
+
+    __slots__ = ('id', 'type', '_state', '_slot', '_pos', '_velocity', '_target_id',
+                 '_is_neutralized', '_is_claimed', '_blink_timer')
+
     def __init__(self, id, pos, velocity=None, type=DroneType.FRIENDLY):
         self.id = id
-        self.pos = np.array(pos, dtype=float)
-        self.velocity = np.array(velocity or [0.0, 0.0], dtype=float)
         self.type = type
-        self.target_id = -1 # ID of the hostile drone this drone is currently targeting
-        self.is_neutralized = False # NEW: Flag to indicate it has been hit
-        self.blink_timer = 0.0      # NEW: Timer for blinking effect
+        self._state = None # Owning SwarmState (None = standalone)
+        self._slot = -1 # Row in the owning SwarmState
+        self._pos = np.array(pos, dtype=float)
+        self._velocity = np.array(velocity or [0.0, 0.0], dtype=float)
+        self._target_id = np.array([-1]) # ID of the hostile drone this drone is currently targeting
+        self._is_neutralized = np.array([False]) # Flag to indicate it has been hit
+        self._is_claimed = np.array([False]) # Hostiles only: a friendly has locked onto it this tick
+        self._blink_timer = np.array([0.0]) # Timer for blinking effect
+
+    def _bind(self, state, slot):
+        """Re-points this drone's fields at row `slot` of `state` (views, no copies)."""
+        self._state = state
+        self._slot = slot
+        self._pos = state.pos[slot]
+        self._velocity = state.velocity[slot]
+        self._target_id = state.target_id[slot:slot + 1]
+        self._is_neutralized = state.is_neutralized[slot:slot + 1]
+        self._is_claimed = state.is_claimed[slot:slot + 1]
+        self._blink_timer = state.blink_timer[slot:slot + 1]
+
+    # --- Field accessors (views into the backing storage) ---
+
+    @property
+    def pos(self):
+        return self._pos
+
+    @pos.setter
+    def pos(self, value): # Also `drone.pos += v`; writing single elements bypasses the move count
+        global _standalone_moves
+        self._pos[:] = value
+        if self._state is None:
+            _standalone_moves += 1
+        else:
+            self._state.version += 1
+
+    @property
+    def velocity(self):
+        return self._velocity
+
+    @velocity.setter
+    def velocity(self, value):
+        self._velocity[:] = value
+
+    @property
+    def target_id(self):
+        return int(self._target_id[0])
+
+    @target_id.setter
+    def target_id(self, value):
+        self._target_id[0] = value
+
+    @property
+    def is_neutralized(self):
+        return bool(self._is_neutralized[0])
+
+    @is_neutralized.setter
+    def is_neutralized(self, value):
+        self._is_neutralized[0] = value
+
+    @property
+    def is_claimed(self):
+        return bool(self._is_claimed[0])
+
+    @is_claimed.setter
+    def is_claimed(self, value):
+        self._is_claimed[0] = value
+
+    @property
+    def blink_timer(self):
+        return float(self._blink_timer[0])
+
+    @blink_timer.setter
+    def blink_timer(self, value):
+        self._blink_timer[0] = value
 
     def distance_to(self, other_drone):
         """Calculates the Euclidean distance to another drone."""
@@ -24,4 +108,4 @@ class Drone:
         return self.type == DroneType.HOSTILE
 
     def __repr__(self):
-        return f"Drone(ID={self.id}, Type={self.type.name}, Pos={self.pos.round(1)})"
\ No newline at end of file
+        return f"Drone(ID={self.id}, Type={self.type.name}, Pos={self.pos.round(1)})"
@@ -0,0 +1,216 @@
+# events.py - Buffered structured event log, flushed off the hot loop by a writer thread
+#
+# The simulation reports what happens as typed records instead of print lines:
+#   engagement     hostile, friendly            (INFO)
+#   loss           friendly, hostile            (INFO)
+#   claim          friendly, target, previous   (DEBUG: a friendly's target changed)
+#   pause          paused                       (INFO)
+#   scenario_end   friendly_losses, hostiles_neutralized, leaked_hostiles, time_to_clear (WARNING)
+#
+# emit() / emit_many() drop events below `min_severity` straight away and
+# otherwise write them into a preallocated numpy ring buffer (one slice
+# assignment per batch), so the cost in the tick is a few microseconds. A
+# background thread flushes the ring in batches to a JSONL (.jsonl) or binary
+# (.bin: raw EVENT_DTYPE records, read back with read_events) file, and can echo
+# readable lines to the console. If the writer falls behind by more than the
+# ring's capacity the oldest events are overwritten and counted in `dropped`.
+#
+# Usage:
+#   with EventLog('run.jsonl', min_severity=DEBUG, echo=INFO) as events:
+#       Simulation(scenario, events=events).run()
+#   python master_loop.py --event-log run.jsonl --log-level debug
+
+import json
+import threading
+
+import numpy as np
+
+DEBUG, INFO, WARNING = 10, 20, 30
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING}
+LEVEL_NAMES = {value: name.upper() for name, value in LEVELS.items()}
+
+ENGAGEMENT, LOSS, CLAIM, PAUSE, SCENARIO_END = range(5)
+
+EVENT_BUFFER = 1 << 16 # Events the ring holds before unflushed ones are overwritten
+FLUSH_INTERVAL = 0.25  # Seconds between writer flushes (sooner once the ring is half full)
+
+EVENT_DTYPE = np.dtype([
+    ('time', np.float64),
+    ('tick', np.int64),
+    ('kind', np.int8),
+    ('severity', np.int8),
+    ('a', np.int64),
+    ('b', np.int64),
+    ('c', np.int64),
+    ('value', np.float64),
+])
+
+# Per kind: (name, default severity, names of the a / b / c fields, name of the value field)
+KINDS = {
+    ENGAGEMENT: ('engagement', INFO, ('hostile', 'friendly'), None),
+    LOSS: ('loss', INFO, ('friendly', 'hostile'), None),
+    CLAIM: ('claim', DEBUG, ('friendly', 'target', 'previous'), None),
+    PAUSE: ('pause', INFO, ('paused',), None),
+    SCENARIO_END: ('scenario_end', WARNING, ('friendly_losses', 'hostiles_neutralized', 'leaked_hostiles'), 'time_to_clear'),
+}
+
+MESSAGES = {
+    ENGAGEMENT: "Engagement: Hostile {hostile} neutralized, Friendly {friendly} lost.",
+    LOSS: None, # The friendly side of an engagement: its console line already says so
+    CLAIM: "Friendly {friendly} targets {target} (was {previous}).",
+    PAUSE: "Simulation {state}. Time: {time:.2f}s",
+    SCENARIO_END: "Scenario ended at {time:.2f}s: {hostiles_neutralized} hostiles neutralized, "
+                  "{friendly_losses} friendlies lost, {leaked_hostiles} hostiles left.",
+}
+
+
+def as_dict(record) -> dict:
+    """One EVENT_DTYPE record as a plain dict with the kind's field names."""
+    name, _, fields, value_field = KINDS[int(record['kind'])]
+    event = {'time': float(record['time']), 'tick': int(record['tick']), 'kind': name,
+             'severity': LEVEL_NAMES.get(int(record['severity']), int(record['severity']))}
+    for field, column in zip(fields, ('a', 'b', 'c')):
+        event[field] = int(record[column])
+    if value_field is not None:
+        value = float(record['value'])
+        event[value_field] = None if np.isnan(value) else value
+    return event
+
+
+def describe(record) -> str:
+    """A console line for one record (None for kinds that are not echoed)."""
+    if MESSAGES[int(record['kind'])] is None:
+        return None
+    event = as_dict(record)
+    if event['kind'] == 'pause':
+        event['state'] = 'PAUSED' if event['paused'] else 'RESUMED'
+    return MESSAGES[int(record['kind'])].format(**event)
+
+
+def read_events(path: str) -> np.ndarray:
+    """The records of a binary (.bin) event log."""
+    return np.fromfile(path, dtype=EVENT_DTYPE)
+
+
+class EventLog:
+    """Ring-buffered event sink. With a `path` and / or an `echo` severity a writer thread
+    drains the ring every FLUSH_INTERVAL; without either the ring only keeps the latest
+    events (see recent()). Call close() (or use it as a context manager) to flush the rest."""
+
+    def __init__(self, path: str = None, min_severity: int = INFO, echo: int = None,
+                 capacity: int = EVENT_BUFFER, flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.min_severity = min_severity
+        self.echo = echo
+        self.binary = path is not None and not path.endswith('.jsonl')
+        self.flush_interval = flush_interval
+        self._ring = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self._head = 0 # Events emitted so far
+        self._tail = 0 # Events flushed so far
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._file = open(path, 'wb' if self.binary else 'w') if path else None
+        self._thread = None
+        if path is not None or echo is not None:
+            self._thread = threading.Thread(target=self._run, name='event-log-writer', daemon=True)
+            self._thread.start()
+
+    def wants(self, kind: int, severity: int = None) -> bool:
+        """Whether events of `kind` (at `severity`, default the kind's) would be kept."""
+        return (KINDS[kind][1] if severity is None else severity) >= self.min_severity
+
+    def emit(self, kind: int, time: float, tick: int, a: int = -1, b: int = -1, c: int = -1,
+             value: float = np.nan, severity: int = None):
+        severity = KINDS[kind][1] if severity is None else severity
+        if severity < self.min_severity:
+            return
+        with self._lock:
+            self._ring[self._head % self._ring.size] = (time, tick, kind, severity, a, b, c, value)
+            self._advance(1)
+
+    def emit_many(self, kind: int, time: float, tick: int, a, b=-1, c=-1, value=np.nan, severity: int = None):
+        """One event per element of `a` (b, c and value broadcast against it)."""
+        severity = KINDS[kind][1] if severity is None else severity
+        if severity < self.min_severity:
+            return
+        count = len(a)
+        if count == 0:
+            return
+        ring = self._ring
+        with self._lock:
+            rows = (self._head + np.arange(count)) % ring.size
+            ring['time'][rows], ring['tick'][rows] = time, tick
+            ring['kind'][rows], ring['severity'][rows] = kind, severity
+            ring['a'][rows], ring['b'][rows], ring['c'][rows], ring['value'][rows] = a, b, c, value
+            self._advance(count)
+
+    def _advance(self, count: int):
+        """Moves the head (lock held); overwritten unflushed events count as dropped."""
+        self._head += count
+        unflushed = self._head - self._tail
+        if unflushed > self._ring.size:
+            if self._thread is not None: # Without a writer the ring is only a window on recent events
+                self.dropped += unflushed - self._ring.size
+            self._tail = self._head - self._ring.size
+        if self._thread is not None and unflushed >= self._ring.size // 2:
+            self._wake.set()
+
+    def _take(self, start: int, stop: int) -> np.ndarray:
+        """Copy of the events numbered [start, stop) (lock held)."""
+        size = self._ring.size
+        first, last = start % size, stop % size
+        if stop - start == 0:
+            return self._ring[:0].copy()
+        if first < last:
+            return self._ring[first:last].copy()
+        return np.concatenate((self._ring[first:], self._ring[:last]))
+
+    def recent(self, count: int = None) -> np.ndarray:
+        """The latest `count` events still in the ring (all of them by default), oldest first."""
+        with self._lock:
+            kept = min(self._head, self._ring.size)
+            count = kept if count is None else min(count, kept)
+            return self._take(self._head - count, self._head)
+
+    def flush(self):
+        """Writes every buffered event now (the writer thread does this periodically)."""
+        with self._lock:
+            batch = self._take(self._tail, self._head)
+            self._tail = self._head
+        if batch.size == 0:
+            return
+        if self._file is not None:
+            if self.binary:
+                self._file.write(batch.tobytes())
+            else:
+                self._file.write(''.join(json.dumps(as_dict(record)) + '\n' for record in batch))
+            self._file.flush()
+        if self.echo is not None:
+            lines = [line for line in map(describe, batch[batch['severity'] >= self.echo]) if line is not None]
+            if lines:
+                print('\n'.join(lines), flush=True)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._wake.set()
+            self._thread.join()
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
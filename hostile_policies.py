@@ -0,0 +1,194 @@
+# hostile_policies.py - Vectorized hostile behaviour, one batched call per tick
+#
+# A policy turns every live hostile at once: steer() gets the hostiles' positions,
+# velocities and ids as arrays and returns their new velocities. Policies only
+# change headings (at most HOSTILE_TURN_RATE per second) and keep each hostile's
+# speed, so they hold no per-drone state and the same object serves a single
+# Simulation or a whole BatchedSimulation.
+#
+# Built-ins (see POLICIES):
+#   straight     constant velocity (the original behaviour)
+#   seek         fly at the nearest defended ground asset
+#   evasive      seek, but jink left / right while a friendly is within `trigger`
+#   split        seek, fan out into groups between two times, then regroup
+#   saturation   spread aim points all around the asset, so the raid arrives from every side
+#
+# Usage:
+#   sim = Simulation(scenario, policy=make_policy('evasive:jink_deg=40'))
+#   python monte_carlo.py --policy split:groups=3
+
+import numpy as np
+
+from constants import R_SENSE
+from spatial_index import UniformGrid
+from scenarios import parse_spec
+
+HOSTILE_TURN_RATE = np.radians(90.0) # Radians per second
+DEFENDED_ASSETS = ((0.0, 0.0),)      # Default ground assets (the scenarios aim at the origin)
+GOLDEN_ANGLE = np.pi * (3.0 - np.sqrt(5.0))
+
+
+def turn_toward(velocity: np.ndarray, desired: np.ndarray, max_angle) -> np.ndarray:
+    """Rotates each velocity towards its `desired` direction by at most `max_angle`
+    radians (scalar or per row), keeping its speed. Rows with no desired direction keep theirs."""
+    speed = np.sqrt(np.einsum('ij,ij->i', velocity, velocity))
+    heading = np.arctan2(velocity[:, 1], velocity[:, 0])
+    target = np.arctan2(desired[:, 1], desired[:, 0])
+    delta = (target - heading + np.pi) % (2 * np.pi) - np.pi
+    delta = np.where(np.any(desired != 0, axis=1), delta, 0.0)
+    heading = heading + np.clip(delta, -max_angle, max_angle)
+    return np.column_stack((np.cos(heading), np.sin(heading))) * speed[:, None]
+
+
+def rotate(vectors: np.ndarray, angle) -> np.ndarray:
+    """Rotates each (k, 2) row counter-clockwise by `angle` radians (scalar or per row)."""
+    c, s = np.cos(angle), np.sin(angle)
+    return np.column_stack((c * vectors[:, 0] - s * vectors[:, 1], s * vectors[:, 0] + c * vectors[:, 1]))
+
+
+def nearest_asset(pos: np.ndarray, assets: np.ndarray) -> np.ndarray:
+    """Position of the closest asset to each row of `pos`."""
+    offset = assets[None, :, :] - pos[:, None, :]
+    return assets[np.argmin(np.einsum('ijk,ijk->ij', offset, offset), axis=1)]
+
+
+def nearest_per_query(i: np.ndarray, distance: np.ndarray, count: int) -> np.ndarray:
+    """Smallest distance per query index from pairs sorted by query (pairs_within /
+    PairCache.pairs output); inf for queries without a pair."""
+    nearest = np.full(count, np.inf)
+    if i.size:
+        starts = np.flatnonzero(np.r_[True, i[1:] != i[:-1]])
+        nearest[i[starts]] = np.minimum.reduceat(distance, starts)
+    return nearest
+
+
+def nearest_friendly_distance(hostile_pos: np.ndarray, friendly_pos: np.ndarray, radius: float = R_SENSE) -> np.ndarray:
+    """Distance from each hostile to its closest friendly, inf beyond `radius` (one grid query)."""
+    if len(hostile_pos) == 0 or len(friendly_pos) == 0:
+        return np.full(len(hostile_pos), np.inf)
+    i, _, _, distance = UniformGrid(friendly_pos, radius).pairs_within(hostile_pos, radius)
+    return nearest_per_query(i, distance, len(hostile_pos))
+
+
+class HostilePolicy:
+    """Base policy: constant velocity.
+
+    steer() receives (k,) / (k, 2) arrays for the k live hostiles; `time` is a
+    scalar or one sim time per hostile (batched episodes), and
+    `friendly_distance` (only passed when `needs_friendlies` is set) is each
+    hostile's distance to its closest friendly, inf when none is within
+    `friendly_range`.
+    """
+
+    needs_friendlies = False
+    friendly_range = R_SENSE
+
+    def __init__(self, turn_rate: float = HOSTILE_TURN_RATE):
+        self.turn_rate = turn_rate
+
+    def desired(self, pos, velocity, ids, time, friendly_distance):
+        """Desired direction per hostile ((k, 2), zero rows keep their heading)."""
+        return np.zeros_like(velocity)
+
+    def steer(self, pos, velocity, ids, time, dt, friendly_distance=None) -> np.ndarray:
+        if len(pos) == 0:
+            return velocity
+        return turn_toward(velocity, self.desired(pos, velocity, ids, time, friendly_distance),
+                           self.turn_rate * np.asarray(dt))
+
+
+class Straight(HostilePolicy):
+    """Constant velocity."""
+
+    def steer(self, pos, velocity, ids, time, dt, friendly_distance=None):
+        return velocity
+
+
+class Seek(HostilePolicy):
+    """Heads for the nearest defended asset."""
+
+    def __init__(self, assets=DEFENDED_ASSETS, turn_rate: float = HOSTILE_TURN_RATE):
+        super().__init__(turn_rate)
+        self.assets = np.asarray(assets, dtype=float).reshape(-1, 2)
+
+    def desired(self, pos, velocity, ids, time, friendly_distance):
+        return nearest_asset(pos, self.assets) - pos
+
+
+class Evasive(Seek):
+    """Seeks, but while a friendly is within `trigger` it jinks: the heading swings
+    `jink_deg` left and right of the seek heading every `period` / 2 seconds
+    (phase set by the hostile's id, so neighbours do not jink in step)."""
+
+    needs_friendlies = True
+
+    def __init__(self, assets=DEFENDED_ASSETS, jink_deg: float = 45.0, period: float = 1.0,
+                 trigger: float = R_SENSE / 2, turn_rate: float = 2 * HOSTILE_TURN_RATE):
+        super().__init__(assets, turn_rate)
+        self.jink = np.radians(jink_deg)
+        self.period = period
+        self.trigger = trigger
+        self.friendly_range = trigger # Nothing farther matters, keeps the query small
+
+    def desired(self, pos, velocity, ids, time, friendly_distance):
+        to_asset = super().desired(pos, velocity, ids, time, friendly_distance)
+        phase = (np.asarray(time) / self.period + ids * GOLDEN_ANGLE) % 1.0
+        angle = np.where(phase < 0.5, self.jink, -self.jink)
+        angle = np.where(friendly_distance < self.trigger, angle, 0.0)
+        return rotate(to_asset, angle)
+
+
+class SplitRegroup(Seek):
+    """Seeks, except between `split_at` and `regroup_at` seconds: the raid splits into
+    `groups` (by id) that fly `spread_deg` apart around the seek heading, then turns back in."""
+
+    def __init__(self, assets=DEFENDED_ASSETS, groups: int = 2, spread_deg: float = 60.0,
+                 split_at: float = 2.0, regroup_at: float = 8.0, turn_rate: float = HOSTILE_TURN_RATE):
+        super().__init__(assets, turn_rate)
+        self.groups = groups
+        self.spread = np.radians(spread_deg)
+        self.split_at = split_at
+        self.regroup_at = regroup_at
+
+    def desired(self, pos, velocity, ids, time, friendly_distance):
+        to_asset = super().desired(pos, velocity, ids, time, friendly_distance)
+        time = np.asarray(time)
+        splitting = (time >= self.split_at) & (time < self.regroup_at)
+        offset = (ids % self.groups - (self.groups - 1) / 2) * self.spread / max(self.groups - 1, 1)
+        angle = np.where(splitting, offset, 0.0)
+        return rotate(to_asset, angle)
+
+
+class Saturation(Seek):
+    """Spreads the raid out: each hostile first aims at its own point on a ring of
+    `radius` around the asset (bearings spread by id), then at the asset itself once
+    it is within `radius` of that point. The defence faces a wide front instead of a column."""
+
+    def __init__(self, assets=DEFENDED_ASSETS, radius: float = 80.0, turn_rate: float = HOSTILE_TURN_RATE):
+        super().__init__(assets, turn_rate)
+        self.radius = radius
+
+    def desired(self, pos, velocity, ids, time, friendly_distance):
+        asset = nearest_asset(pos, self.assets)
+        bearing = ids * GOLDEN_ANGLE
+        aim = asset + np.column_stack((np.cos(bearing), np.sin(bearing))) * self.radius
+        to_aim = aim - pos
+        arrived = np.einsum('ij,ij->i', to_aim, to_aim) < self.radius ** 2
+        return np.where(arrived[:, None], asset - pos, to_aim)
+
+
+POLICIES = {
+    'straight': Straight,
+    'seek': Seek,
+    'evasive': Evasive,
+    'split': SplitRegroup,
+    'saturation': Saturation,
+}
+
+
+def make_policy(spec: str) -> HostilePolicy:
+    """Builds a policy from 'name' or 'name:key=value,...' (keyword arguments of its class)."""
+    name, params = parse_spec(spec)
+    if name not in POLICIES:
+        raise ValueError(f"unknown hostile policy {name!r}: use one of {sorted(POLICIES)}")
+    return POLICIES[name](**params)
@@ -0,0 +1,62 @@
+# intercept.py - Closed-form constant-velocity intercept solver (vectorized)
+#
+# An interceptor at P flying in a straight line at speed s meets a target at Q
+# moving with constant velocity V at the smallest t > 0 with
+#     |Q + V t - P| = s t
+# i.e. (V.V - s^2) t^2 + 2 (R.V) t + R.R = 0,  R = Q - P.
+
+import numpy as np
+
+# Intercept times are capped here when ranking threats; unsolvable pairs rank as this
+MAX_INTERCEPT_TIME = 10.0
+
+
+def solve_intercept(shooter_pos, target_pos, target_vel, speed):
+    """Solves the intercept for every shooter/target pair at once.
+
+    Arguments are (..., 2) arrays (speed is a scalar or (...) array) and
+    broadcast against each other. Returns (point, time, valid):
+    `point` (..., 2) is where to aim, `time` (...) when the interceptor gets
+    there, and `valid` is False where no intercept exists (the target is
+    too fast and opening). For those pairs the fallback is a lead pursuit:
+    aim where the target will be after the time it takes to fly the
+    current distance.
+    """
+    shooter_pos = np.asarray(shooter_pos, dtype=float)
+    target_pos = np.asarray(target_pos, dtype=float)
+    target_vel = np.asarray(target_vel, dtype=float)
+    speed = np.asarray(speed, dtype=float)
+
+    r = target_pos - shooter_pos
+    a = np.einsum('...k,...k->...', target_vel, target_vel) - speed ** 2
+    b = 2.0 * np.einsum('...k,...k->...', r, target_vel)
+    c = np.einsum('...k,...k->...', r, r)
+    a, b, c = np.broadcast_arrays(a, b, c)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Quadratic case, numerically stable roots q / a and c / q
+        disc = b * b - 4.0 * a * c
+        q = -0.5 * (b + np.copysign(np.sqrt(np.maximum(disc, 0.0)), b))
+        t1 = q / a
+        t2 = c / q
+        t1 = np.where(t1 > 0, t1, np.inf)
+        t2 = np.where(t2 > 0, t2, np.inf)
+        quadratic = np.where(disc >= 0, np.minimum(t1, t2), np.inf)
+        # Target exactly as fast as the interceptor: the equation is linear
+        linear = np.where(b < 0, -c / b, np.inf)
+    time = np.where(np.abs(a) < 1e-9, linear, quadratic)
+    time = np.where(c == 0, 0.0, time) # Already there
+
+    valid = np.isfinite(time)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pursuit = np.where(speed > 0, np.sqrt(c) / speed, 0.0)
+    time = np.where(valid, time, pursuit)
+    point = target_pos + target_vel * time[..., None]
+    return point, time, valid
+
+
+def intercept_cost(shooter_pos, target_pos, target_vel, speed, horizon: float = MAX_INTERCEPT_TIME):
+    """Time to intercept for ranking threats: capped at `horizon`, and `horizon`
+    for pairs with no intercept (they rank last but can still be assigned)."""
+    _, time, valid = solve_intercept(shooter_pos, target_pos, target_vel, speed)
+    return np.where(valid, np.minimum(time, horizon), horizon)
@@ -1,16 +1,25 @@
+import argparse
 import pygame
 import numpy as np
 import time # Needed for the final stability fix
 
 # Imports from constants, scenario_data
-from constants import MAX_SPEED, R_INTERCEPT, DELTA_TIME
 from scenario_data import INITIAL_DRONE_DATA 
 
-# Imports from A & B (Logic)
-from drone import Drone, DroneType
-from coordination import get_move_vector 
+# Imports from A & B (Logic) - the headless engine this loop is a frontend for
+from swarm_state import SwarmState
+from physics import update_physics
+from simulation import Simulation, build_drones
+from profiling import Profiler
+from recording import Recorder, Replay
+from scenarios import load_scenario
+from hostile_policies import make_policy
+from metrics import EngagementMetrics
+from viewer import FrameRing, serve, launch_viewer, DEFAULT_RING_NAME
+from events import EventLog, LEVELS, INFO, ENGAGEMENT, LOSS, PAUSE
 
 # Imports from D (Visualization)
+import visualization
 from visualization import draw_simulation, setup_display, set_screen_mode
 
 # --- GLOBAL VARIABLES ---
@@ -18,61 +27,62 @@ is_paused = False
 running = True 
 FPS = 30 # Set a safe maximum FPS
 
+# --- Playback (fixed timestep: the sim always advances in DELTA_TIME ticks) ---
+SPEED_STEPS = [0.25, 0.5, 1.0, 3.0, 10.0, 30.0, 100.0] # Sim seconds per wall-clock second (UP / DOWN)
+DEFAULT_SPEED = 3.0      # One tick per frame at 30 FPS, the original pace
+MAX_FRAME_TIME = 0.25    # Wall time credited per frame at most (avoids catch-up spirals after a stall)
+FAST_FORWARD_BUDGET = 1.0 / FPS # Fast-forward ticks for this long each frame, then handles input/draws
+MAX_RENDER_EVERY = 64    # Render decimation cap ([ / ])
+
 # --- C1: Initialization ---
 def initialize_drones():
     """Converts F's raw data into a list of Drone objects."""
-    drones = []
-    for data in INITIAL_DRONE_DATA:
-        d_type = DroneType.FRIENDLY if data[3] == 'FRIENDLY' else DroneType.HOSTILE
-        # data[4] is the initial velocity vector
-        drones.append(Drone(id=data[0], pos=[data[1], data[2]], velocity=data[4], type=d_type))
-    return drones
+    return build_drones(INITIAL_DRONE_DATA)
 
 # --- C2: Physics & Engagement ---
-def handle_physics_update(drones):
-    """Updates the position of ALL drones and checks engagement, removing both involved parties."""
-    hostiles_to_remove = []
-    friendlies_to_remove = []
-    
-    for drone_i in drones:
-        
-        # Skip physics for any drone already scheduled for removal this tick
-        if drone_i.is_neutralized: 
-            drone_i.blink_timer += DELTA_TIME
-            continue
-
-        # 1. Update Position
-        drone_i.pos += drone_i.velocity * DELTA_TIME
-
-        # 2. Check Engagement (Hostile vs. Friendly)
-        if drone_i.is_hostile():
-            for drone_j in drones:
-                # Check against live friendly drones that aren't already marked for removal
-                if not drone_j.is_hostile() and not drone_j.is_neutralized:
-                    
-                    if drone_i.distance_to(drone_j) < R_INTERCEPT:
-                        
-                        # Hostile is neutralized (Set blink flag)
-                        if not drone_i.is_neutralized:
-                            drone_i.is_neutralized = True
-                            
-                        # Friendly drone is also sacrificed (Mark for removal)
-                        if drone_j not in friendlies_to_remove: 
-                            friendlies_to_remove.append(drone_j) 
-
-                        print(f"Engagement: Hostile {drone_i.id} neutralized, Friendly {drone_j.id} lost.")
-                        break # Move to the next hostile drone
-
-    # Final cleanup of removed drones (This logic is simpler for the hackathon)
-    drones[:] = [d for d in drones if d not in friendlies_to_remove]
-    
-    # Clean up neutralized hostiles that have finished blinking (or just remove them)
-    drones[:] = [d for d in drones if not d.is_neutralized or d.blink_timer < 0.5]
-    
+def handle_physics_update(drones, events: EventLog = None, sim_time: float = 0.0):
+    """Updates the position of ALL drones and checks engagement, removing both involved parties.
+    The work is done in batch by physics.update_physics on the drones' SwarmState
+    (a temporary one is built if the list is not backed by a state). Engagements and
+    losses go to `events` (see events.py) when given."""
+    swarm = SwarmState.of(drones) or SwarmState.from_drones(drones)
+
+    engagements = update_physics(swarm)
+    if events is not None and engagements:
+        hostile_ids, friendly_ids = np.array(engagements).T
+        events.emit_many(ENGAGEMENT, sim_time, -1, hostile_ids, friendly_ids)
+        events.emit_many(LOSS, sim_time, -1, friendly_ids, hostile_ids)
+
+    drones[:] = swarm.drones
     return drones
 
 # --- C3: The Master Loop ---
-def main_simulation_loop():
+def interpolate_positions(prev_ids, prev_pos, swarm, alpha):
+    """Positions between the previous tick (prev_ids / prev_pos) and the current rows of `swarm`.
+    Drones that did not exist on the previous tick are drawn where they are now."""
+    if alpha >= 1.0 or prev_ids is None or len(prev_ids) == 0:
+        return swarm.pos
+    order = np.argsort(prev_ids)
+    slot = np.minimum(np.searchsorted(prev_ids, swarm.ids, sorter=order), len(order) - 1)
+    match = prev_ids[order[slot]] == swarm.ids
+    before = np.where(match[:, None], prev_pos[order[slot]], swarm.pos)
+    return before + (swarm.pos - before) * alpha
+
+def main_simulation_loop(profile: bool = False, cprofile_ticks: tuple = None, cprofile_out: str = 'tick_profile.prof',
+                         record: str = None, scenario: str = None, policy: str = None, metrics: bool = False,
+                         event_log: str = None, log_level: str = 'info'):
+    """Runs the pygame frontend. `profile` times each phase (P toggles it and its HUD overlay);
+    `cprofile_ticks` = (first, last) captures a cProfile of that tick window to `cprofile_out`.
+    `record` saves every tick to that recording directory (see replay_loop).
+    `scenario` is a scenario spec (see scenarios.py); INITIAL_DRONE_DATA by default.
+    `policy` is a hostile policy spec (see hostile_policies.py); straight flight by default.
+    `metrics` collects engagement metrics (see metrics.py) and prints them on exit.
+    Events (see events.py) at `log_level` or above are written to `event_log` (.jsonl or
+    binary) if given; INFO and above are echoed to the console by the log's writer thread.
+
+    Keys: SPACE pause, RIGHT single step, UP / DOWN speed, F fast-forward,
+    [ / ] render every Nth tick, I toggle interpolation, R sensor rings, D dirty-rect drawing.
+    """
     global is_paused, running # Declare globals
     
     # 1. SETUP DISPLAY (The fix for the hang)
@@ -80,64 +90,227 @@ def main_simulation_loop():
     time.sleep(0.1) 
     screen = set_screen_mode() 
     
-    drones = initialize_drones()
+    profiler = Profiler(enabled=profile)
+    if cprofile_ticks:
+        profiler.capture(*cprofile_ticks, path=cprofile_out)
+    swarm = load_scenario(scenario) if scenario else SwarmState.from_drones(initialize_drones())
+    engagement_metrics = EngagementMetrics() if metrics else None
+    events = EventLog(event_log, min_severity=LEVELS[log_level], echo=INFO)
+    sim = Simulation(swarm, profiler=profiler, policy=make_policy(policy) if policy else None,
+                     metrics=engagement_metrics, events=events)
+    recorder = Recorder(record, sim.swarm, sim.dt) if record else None
+    if recorder:
+        recorder.record(sim.time, sim.swarm)
     clock = pygame.time.Clock()
-    
-    simulation_active = True
-    simulation_time = 0.0
+
+    speed = DEFAULT_SPEED
+    fast_forward = False
+    render_every = 1     # Draw once every N ticks
+    interpolate = True
+    accumulator = 0.0    # Sim time owed to the fixed-step loop
+    pending_steps = 0    # Single steps requested while paused
+    ticks_since_draw = 0
+    prev_ids = prev_pos = None
+    last_frame = time.perf_counter()
+
+    def advance():
+        nonlocal prev_ids, prev_pos, ticks_since_draw
+        if interpolate:
+            prev_ids, prev_pos = sim.swarm.ids.copy(), sim.swarm.pos.copy()
+        sim.step() # Engagements and the end of the run are logged by the simulation
+        if recorder and not sim.finished:
+            with profiler.phase('record', len(sim.swarm)):
+                recorder.record(sim.time, sim.swarm)
+        ticks_since_draw += 1
 
     while running:
+        now = time.perf_counter()
+        frame_time = min(now - last_frame, MAX_FRAME_TIME)
+        last_frame = now
         
         # 1. EVENT HANDLING (MUST BE FIRST)
+        with profiler.phase('events'):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_SPACE:
+                        is_paused = not is_paused
+                        accumulator = 0.0
+                        events.emit(PAUSE, sim.time, sim.ticks, int(is_paused))
+                    elif event.key == pygame.K_RIGHT:
+                        is_paused = True
+                        pending_steps += 1
+                    elif event.key == pygame.K_UP:
+                        speed = next((s for s in SPEED_STEPS if s > speed), speed)
+                    elif event.key == pygame.K_DOWN:
+                        speed = next((s for s in reversed(SPEED_STEPS) if s < speed), speed)
+                    elif event.key == pygame.K_f:
+                        fast_forward = not fast_forward
+                        accumulator = 0.0
+                    elif event.key == pygame.K_RIGHTBRACKET:
+                        render_every = min(render_every * 2, MAX_RENDER_EVERY)
+                    elif event.key == pygame.K_LEFTBRACKET:
+                        render_every = max(render_every // 2, 1)
+                    elif event.key == pygame.K_i:
+                        interpolate = not interpolate
+                    elif event.key == pygame.K_r:
+                        visualization.SHOW_SENSOR_RINGS = not visualization.SHOW_SENSOR_RINGS
+                    elif event.key == pygame.K_d:
+                        visualization.DIRTY_RECTS = not visualization.DIRTY_RECTS
+                    elif event.key == pygame.K_p:
+                        profiler.enabled = not profiler.enabled
+        
+        # 2. RUN LOGIC ONLY IF NOT PAUSED AND SIMULATION IS ACTIVE
+        # 3. ALGORITHM INTEGRATION + 4. STATE UPDATE (fixed DELTA_TIME ticks)
+        if sim.finished:
+            accumulator = 0.0
+        elif is_paused:
+            while pending_steps and not sim.finished:
+                pending_steps -= 1
+                advance()
+            accumulator = 0.0
+        elif fast_forward:
+            # As many ticks as fit in the frame budget
+            while not sim.finished and time.perf_counter() - now < FAST_FORWARD_BUDGET:
+                advance()
+            accumulator = 0.0
+        else:
+            accumulator += frame_time * speed
+            while accumulator >= sim.dt and not sim.finished:
+                advance()
+                accumulator -= sim.dt
+                if time.perf_counter() - now > MAX_FRAME_TIME:
+                    accumulator = min(accumulator, sim.dt) # Can't keep up: drop the backlog
+                    break
+        pending_steps = 0
+        
+        # 5. VISUALIZATION (every Nth tick; always when the sim is not advancing)
+        advancing = not (is_paused or sim.finished)
+        if ticks_since_draw >= render_every or not advancing:
+            alpha = accumulator / sim.dt if interpolate and advancing and not fast_forward else 1.0
+            positions = interpolate_positions(prev_ids, prev_pos, sim.swarm, alpha)
+            status = f"{'FF' if fast_forward else f'x{speed:g}'}  draw 1/{render_every}"
+            overlay = profiler.overlay_lines() if profiler.enabled else None
+            with profiler.phase('draw', len(sim.swarm)):
+                draw_simulation(sim.swarm, is_paused=is_paused, time=sim.time, overlay=overlay,
+                                positions=positions, status=status) 
+            ticks_since_draw = 0
+
+        # 6. Control Speed (input stays responsive; fast-forward does not wait)
+        clock.tick(0 if fast_forward else FPS) 
+        
+    pygame.quit()
+    events.close()
+    if events.dropped:
+        print(f"Event log: {events.dropped} events dropped (writer fell behind)")
+    if recorder:
+        recorder.close()
+        print(f"Recorded {recorder.ticks} ticks to {record}")
+    if profiler.phases:
+        print(profiler.report())
+    if engagement_metrics:
+        print(engagement_metrics.summary().report())
+
+# --- C4: Replay of a recording (no coordination is recomputed) ---
+def replay_loop(path: str):
+    """Plays back a recording made with --record.
+
+    Keys: SPACE pause, LEFT / RIGHT step one tick, PAGE UP / PAGE DOWN jump 10%,
+    HOME / END, 0-9 jump to 0-90%, UP / DOWN speed.
+    """
+    global is_paused, running
+    replay = Replay(path)
+    if len(replay) == 0:
+        print(f"{path}: empty recording")
+        return
+
+    setup_display()
+    time.sleep(0.1)
+    set_screen_mode()
+    clock = pygame.time.Clock()
+
+    tick = 0
+    speed = DEFAULT_SPEED
+    accumulator = 0.0
+    last = len(replay) - 1
+    last_frame = time.perf_counter()
+
+    while running:
+        now = time.perf_counter()
+        frame_time = min(now - last_frame, MAX_FRAME_TIME)
+        last_frame = now
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-            
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     is_paused = not is_paused
-                    print(f"Simulation {'PAUSED' if is_paused else 'RESUMED'}. Time: {simulation_time:.2f}s")
-        
-        # 2. RUN LOGIC ONLY IF NOT PAUSED AND SIMULATION IS ACTIVE
-        if not is_paused and simulation_active:
-            
-            # --- CRITICAL FIX: RESET TARGET CLAIM FLAGS ---
-            for drone in drones:
-                if drone.is_hostile():
-                    drone.is_claimed = False
-            # ---------------------------------------------
-
-            # --- CHECK END CONDITION ---
-            if not any(d.is_hostile() for d in drones):
-                simulation_active = False
-                print("All hostiles neutralized. Simulation finished.")
-                
-            
-            if simulation_active:
-                # 3. ALGORITHM INTEGRATION 
-                new_velocities = {}
-                for drone in drones:
-                    if drone.is_hostile():
-                        new_velocities[drone.id] = drone.velocity
-                    elif not drone.is_neutralized:
-                        new_velocities[drone.id] = get_move_vector(drone, drones)
-                    
-                # Apply the new velocities
-                for drone in drones:
-                    if drone.id in new_velocities:
-                        drone.velocity = new_velocities[drone.id]
-
-                # 4. STATE UPDATE 
-                drones = handle_physics_update(drones)
-                simulation_time += DELTA_TIME
-        
-        # 5. VISUALIZATION (Runs always to show final state)
-        draw_simulation(drones, is_paused=is_paused, time=simulation_time) 
+                elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    is_paused = True
+                    tick += 1 if event.key == pygame.K_RIGHT else -1
+                elif event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                    tick += (1 if event.key == pygame.K_PAGEUP else -1) * max(1, len(replay) // 10)
+                elif event.key == pygame.K_HOME:
+                    tick = 0
+                elif event.key == pygame.K_END:
+                    tick = last
+                elif pygame.K_0 <= event.key <= pygame.K_9:
+                    tick = (event.key - pygame.K_0) * len(replay) // 10
+                elif event.key == pygame.K_UP:
+                    speed = next((s for s in SPEED_STEPS if s > speed), speed)
+                elif event.key == pygame.K_DOWN:
+                    speed = next((s for s in reversed(SPEED_STEPS) if s < speed), speed)
+
+        if not is_paused:
+            accumulator += frame_time * speed
+            steps = int(accumulator / replay.dt)
+            accumulator -= steps * replay.dt
+            tick += steps
+        tick = min(max(tick, 0), last)
+
+        draw_simulation(replay.state(tick), is_paused=is_paused, time=replay.time(tick),
+                        status=f"REPLAY x{speed:g}  {tick}/{last}")
+        clock.tick(FPS)
 
-        # 6. Control Speed
-        clock.tick(FPS) 
-        
     pygame.quit()
 
+# --- C5: Simulation with the viewer in its own process ---
+def detached_viewer_loop(scenario: str = None, policy: str = None, speed: float = DEFAULT_SPEED,
+                         ring_name: str = DEFAULT_RING_NAME, event_log: str = None, log_level: str = 'info'):
+    """Runs the simulation here and the pygame viewer in a separate process (see viewer.py),
+    so drawing never stalls a tick. The run is paced at `speed` x real time and stops early
+    if the viewer window is closed; other viewers can attach to `ring_name` meanwhile.
+    """
+    swarm = load_scenario(scenario) if scenario else SwarmState.from_drones(initialize_drones())
+    with EventLog(event_log, min_severity=LEVELS[log_level], echo=INFO) as events:
+        sim = Simulation(swarm, policy=make_policy(policy) if policy else None, events=events)
+        with FrameRing.create(len(sim.swarm), ring_name) as ring:
+            viewer = launch_viewer(ring.name)
+            serve(sim, ring, speed, stop=lambda: viewer.poll() is not None)
+    print(sim.result())
+    viewer.wait() # The viewer keeps showing the final frame until its window is closed
+
 if __name__ == "__main__":
-    main_simulation_loop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Swarm engagement simulation (pygame frontend).")
+    parser.add_argument('--profile', action='store_true', help="Time each phase and show the timing overlay (toggle with P)")
+    parser.add_argument('--cprofile', type=int, nargs=2, metavar=('FIRST', 'LAST'), help="cProfile ticks FIRST..LAST")
+    parser.add_argument('--cprofile-out', default='tick_profile.prof')
+    parser.add_argument('--record', metavar='DIR', help="Record every tick to a recording directory")
+    parser.add_argument('--replay', metavar='DIR', help="Play back a recording instead of simulating")
+    parser.add_argument('--policy', metavar='SPEC', help="Hostile behaviour: straight, seek, evasive, split, saturation (name:key=value,...)")
+    parser.add_argument('--viewer', action='store_true', help="Draw in a separate viewer process (see viewer.py)")
+    parser.add_argument('--metrics', action='store_true', help="Collect engagement metrics and print them on exit")
+    parser.add_argument('--event-log', metavar='PATH', help="Write the event log to PATH (.jsonl, otherwise binary)")
+    parser.add_argument('--log-level', choices=sorted(LEVELS), default='info', help="Lowest severity logged")
+    parser.add_argument('--scenario', metavar='SPEC', help="Scenario name, .npz / .csv file or generator:key=value,... (see scenarios.py)")
+    args = parser.parse_args()
+    if args.replay:
+        replay_loop(args.replay)
+    elif args.viewer:
+        detached_viewer_loop(args.scenario, args.policy, event_log=args.event_log, log_level=args.log_level)
+    else:
+        main_simulation_loop(args.profile, args.cprofile, args.cprofile_out, args.record, args.scenario, args.policy,
+                             args.metrics, args.event_log, args.log_level)
\ No newline at end of file
@@ -0,0 +1,302 @@
+# metrics.py - Streaming engagement metrics: O(1) memory per drone, mergeable across episodes
+#
+# EngagementMetrics follows a Simulation tick by tick and only keeps running
+# values: a few numbers per drone (indexed by the drone's row in the starting
+# swarm, so compaction does not matter) and fixed-size counters. Memory does
+# not grow with the length of the run. Tracked:
+#   - time of the first and the last neutralization, friendly losses per kill,
+#   - closest approach of each hostile to the nearest defended asset,
+#   - time each hostile spends inside r_threat of a live friendly without a claim,
+#   - how long a friendly keeps one target before it switches or drops it.
+#
+# summary() condenses a run into a MetricsSummary made of counters and
+# RunningStats (count, mean, variance, min, max). Summaries merge in constant
+# time into the statistics of the pooled values (up to float rounding), so
+# parallel episodes are combined with `+` or sum().
+#
+# Usage:
+#   metrics = EngagementMetrics()
+#   Simulation(scenario, metrics=metrics).run()
+#   print(metrics.summary().report())
+#   python metrics.py --episodes 500 --hostiles 5 --policy evasive
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from constants import R_THREAT
+from swarm_state import DroneRegistry
+from hostile_policies import DEFENDED_ASSETS, make_policy
+from scenario_data import generate_scenario
+from simulation import Simulation
+from monte_carlo import episode_seeds, EPISODE_MAX_TIME
+
+
+class RunningStats:
+    """Count, mean, variance, min and max of a stream of values (Chan et al. parallel
+    update, so batches and whole RunningStats merge without keeping the values)."""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _combine(self, count, mean, m2, low, high):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    def add(self, values):
+        """Adds one value or an array of values."""
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size:
+            mean = float(values.mean())
+            self._combine(values.size, mean, float(((values - mean) ** 2).sum()),
+                          float(values.min()), float(values.max()))
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        merged = RunningStats()
+        for stats in (self, other):
+            merged._combine(stats.count, stats.mean, stats.m2, stats.min, stats.max)
+        return merged
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+    def as_dict(self) -> dict:
+        if not self.count:
+            return {'count': 0}
+        return {'count': self.count, 'mean': self.mean, 'std': self.std, 'min': self.min, 'max': self.max}
+
+    def __repr__(self):
+        if not self.count:
+            return "RunningStats(empty)"
+        return f"RunningStats(n={self.count}, mean={self.mean:.3f}, std={self.std:.3f}, min={self.min:.3f}, max={self.max:.3f})"
+
+
+@dataclass
+class MetricsSummary:
+    """Metrics of one or more episodes. Fixed size; `a + b` merges two summaries."""
+    episodes: int = 0
+    kills: int = 0
+    friendly_losses: int = 0
+    target_switches: int = 0       # A friendly went straight from one hostile to another
+    first_kill_time: RunningStats = field(default_factory=RunningStats)       # One value per episode with a kill
+    last_kill_time: RunningStats = field(default_factory=RunningStats)
+    closest_approach: RunningStats = field(default_factory=RunningStats)      # One value per hostile
+    unclaimed_threat_time: RunningStats = field(default_factory=RunningStats) # One value per hostile
+    assignment_hold: RunningStats = field(default_factory=RunningStats)       # One value per held target
+
+    @property
+    def losses_per_kill(self) -> float:
+        return self.friendly_losses / self.kills if self.kills else float('nan')
+
+    def merge(self, other: 'MetricsSummary') -> 'MetricsSummary':
+        return MetricsSummary(
+            episodes=self.episodes + other.episodes,
+            kills=self.kills + other.kills,
+            friendly_losses=self.friendly_losses + other.friendly_losses,
+            target_switches=self.target_switches + other.target_switches,
+            first_kill_time=self.first_kill_time.merge(other.first_kill_time),
+            last_kill_time=self.last_kill_time.merge(other.last_kill_time),
+            closest_approach=self.closest_approach.merge(other.closest_approach),
+            unclaimed_threat_time=self.unclaimed_threat_time.merge(other.unclaimed_threat_time),
+            assignment_hold=self.assignment_hold.merge(other.assignment_hold),
+        )
+
+    def __add__(self, other):
+        return self.merge(other)
+
+    def __radd__(self, other):
+        return self if other == 0 else self.merge(other) # sum() starts from 0
+
+    def as_dict(self) -> dict:
+        return {
+            'episodes': self.episodes,
+            'kills': self.kills,
+            'friendly_losses': self.friendly_losses,
+            'losses_per_kill': self.losses_per_kill,
+            'target_switches': self.target_switches,
+            'first_kill_time': self.first_kill_time.as_dict(),
+            'last_kill_time': self.last_kill_time.as_dict(),
+            'closest_approach': self.closest_approach.as_dict(),
+            'unclaimed_threat_time': self.unclaimed_threat_time.as_dict(),
+            'assignment_hold': self.assignment_hold.as_dict(),
+        }
+
+    def report(self) -> str:
+        lines = [
+            f"episodes {self.episodes}  kills {self.kills}  friendly losses {self.friendly_losses}  "
+            f"losses/kill {self.losses_per_kill:.2f}  target switches {self.target_switches}",
+            f"{'(seconds / units)':24} {'count':>7} {'mean':>9} {'std':>9} {'min':>9} {'max':>9}",
+        ]
+        for name in ('first_kill_time', 'last_kill_time', 'closest_approach', 'unclaimed_threat_time', 'assignment_hold'):
+            stats = getattr(self, name)
+            if stats.count:
+                lines.append(f"{name:24} {stats.count:7d} {stats.mean:9.2f} {stats.std:9.2f} {stats.min:9.2f} {stats.max:9.2f}")
+            else:
+                lines.append(f"{name:24} {0:7d}")
+        return "\n".join(lines)
+
+
+class EngagementMetrics:
+    """Per-tick metrics stage for one Simulation (pass it as `metrics=`).
+
+    Simulation calls observe() once per tick after coordination (claims and
+    targets are set, the tick's pair cache is current) and record() with the
+    tick's engagements after physics.
+    """
+
+    def __init__(self, assets=DEFENDED_ASSETS):
+        self.assets = np.asarray(assets, dtype=float).reshape(-1, 2)
+        self.registry = None
+        self.time = 0.0
+        self.kills = 0
+        self.friendly_losses = 0
+        self.target_switches = 0
+        self.first_kill_time = None
+        self.last_kill_time = None
+        self.holds = RunningStats()
+
+    def _attach(self, swarm):
+        """Per-drone accumulators, indexed by row in the starting swarm."""
+        count = len(swarm)
+        self.registry = DroneRegistry(swarm.ids.copy())
+        self.is_hostile = swarm.hostile_mask().copy()
+        self.closest = np.full(count, np.inf)
+        self.unclaimed = np.zeros(count)
+        self.target = np.full(count, -1, dtype=np.int64)
+        self.since = np.zeros(count)
+        self._swarm_registry = None
+
+    def _slots(self, swarm) -> np.ndarray:
+        """Starting-swarm index of every current row (recomputed only after compaction)."""
+        if swarm.registry is not self._swarm_registry:
+            self._swarm_registry = swarm.registry
+            self._row_slots = self.registry.slot_of(swarm.ids)
+        return self._row_slots
+
+    def observe(self, swarm, time: float, dt: float, threat_range: float = R_THREAT):
+        """Updates the running values from the state the coming step of `dt` starts from."""
+        if self.registry is None:
+            self._attach(swarm)
+        self.time = time
+        slots = self._slots(swarm)
+        hostile = swarm.live_hostiles()
+        friendly = swarm.live_friendlies()
+
+        if hostile.size:
+            h_slots = slots[hostile]
+            offset = swarm.pos[hostile][:, None, :] - self.assets[None, :, :]
+            distance = np.sqrt(np.einsum('ijk,ijk->ij', offset, offset)).min(axis=1)
+            self.closest[h_slots] = np.minimum(self.closest[h_slots], distance)
+            if friendly.size:
+                i, _, _, _ = swarm.pair_cache().pairs(hostile, friendly, threat_range)
+                threatened = np.zeros(hostile.size, dtype=bool)
+                threatened[i] = True
+                self.unclaimed[h_slots[threatened & ~swarm.is_claimed[hostile]]] += dt
+
+        if friendly.size:
+            f_slots = slots[friendly]
+            target = swarm.target_id[friendly]
+            held = self.target[f_slots]
+            changed = target != held
+            ended = changed & (held >= 0)
+            self.holds.add(time - self.since[f_slots[ended]])
+            self.target_switches += int(np.count_nonzero(ended & (target >= 0)))
+            self.target[f_slots[changed]] = target[changed]
+            self.since[f_slots[changed]] = time
+
+    def record(self, engagements: list, time: float):
+        """Counts the tick's (hostile_id, friendly_id) engagements, ending at `time`."""
+        self.time = time
+        if not engagements:
+            return
+        if self.first_kill_time is None:
+            self.first_kill_time = time
+        self.last_kill_time = time
+        self.kills += len(engagements)
+        self.friendly_losses += len(engagements) # The engaging friendly is sacrificed
+        if self.registry is not None:
+            # The lost friendlies' holds end here
+            lost = self.registry.slot_of([friendly_id for _, friendly_id in engagements])
+            lost = lost[self.target[lost] >= 0]
+            self.holds.add(time - self.since[lost])
+            self.target[lost] = -1
+
+    def summary(self) -> MetricsSummary:
+        """This run so far as a MetricsSummary (targets still held count as held until now)."""
+        summary = MetricsSummary(episodes=1, kills=self.kills, friendly_losses=self.friendly_losses,
+                                 target_switches=self.target_switches)
+        if self.first_kill_time is not None:
+            summary.first_kill_time.add(self.first_kill_time)
+            summary.last_kill_time.add(self.last_kill_time)
+        summary.assignment_hold = self.holds.merge(RunningStats())
+        if self.registry is not None:
+            summary.closest_approach.add(self.closest[self.is_hostile & np.isfinite(self.closest)])
+            summary.unclaimed_threat_time.add(self.unclaimed[self.is_hostile])
+            holding = self.target >= 0
+            summary.assignment_hold.add(self.time - self.since[holding])
+        return summary
+
+
+# --- Many episodes ---
+
+def _metrics_chunk(args) -> MetricsSummary:
+    seeds, scenario_params, max_time, adaptive, policy, tuning = args
+    total = MetricsSummary()
+    for seed in seeds:
+        metrics = EngagementMetrics()
+        Simulation(generate_scenario(int(seed), **scenario_params), adaptive=adaptive, metrics=metrics,
+                   policy=make_policy(policy) if policy else None, tuning=tuning).run(max_time=max_time)
+        total = total + metrics.summary()
+    return total
+
+
+def run_metrics(episodes: int, base_seed: int = 0, workers: int = None, max_time: float = EPISODE_MAX_TIME,
+                chunk_size: int = 16, adaptive: bool = False, policy: str = None, tuning=None,
+                **scenario_params) -> MetricsSummary:
+    """Metrics over the same seeded random episodes as monte_carlo.run_monte_carlo
+    (one Simulation each), run across a process pool and merged into one summary."""
+    seeds = episode_seeds(episodes, base_seed)
+    chunks = [(seeds[i:i + chunk_size], scenario_params, max_time, adaptive, policy, tuning)
+              for i in range(0, episodes, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return sum(map(_metrics_chunk, chunks), MetricsSummary())
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(_metrics_chunk, chunks), MetricsSummary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Engagement metrics over random Monte Carlo episodes.")
+    parser.add_argument('--episodes', type=int, default=200)
+    parser.add_argument('--friendlies', type=int, default=5)
+    parser.add_argument('--hostiles', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--adaptive', action='store_true', help="Long steps while no hostile is near a friendly")
+    parser.add_argument('--policy', default=None, help="Hostile policy spec, e.g. evasive")
+    args = parser.parse_args()
+
+    summary = run_metrics(args.episodes, base_seed=args.seed, workers=args.workers, adaptive=args.adaptive,
+                          policy=args.policy, n_friendly=args.friendlies, n_hostile=args.hostiles)
+    print(summary.report())
@@ -0,0 +1,143 @@
+# monte_carlo.py - Parallel Monte Carlo evaluation of the DSEA over random scenarios
+#
+# Usage:
+#   python monte_carlo.py --episodes 2000 --friendlies 5 --hostiles 3 --seed 42 --out results.npy
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scenario_data import generate_scenario
+from hostile_policies import make_policy
+from simulation import Simulation
+from batch_simulation import BatchedSimulation
+from tuning import Tuning, make_tuning
+
+# Generated raids reach the defenders within ~20 s; anything still flying after this has leaked
+EPISODE_MAX_TIME = 60.0
+
+# One row per episode
+EPISODE_DTYPE = np.dtype([
+    ('episode', np.int32),
+    ('seed', np.int64),
+    ('win', np.bool_),                 # Every hostile neutralized
+    ('time_to_neutralize', np.float64), # NaN when not a win
+    ('friendly_losses', np.int32),
+    ('hostiles_neutralized', np.int32),
+    ('leaked_hostiles', np.int32),
+    ('sim_time', np.float64),
+])
+
+
+def episode_seeds(episodes: int, base_seed: int = 0) -> np.ndarray:
+    """Independent per-episode seeds derived from one base seed (stable across worker counts)."""
+    children = np.random.SeedSequence(base_seed).spawn(episodes)
+    return np.array([int(c.generate_state(1, dtype=np.uint32)[0]) for c in children], dtype=np.int64)
+
+
+def _row(episode, seed, result) -> tuple:
+    return (
+        episode,
+        seed,
+        result.cleared,
+        result.time_to_clear if result.cleared else np.nan,
+        result.friendly_losses,
+        result.hostiles_neutralized,
+        result.leaked_hostiles,
+        result.sim_time,
+    )
+
+
+def run_episode(episode: int, seed: int, scenario_params: dict, max_time: float = EPISODE_MAX_TIME,
+                adaptive: bool = False, policy: str = None, tuning: Tuning = None) -> tuple:
+    """Runs one headless episode and returns its row of the results table.
+    `policy` is a hostile policy spec (see hostile_policies.make_policy)."""
+    result = Simulation(generate_scenario(seed, **scenario_params), adaptive=adaptive,
+                        policy=make_policy(policy) if policy else None, tuning=tuning).run(max_time=max_time)
+    return _row(episode, seed, result)
+
+
+def _run_chunk(args):
+    episodes, seeds, scenario_params, max_time, batched, adaptive, policy, tuning = args
+    if batched:
+        # The whole chunk advances together in one BatchedSimulation
+        scenarios = [generate_scenario(s, **scenario_params) for s in seeds]
+        results = BatchedSimulation(scenarios, adaptive=adaptive, policy=make_policy(policy) if policy else None,
+                                    tuning=tuning).run(max_time=max_time)
+        return [_row(e, s, r) for e, s, r in zip(episodes, seeds, results)]
+    return [run_episode(e, s, scenario_params, max_time, adaptive, policy, tuning) for e, s in zip(episodes, seeds)]
+
+
+def run_monte_carlo(episodes: int, base_seed: int = 0, workers: int = None,
+                    max_time: float = EPISODE_MAX_TIME, chunk_size: int = None, batched: bool = True,
+                    adaptive: bool = False, policy: str = None, tuning: Tuning = None,
+                    **scenario_params) -> np.ndarray:
+    """Runs `episodes` random episodes across a process pool.
+
+    scenario_params are forwarded to scenario_data.generate_scenario (counts,
+    spawn regions, speed range...). With `batched`, each chunk is stepped as one
+    BatchedSimulation (much faster for small swarms); otherwise every episode
+    runs its own Simulation. `adaptive` enables adaptive step lengths and
+    `policy` is a hostile policy spec, e.g. 'evasive' (straight-line raids
+    without one); `tuning` sets the coordination parameters (tuning.py).
+    Returns a structured array (EPISODE_DTYPE) ordered by episode, identical
+    for any number of workers.
+    """
+    if chunk_size is None:
+        chunk_size = 256 if batched else 16
+    seeds = episode_seeds(episodes, base_seed)
+    numbers = np.arange(episodes)
+    chunks = [
+        (numbers[i:i + chunk_size], seeds[i:i + chunk_size], scenario_params, max_time, batched, adaptive, policy, tuning)
+        for i in range(0, episodes, chunk_size)
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        rows = [row for chunk in chunks for row in _run_chunk(chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = [row for result in pool.map(_run_chunk, chunks) for row in result]
+    return np.array(rows, dtype=EPISODE_DTYPE)
+
+
+def summarize(table: np.ndarray) -> dict:
+    """Headline statistics over a results table."""
+    wins = table['win']
+    return {
+        'episodes': len(table),
+        'win_rate': float(wins.mean()) if len(table) else 0.0,
+        'mean_time_to_neutralize': float(np.nanmean(table['time_to_neutralize'])) if wins.any() else float('nan'),
+        'mean_friendly_losses': float(table['friendly_losses'].mean()) if len(table) else 0.0,
+        'mean_leaked_hostiles': float(table['leaked_hostiles'].mean()) if len(table) else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo evaluation of the swarm engagement algorithm.")
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--friendlies', type=int, default=5)
+    parser.add_argument('--hostiles', type=int, default=3)
+    parser.add_argument('--min-speed', type=float, default=10.0)
+    parser.add_argument('--max-speed', type=float, default=20.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-time', type=float, default=EPISODE_MAX_TIME)
+    parser.add_argument('--unbatched', action='store_true', help="One Simulation per episode instead of batches")
+    parser.add_argument('--adaptive', action='store_true', help="Long steps while no hostile is near a friendly")
+    parser.add_argument('--policy', default=None, help="Hostile policy spec, e.g. evasive or split:groups=3")
+    parser.add_argument('--tuning', default='', help="Coordination parameters, e.g. r_threat=40,cohesion_weight=0.3")
+    parser.add_argument('--out', default=None, help="Save the per-episode table (.npy)")
+    args = parser.parse_args()
+
+    table = run_monte_carlo(
+        args.episodes, base_seed=args.seed, workers=args.workers, max_time=args.max_time,
+        batched=not args.unbatched, adaptive=args.adaptive, policy=args.policy, tuning=make_tuning(args.tuning),
+        n_friendly=args.friendlies, n_hostile=args.hostiles, hostile_speed=(args.min_speed, args.max_speed),
+    )
+    if args.out:
+        np.save(args.out, table)
+    for key, value in summarize(table).items():
+        print(f"{key}: {value}")
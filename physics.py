@@ -0,0 +1,121 @@
+import numpy as np
+from constants import R_INTERCEPT, R_THREAT, MAX_SPEED, DELTA_TIME
+from spatial_index import UniformGrid
+
+# How long a neutralized hostile keeps blinking before it is removed
+BLINK_DURATION = 0.5
+
+# Longest adaptive step (see adaptive_step); DELTA_TIME stays the finest one
+MAX_ADAPTIVE_STEP = 1.0
+
+# --- Swept interception ---
+
+def closest_approach(offset: np.ndarray, relative_velocity: np.ndarray, dt: float) -> np.ndarray:
+    """Smallest distance reached over [0, dt] by pairs starting `offset` apart and
+    moving at `relative_velocity` (both (..., 2)); dt may broadcast per pair."""
+    speed_sq = np.einsum('...k,...k->...', relative_velocity, relative_velocity)
+    closing = -np.einsum('...k,...k->...', offset, relative_velocity)
+    s = np.clip(np.divide(closing, speed_sq, out=np.zeros_like(speed_sq), where=speed_sq > 0), 0.0, dt)
+    nearest = offset + relative_velocity * s[..., None]
+    return np.sqrt(np.einsum('...k,...k->...', nearest, nearest))
+
+def adaptive_step(hostile_pos, hostile_vel, friendly_pos, dt: float = DELTA_TIME,
+                  max_step: float = MAX_ADAPTIVE_STEP, distances=None, threat_range: float = R_THREAT) -> float:
+    """Longest multiple of dt (up to max_step) over which no hostile can get within
+    `threat_range` of a friendly, assuming both close at full speed. Returns dt as
+    soon as any pair is near it, so engagements are always fine-stepped.
+    `distances(radius)` optionally returns the hostile-friendly pair distances
+    within radius (e.g. from the tick's PairCache) instead of a grid query."""
+    if len(hostile_pos) == 0 or len(friendly_pos) == 0:
+        return dt
+    closing_speed = np.sqrt(np.einsum('ij,ij->i', hostile_vel, hostile_vel)).max() + MAX_SPEED
+    reach = threat_range + max_step * closing_speed
+    if distances is not None:
+        distance = distances(reach)
+    else:
+        _, _, _, distance = UniformGrid(friendly_pos, reach).pairs_within(hostile_pos, reach)
+    if distance.size == 0:
+        return max_step
+    gap = distance.min() - threat_range
+    steps = int(gap / closing_speed / dt) if gap > 0 else 1
+    return min(max(steps, 1), int(round(max_step / dt))) * dt
+
+# --- C2: Physics & Engagement (batched) ---
+
+def find_engagements(state, hostile: np.ndarray, friendly: np.ndarray, start_pos: np.ndarray = None,
+                     dt: float = 0.0) -> list:
+    """Pairs hostiles with friendlies that came inside R_INTERCEPT, one-to-one.
+
+    With `start_pos` (positions before this step's move) the test is swept:
+    a pair engages if its closest approach along the step's straight-line
+    motion is inside R_INTERCEPT, so fast pairs cannot tunnel through each
+    other between ticks. Without it, only the current positions are checked.
+    Candidate pairs over state.pos come from the tick's PairCache when one is
+    current (see SwarmState.pair_cache), otherwise from a grid query.
+    Hostiles are resolved in row order; each takes the first (lowest row)
+    friendly in range that no earlier hostile has taken this tick.
+    Returns a list of (hostile_row, friendly_row).
+    """
+    if hostile.size == 0 or friendly.size == 0:
+        return []
+    cache = state.current_pairs()
+    if start_pos is None:
+        if cache is not None:
+            hi, fj, _, _ = cache.pairs(hostile, friendly, R_INTERCEPT) # Sorted by hostile, then friendly
+        else:
+            grid = UniformGrid(state.pos[friendly], R_INTERCEPT)
+            hi, fj, _, _ = grid.pairs_within(state.pos[hostile], R_INTERCEPT)
+    else:
+        # Candidates: pairs whose start positions are close enough to meet within the step
+        speed = np.sqrt(np.einsum('ij,ij->i', state.velocity, state.velocity))
+        reach = R_INTERCEPT + (speed[hostile].max() + speed[friendly].max()) * dt
+        if start_pos is state.pos and cache is not None:
+            hi, fj, offset, _ = cache.pairs(hostile, friendly, reach)
+        else:
+            hi, fj, offset, _ = UniformGrid(start_pos[friendly], reach).pairs_within(start_pos[hostile], reach)
+        relative_velocity = state.velocity[hostile[hi]] - state.velocity[friendly[fj]]
+        hit = closest_approach(offset, relative_velocity, dt) < R_INTERCEPT
+        hi, fj = hi[hit], fj[hit]
+
+    engagements = []
+    used = set()
+    last_hostile = -1
+    for h, f in zip(hi.tolist(), fj.tolist()):
+        if h == last_hostile or f in used:
+            continue
+        used.add(f)
+        last_hostile = h
+        engagements.append((int(hostile[h]), int(friendly[f])))
+    return engagements
+
+def update_physics(state, dt: float = DELTA_TIME) -> list:
+    """Moves every live drone, resolves engagements and removes dead drones.
+
+    Neutralized hostiles stop moving and blink for BLINK_DURATION before they
+    are dropped; a friendly that engages is sacrificed and dropped at once.
+    Returns the tick's engagements as (hostile_id, friendly_id) tuples.
+    """
+    live = ~state.is_neutralized
+
+    # 1. Check Engagement (Hostile vs. Friendly), swept over the step's motion from the
+    # current positions (so the tick's pair cache still applies)
+    hostile = state.live_hostiles()
+    friendly = state.live_friendlies()
+    engagements = find_engagements(state, hostile, friendly, state.pos, dt)
+
+    # 2. Update Position (all live drones in one array operation; invalidates the pair cache)
+    state.blink_timer[~live] += dt
+    state.pos[live] += state.velocity[live] * dt
+    state.version += 1
+
+    lost = np.zeros(len(state), dtype=bool)
+    if engagements:
+        hostile_rows, friendly_rows = np.array(engagements).T
+        state.is_neutralized[hostile_rows] = True
+        lost[friendly_rows] = True
+    events = [(int(state.ids[h]), int(state.ids[f])) for h, f in engagements]
+
+    # 3. Remove sacrificed friendlies and hostiles that have finished blinking (one pass)
+    expired = state.is_neutralized & (state.blink_timer >= BLINK_DURATION)
+    state.compact(~lost & ~expired)
+    return events
@@ -0,0 +1,149 @@
+# profiling.py - Opt-in per-phase timing for the simulation tick and the master loop
+#
+# Usage:
+#   profiler = Profiler(enabled=True)
+#   with profiler.phase('physics', drones=len(swarm)):
+#       ...
+#   profiler.end_tick()
+#   print(profiler.report())
+#
+# A disabled profiler hands out one shared no-op context, so the hooks can stay
+# in the hot path for good.
+
+import cProfile
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+RECENT_SAMPLES = 512 # Per phase: percentiles are computed over the last RECENT_SAMPLES calls
+
+_NO_OP = nullcontext()
+
+
+class PhaseStats:
+    """Running counters for one phase (O(1) memory)."""
+
+    __slots__ = ('calls', 'total', 'max', 'drones', '_recent', '_next')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.drones = 0
+        self._recent = np.zeros(RECENT_SAMPLES)
+        self._next = 0
+
+    def add(self, seconds: float, drones: int = 0):
+        self.calls += 1
+        self.total += seconds
+        self.drones += drones
+        if seconds > self.max:
+            self.max = seconds
+        self._recent[self._next % RECENT_SAMPLES] = seconds
+        self._next += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+    def percentile(self, q: float) -> float:
+        """q-th percentile (0-100) of the recent call times, in seconds."""
+        if not self.calls:
+            return 0.0
+        return float(np.percentile(self._recent[:min(self._next, RECENT_SAMPLES)], q))
+
+    def as_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'total': self.total,
+            'mean': self.mean,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'drones': self.drones,
+        }
+
+
+class _Timer:
+    __slots__ = ('stats', 'drones', 'start')
+
+    def __init__(self, stats, drones):
+        self.stats = stats
+        self.drones = drones
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add(time.perf_counter() - self.start, self.drones)
+        return False
+
+
+class Profiler:
+    """Per-phase call counters plus an optional cProfile capture over a tick window."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.phases = {}
+        self.tick = 0
+        self._capture = None # (first_tick, last_tick, output path)
+        self._cprofile = None
+
+    def phase(self, name: str, drones: int = 0):
+        """Context manager timing one phase. A shared no-op when disabled."""
+        if not self.enabled:
+            return _NO_OP
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        return _Timer(stats, drones)
+
+    def capture(self, first_tick: int, last_tick: int, path: str = 'tick_profile.prof'):
+        """Runs cProfile from the start of `first_tick` to the end of `last_tick` (inclusive)
+        and dumps the stats to `path` (readable with `python -m pstats`)."""
+        self._capture = (first_tick, last_tick, path)
+        self._update_capture()
+
+    def end_tick(self):
+        """Marks the end of one simulation tick (drives the cProfile window)."""
+        self.tick += 1
+        if self._capture is not None:
+            self._update_capture()
+
+    def _update_capture(self):
+        first, last, path = self._capture
+        if self._cprofile is None and first <= self.tick <= last:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        elif self._cprofile is not None and self.tick > last:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(path)
+            self._cprofile = None
+            self._capture = None
+
+    def reset(self):
+        self.phases.clear()
+
+    def summary(self) -> dict:
+        return {name: stats.as_dict() for name, stats in self.phases.items()}
+
+    def report(self) -> str:
+        """Table of the phases, one line each (times in ms)."""
+        lines = [f"{'phase':<16}{'calls':>8}{'mean':>9}{'p95':>9}{'max':>9}{'us/drone':>10}"]
+        for name, s in self.phases.items():
+            per_drone = s.total / s.drones * 1e6 if s.drones else float('nan')
+            lines.append(
+                f"{name:<16}{s.calls:>8}{s.mean * 1e3:>9.3f}{s.percentile(95) * 1e3:>9.3f}"
+                f"{s.max * 1e3:>9.3f}{per_drone:>10.2f}"
+            )
+        return "\n".join(lines)
+
+    def overlay_lines(self) -> list:
+        """Short per-phase lines for the HUD: name, p50 and max of the recent calls (ms)."""
+        return [
+            f"{name}: {s.percentile(50) * 1e3:.2f} ms (max {s.max * 1e3:.1f})"
+            for name, s in self.phases.items()
+        ]
@@ -0,0 +1,192 @@
+# recording.py - Chunked binary trajectory recorder and memory-mapped replay
+#
+# A recording is a directory:
+#   index.json         dt, chunk size, tick count, chunk file names
+#   drones.npy         one row per drone present at the start (id, type); its row is the drone's slot
+#   chunk_00000.npy    preallocated block of CHUNK ticks, one record per tick:
+#                      time, pos / velocity (float32, per slot), alive / neutralized flags,
+#                      blink timer and target slot (-1 for none)
+#
+# Chunks are written through np.lib.format.open_memmap and read back with
+# mmap_mode='r', so neither side ever holds more than the touched pages in RAM.
+# A Replay keeps only the MAPPED_CHUNKS most recently used chunks mapped, so
+# seeking through an hour-long recording holds a bounded number of file handles.
+#
+# Usage:
+#   recorder = Recorder('run.rec', sim.swarm, sim.dt)
+#   while ...: sim.step(); recorder.record(sim.time, sim.swarm)
+#   recorder.close()
+#
+#   replay = Replay('run.rec')
+#   state = replay.state(1200) # SwarmState of tick 1200, no recomputation
+
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from swarm_state import SwarmState
+
+CHUNK_BYTES = 32 * 1024 * 1024 # Target size of one chunk file
+INDEX_FILE = 'index.json'
+DRONES_FILE = 'drones.npy'
+MAPPED_CHUNKS = 4 # Chunks a Replay keeps mapped (least recently used are unmapped)
+
+
+def tick_dtype(slots: int) -> np.dtype:
+    """Record layout of one tick for a swarm of `slots` drones."""
+    return np.dtype([
+        ('time', np.float64),
+        ('pos', np.float32, (slots, 2)),
+        ('velocity', np.float32, (slots, 2)),
+        ('alive', np.bool_, (slots,)),
+        ('neutralized', np.bool_, (slots,)),
+        ('blink_timer', np.float32, (slots,)),
+        ('target', np.int32, (slots,)),
+    ])
+
+
+def _chunk_name(number: int) -> str:
+    return f"chunk_{number:05d}.npy"
+
+
+class Recorder:
+    """Appends one record per tick to preallocated, memory-mapped chunk files.
+
+    Drones are stored by slot (their row at the start of the recording);
+    drones removed from the swarm later are simply not alive in later ticks.
+    """
+
+    def __init__(self, path: str, swarm: SwarmState, dt: float, chunk_ticks: int = None):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dt = dt
+
+        drones = np.zeros(len(swarm), dtype=[('id', np.int64), ('type', np.int8)])
+        drones['id'] = swarm.ids
+        drones['type'] = swarm.types
+        np.save(os.path.join(path, DRONES_FILE), drones)
+        self._order = np.argsort(swarm.ids, kind='stable')
+        self._sorted_ids = swarm.ids[self._order]
+
+        self.dtype = tick_dtype(len(swarm))
+        self.chunk_ticks = chunk_ticks or max(1, CHUNK_BYTES // self.dtype.itemsize)
+        self.ticks = 0
+        self.chunks = []
+        self._chunk = None
+        self._write_index()
+
+    def _slots(self, ids: np.ndarray) -> np.ndarray:
+        return self._order[np.searchsorted(self._sorted_ids, ids)]
+
+    def record(self, time: float, swarm: SwarmState):
+        """Writes the swarm's current state as the next tick."""
+        offset = self.ticks % self.chunk_ticks
+        if offset == 0:
+            self._open_chunk()
+        rec = self._chunk[offset]
+
+        slots = self._slots(swarm.ids)
+        rec['time'] = time
+        rec['alive'][:] = False
+        rec['alive'][slots] = True
+        rec['pos'][slots] = swarm.pos
+        rec['velocity'][slots] = swarm.velocity
+        rec['neutralized'][slots] = swarm.is_neutralized
+        rec['blink_timer'][slots] = swarm.blink_timer
+        targeting = swarm.target_id != -1
+        target = np.full(len(swarm), -1, dtype=np.int32)
+        known = np.isin(swarm.target_id, self._sorted_ids) & targeting
+        target[known] = self._slots(swarm.target_id[known])
+        rec['target'][slots] = target
+        self.ticks += 1
+
+    def _open_chunk(self):
+        self._close_chunk()
+        name = _chunk_name(len(self.chunks))
+        self._chunk = np.lib.format.open_memmap(
+            os.path.join(self.path, name), mode='w+', dtype=self.dtype, shape=(self.chunk_ticks,)
+        )
+        self.chunks.append(name)
+        self._write_index()
+
+    def _close_chunk(self):
+        if self._chunk is not None:
+            self._chunk.flush()
+            self._chunk = None
+
+    def _write_index(self):
+        with open(os.path.join(self.path, INDEX_FILE), 'w') as f:
+            json.dump({
+                'dt': self.dt,
+                'chunk_ticks': self.chunk_ticks,
+                'ticks': self.ticks,
+                'chunks': self.chunks,
+            }, f)
+
+    def close(self):
+        self._close_chunk()
+        self._write_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class Replay:
+    """Random access to a recording. Chunks are memory-mapped on first use; at most
+    MAPPED_CHUNKS stay mapped (least recently used first out)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = json.load(f)
+        self.dt = index['dt']
+        self.chunk_ticks = index['chunk_ticks']
+        self.ticks = index['ticks']
+        self._chunk_names = index['chunks']
+        self._chunks = OrderedDict() # chunk number -> mapped array, least recently used first
+        drones = np.load(os.path.join(path, DRONES_FILE))
+        self.ids = drones['id']
+        self.types = drones['type']
+
+    def __len__(self):
+        return self.ticks
+
+    def record(self, tick: int):
+        """The raw record (a read-only view into the mapped chunk) of `tick`."""
+        if not 0 <= tick < self.ticks:
+            raise IndexError(f"tick {tick} out of range (recording has {self.ticks})")
+        number, offset = divmod(tick, self.chunk_ticks)
+        chunk = self._chunks.get(number)
+        if chunk is None:
+            chunk = self._chunks[number] = np.load(
+                os.path.join(self.path, self._chunk_names[number]), mmap_mode='r'
+            )
+            while len(self._chunks) > MAPPED_CHUNKS:
+                self._chunks.popitem(last=False) # Unmapped once no returned view still uses it
+        else:
+            self._chunks.move_to_end(number)
+        return chunk[offset]
+
+    def time(self, tick: int) -> float:
+        return float(self.record(tick)['time'])
+
+    def state(self, tick: int) -> SwarmState:
+        """A SwarmState (arrays only, no Drone objects) holding the drones alive at `tick`."""
+        rec = self.record(tick)
+        rows = np.flatnonzero(rec['alive'])
+        state = SwarmState(rows.size)
+        state.ids[:] = self.ids[rows]
+        state.types[:] = self.types[rows]
+        state.pos[:] = rec['pos'][rows]
+        state.velocity[:] = rec['velocity'][rows]
+        state.is_neutralized[:] = rec['neutralized'][rows]
+        state.blink_timer[:] = rec['blink_timer'][rows]
+        target = rec['target'][rows]
+        state.target_id[:] = np.where(target >= 0, self.ids[np.maximum(target, 0)], -1)
+        return state
@@ -1,5 +1,7 @@
 # scenario_data.py (Member F)
 
+import numpy as np
+
 # Data format: (ID, POS_X, POS_Y, TYPE_STRING, [VEL_X, VEL_Y])
 
 # Scenario: 3 Friendlies (F) vs 2 Hostiles (H)
@@ -52,6 +54,50 @@ SCENARIO_C = [
 ]
 
 
+# ------------------------------------------------------------------
+# STOCHASTIC SCENARIOS (for Monte Carlo evaluation, see monte_carlo.py)
+# ------------------------------------------------------------------
+
+def random_field(seed, n_friendly=5, n_hostile=3,
+                 friendly_region=((-20.0, 20.0), (-20.0, 20.0)),
+                 hostile_region=((120.0, 180.0), (-60.0, 60.0)),
+                 hostile_speed=(10.0, 20.0),
+                 heading_jitter_deg=10.0,
+                 aim_point=(0.0, 0.0)):
+    """Random scenario as arrays: (friendly_pos, hostile_pos, hostile_vel).
+
+    Friendlies spawn at rest, uniformly inside friendly_region ((x_min, x_max), (y_min, y_max)).
+    Hostiles spawn uniformly inside hostile_region and fly towards aim_point at a speed drawn
+    uniformly from hostile_speed (low, high), with a heading error drawn uniformly from
+    +/- heading_jitter_deg. The same seed always yields the same scenario.
+    """
+    rng = np.random.default_rng(seed)
+
+    friendly_pos = np.column_stack([rng.uniform(*friendly_region[0], n_friendly),
+                                    rng.uniform(*friendly_region[1], n_friendly)])
+    hostile_pos = np.column_stack([rng.uniform(*hostile_region[0], n_hostile),
+                                   rng.uniform(*hostile_region[1], n_hostile)])
+
+    to_aim = np.asarray(aim_point, dtype=float) - hostile_pos
+    heading = np.arctan2(to_aim[:, 1], to_aim[:, 0])
+    heading += np.radians(rng.uniform(-heading_jitter_deg, heading_jitter_deg, n_hostile))
+    speed = rng.uniform(*hostile_speed, n_hostile)
+    hostile_vel = np.column_stack([np.cos(heading), np.sin(heading)]) * speed[:, None]
+    return friendly_pos, hostile_pos, hostile_vel
+
+
+def generate_scenario(seed, n_friendly=5, n_hostile=3, **params):
+    """random_field() in the same tuple format as the lists above (same parameters)."""
+    friendly_pos, hostile_pos, hostile_vel = random_field(seed, n_friendly, n_hostile, **params)
+
+    scenario = []
+    for i, (x, y) in enumerate(friendly_pos):
+        scenario.append((i + 1, float(x), float(y), 'FRIENDLY', [0.0, 0.0]))
+    for i, ((x, y), (vx, vy)) in enumerate(zip(hostile_pos, hostile_vel)):
+        scenario.append((n_friendly + i + 1, float(x), float(y), 'HOSTILE', [float(vx), float(vy)]))
+    return scenario
+
+
 # ------------------------------------------------------------------
 # CRITICAL CONTROL LINE: 
 INITIAL_DRONE_DATA = SCENARIO_C # <--- Select this line to run the test!
@@ -0,0 +1,257 @@
+# scenarios.py - Columnar scenarios: files, named scenarios and procedural generators
+#
+# A scenario is four columns, loaded straight into a SwarmState (no Drone objects):
+#   ids (N,)  types (N,) FRIENDLY / HOSTILE codes  pos (N, 2)  velocity (N, 2)
+#
+# Scenarios are picked by a spec string:
+#   'C', 'scenario_b', 'default'        the hand-written lists in scenario_data.py
+#   'runs/big.npz'                      np.savez file with arrays ids, types, pos, velocity
+#   'runs/big.csv'                      CSV with header id,x,y,type,vx,vy (type FRIENDLY / HOSTILE or 1 / 2)
+#   'waves:hostiles=5000,waves=4'       a generator from GENERATORS, with keyword arguments
+#
+# open_scenario() only parses the spec; the columns are read or generated on first use.
+#
+# Usage:
+#   sim = Simulation(load_scenario('formation:friendlies=2000,shape=ring'))
+#   python scenarios.py waves:hostiles=100000 --save big.npz
+
+import argparse
+import ast
+import os
+import re
+import time
+
+import numpy as np
+
+from swarm_state import SwarmState, FRIENDLY, HOSTILE
+from scenario_data import SCENARIO_A, SCENARIO_B, SCENARIO_C, INITIAL_DRONE_DATA, random_field
+
+NAMED = {
+    'a': SCENARIO_A,
+    'b': SCENARIO_B,
+    'c': SCENARIO_C,
+    'default': INITIAL_DRONE_DATA,
+}
+
+CSV_COLUMNS = ('id', 'x', 'y', 'type', 'vx', 'vy')
+
+
+def columns_of(friendly_pos, hostile_pos, hostile_vel):
+    """(ids, types, pos, velocity) with friendlies first (at rest), ids from 1."""
+    n_friendly, n_hostile = len(friendly_pos), len(hostile_pos)
+    count = n_friendly + n_hostile
+    types = np.full(count, HOSTILE, dtype=np.int8)
+    types[:n_friendly] = FRIENDLY
+    velocity = np.zeros((count, 2))
+    velocity[n_friendly:] = hostile_vel
+    return np.arange(1, count + 1, dtype=np.int64), types, np.vstack((friendly_pos, hostile_pos)), velocity
+
+
+def from_tuples(data: list):
+    """Columns of a scenario_data-style list of (ID, X, Y, TYPE_STRING, [VX, VY]) tuples."""
+    ids = np.array([d[0] for d in data], dtype=np.int64)
+    types = np.array([FRIENDLY if d[3] == 'FRIENDLY' else HOSTILE for d in data], dtype=np.int8)
+    pos = np.array([(d[1], d[2]) for d in data], dtype=float).reshape(-1, 2)
+    velocity = np.array([d[4] for d in data], dtype=float).reshape(-1, 2)
+    return ids, types, pos, velocity
+
+
+# --- Procedural generators (vectorized; each returns the four columns) ---
+
+def _formation_offsets(count: int, shape: str, spacing: float) -> np.ndarray:
+    k = np.arange(count)
+    if shape == 'grid':
+        side = int(np.ceil(np.sqrt(count)))
+        offsets = np.column_stack((k % side, k // side)) * spacing
+    elif shape == 'line':
+        offsets = np.column_stack((np.zeros(count), k * spacing))
+    elif shape == 'ring':
+        radius = max(count * spacing / (2 * np.pi), spacing)
+        angle = 2 * np.pi * k / max(count, 1)
+        return np.column_stack((np.cos(angle), np.sin(angle))) * radius
+    elif shape == 'wedge':
+        # Rows of 1, 2, 3, ... drones, apex pointing at the threat (+x)
+        row = np.floor((np.sqrt(8 * k + 1) - 1) / 2)
+        col = k - row * (row + 1) / 2
+        offsets = np.column_stack((-row, col - row / 2)) * spacing
+    else:
+        raise ValueError(f"unknown formation shape {shape!r} (grid, line, ring, wedge)")
+    return offsets - offsets.mean(axis=0)
+
+
+def formation(friendlies: int = 100, hostiles: int = 50, shape: str = 'grid', spacing: float = 10.0,
+              distance: float = 300.0, hostile_speed: float = 15.0, seed: int = 0):
+    """Friendlies in a formation (grid, line, ring, wedge) around the origin; hostiles in a
+    line abreast `distance` out on +x, flying at the origin with a little heading noise."""
+    rng = np.random.default_rng(seed)
+    friendly_pos = _formation_offsets(friendlies, shape, spacing)
+    width = max(hostiles * spacing, spacing)
+    hostile_pos = np.column_stack((
+        distance + rng.uniform(0.0, spacing, hostiles),
+        np.linspace(-width / 2, width / 2, hostiles),
+    ))
+    heading = np.arctan2(-hostile_pos[:, 1], -hostile_pos[:, 0]) + np.radians(rng.uniform(-3.0, 3.0, hostiles))
+    hostile_vel = np.column_stack((np.cos(heading), np.sin(heading))) * hostile_speed
+    return columns_of(friendly_pos, hostile_pos, hostile_vel)
+
+
+def waves(friendlies: int = 100, hostiles: int = 300, waves: int = 3, interval: float = 10.0,
+          distance: float = 250.0, speed=(10.0, 20.0), spread_deg: float = 30.0, seed: int = 0):
+    """Friendlies scattered over a disc; hostiles split into `waves` groups, each from a random
+    bearing, staggered so consecutive waves arrive about `interval` seconds apart."""
+    rng = np.random.default_rng(seed)
+    radius = 10.0 * np.sqrt(max(friendlies, 1))
+    r = radius * np.sqrt(rng.random(friendlies))
+    a = rng.uniform(0, 2 * np.pi, friendlies)
+    friendly_pos = np.column_stack((r * np.cos(a), r * np.sin(a)))
+
+    wave = np.arange(hostiles) * waves // max(hostiles, 1)
+    wave_bearing = rng.uniform(0, 2 * np.pi, waves)
+    bearing = wave_bearing[wave] + np.radians(rng.uniform(-spread_deg, spread_deg, hostiles))
+    hostile_speed = rng.uniform(*speed, hostiles)
+    # Start range: distance plus the ground the wave covers in its delay
+    start = radius + distance + hostile_speed * interval * wave + rng.uniform(0.0, 20.0, hostiles)
+    direction = np.column_stack((np.cos(bearing), np.sin(bearing)))
+    return columns_of(friendly_pos, direction * start[:, None], -direction * hostile_speed[:, None])
+
+
+def random_columns(friendlies: int = 5, hostiles: int = 3, seed: int = 0, **params):
+    """scenario_data.random_field (the Monte Carlo generator) as columns."""
+    return columns_of(*random_field(seed, friendlies, hostiles, **params))
+
+
+GENERATORS = {
+    'formation': formation,
+    'waves': waves,
+    'random': random_columns,
+}
+
+
+# --- Files ---
+
+def load_npz(path: str):
+    with np.load(path) as data:
+        return data['ids'], data['types'], data['pos'], data['velocity']
+
+
+def load_csv(path: str):
+    with open(path) as f:
+        header = [name.strip() for name in f.readline().split(',')]
+        missing = set(CSV_COLUMNS) - set(header)
+        if missing:
+            raise ValueError(f"{path}: missing CSV columns {sorted(missing)}")
+        dtype = [(name, 'U8' if name == 'type' else np.float64) for name in header]
+        table = np.atleast_1d(np.loadtxt(f, delimiter=',', dtype=dtype))
+    kind = np.char.upper(np.char.strip(table['type']))
+    types = np.where((kind == 'HOSTILE') | (kind == str(HOSTILE)), HOSTILE, FRIENDLY).astype(np.int8)
+    pos = np.column_stack((table['x'], table['y']))
+    velocity = np.column_stack((table['vx'], table['vy']))
+    return table['id'].astype(np.int64), types, pos, velocity
+
+
+def save_scenario(path: str, scenario):
+    """Writes a Scenario or SwarmState as .npz (default) or .csv, depending on the extension."""
+    if isinstance(scenario, SwarmState):
+        ids, types, pos, velocity = scenario.ids, scenario.types, scenario.pos, scenario.velocity
+    else:
+        ids, types, pos, velocity = scenario.columns
+    if path.endswith('.csv'):
+        table = np.empty(len(ids), dtype=[('id', np.int64), ('x', float), ('y', float),
+                                          ('type', 'U8'), ('vx', float), ('vy', float)])
+        table['id'], table['type'] = ids, np.where(types == HOSTILE, 'HOSTILE', 'FRIENDLY')
+        table['x'], table['y'] = pos[:, 0], pos[:, 1]
+        table['vx'], table['vy'] = velocity[:, 0], velocity[:, 1]
+        np.savetxt(path, table, fmt='%d,%.6f,%.6f,%s,%.6f,%.6f', header=','.join(CSV_COLUMNS), comments='')
+    else:
+        np.savez(path, ids=ids, types=types, pos=pos, velocity=velocity)
+
+
+# --- Specs ---
+
+def _parse_value(text: str):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text # Bare words, e.g. shape=ring
+
+
+def parse_spec(spec: str) -> tuple:
+    """'name:key=value,key=value' -> (name, {key: value}). Values are Python literals
+    (tuples included) or bare words."""
+    name, _, args = spec.partition(':')
+    params = {}
+    for item in re.split(r',(?=\s*\w+\s*=)', args) if args else []:
+        key, _, value = item.partition('=')
+        params[key.strip()] = _parse_value(value.strip())
+    return name, params
+
+
+class Scenario:
+    """A scenario source whose columns are loaded or generated on first access."""
+
+    def __init__(self, name: str, build):
+        self.name = name
+        self._build = build
+        self._columns = None
+
+    @property
+    def columns(self) -> tuple:
+        """(ids, types, pos, velocity), built once."""
+        if self._columns is None:
+            self._columns = self._build()
+        return self._columns
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def state(self) -> SwarmState:
+        """A fresh arrays-only SwarmState (every call starts from the initial columns)."""
+        return SwarmState.from_arrays(*self.columns)
+
+    def __repr__(self):
+        return f"Scenario({self.name!r})"
+
+
+def open_scenario(spec: str) -> Scenario:
+    """Parses a scenario spec (name, .npz / .csv path or generator:key=value,...); nothing is loaded yet."""
+    name, params = parse_spec(spec)
+    if name in GENERATORS:
+        generator = GENERATORS[name]
+        return Scenario(spec, lambda: generator(**params))
+    if spec.endswith('.npz'):
+        return Scenario(spec, lambda: load_npz(spec))
+    if spec.endswith('.csv'):
+        return Scenario(spec, lambda: load_csv(spec))
+    data = NAMED.get(spec.lower().removeprefix('scenario_'))
+    if data is None:
+        if os.path.exists(spec):
+            raise ValueError(f"unsupported scenario file {spec!r} (use .npz or .csv)")
+        raise ValueError(
+            f"unknown scenario {spec!r}: use one of {sorted(NAMED)}, a .npz / .csv path "
+            f"or a generator ({', '.join(GENERATORS)}) as name:key=value,..."
+        )
+    return Scenario(spec, lambda: from_tuples(data))
+
+
+def load_scenario(spec: str) -> SwarmState:
+    """open_scenario(spec).state()"""
+    return open_scenario(spec).state()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect, generate or convert scenarios.")
+    parser.add_argument('spec', help="Scenario name, .npz / .csv path or generator:key=value,...")
+    parser.add_argument('--save', metavar='PATH', help="Write the scenario to PATH (.npz or .csv)")
+    args = parser.parse_args()
+
+    scenario = open_scenario(args.spec)
+    start = time.perf_counter()
+    ids, types, pos, _ = scenario.columns
+    elapsed = time.perf_counter() - start
+    print(f"{scenario.name}: {np.count_nonzero(types == FRIENDLY)} friendlies, "
+          f"{np.count_nonzero(types == HOSTILE)} hostiles, loaded in {elapsed * 1e3:.1f} ms")
+    if len(ids):
+        print(f"extent x [{pos[:, 0].min():.0f}, {pos[:, 0].max():.0f}]  y [{pos[:, 1].min():.0f}, {pos[:, 1].max():.0f}]")
+    if args.save:
+        save_scenario(args.save, scenario)
+        print(f"Saved to {args.save}")
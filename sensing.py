@@ -1,6 +1,38 @@
 import numpy as np
 from drone import Drone, DroneType
 from constants import R_SENSE, R_THREAT
+from spatial_index import DroneIndex
+
+# --- SPATIAL INDEX ---
+# Rebuilt once per tick by the master loop. The functions below reuse it while it
+# still matches the list they are handed (same list, nobody moved) and rebuild it
+# otherwise, so callers that never build one still get indexed queries. "Nobody
+# moved" is a move-counter compare (DroneIndex.covers), so a per-drone loop of
+# queries stays near-linear.
+_spatial_index = None
+_friendly_index = None # Over a caller's own friendly list (get_closest_friendly_to_hostile)
+
+def update_spatial_index(all_drones: list, positions=None, is_friendly=None) -> DroneIndex:
+    """(Re)builds the shared index over `all_drones`. Call after positions change.
+    `positions` / `is_friendly` may be passed in (e.g. from a SwarmState) to skip
+    reading them drone by drone."""
+    global _spatial_index
+    _spatial_index = DroneIndex(all_drones, positions, is_friendly)
+    return _spatial_index
+
+def clear_spatial_index():
+    global _spatial_index, _friendly_index
+    _spatial_index = None
+    _friendly_index = None
+
+def _index_for(all_drones: list) -> DroneIndex:
+    """The shared index if it is still valid for `all_drones`, else a fresh one."""
+    if _spatial_index is None or not _spatial_index.covers(all_drones):
+        update_spatial_index(all_drones)
+    return _spatial_index
+
+def _positions_of(drones: list) -> np.ndarray:
+    return np.array([d.pos for d in drones], dtype=float).reshape(-1, 2)
 
 def get_local_view(current_drone: Drone, all_drones: list) -> dict:
     """
@@ -9,19 +41,16 @@ def get_local_view(current_drone: Drone, all_drones: list) -> dict:
     """
     local_view = {'friendlies': [], 'hostiles': []}
 
-    for drone in all_drones:
+    # Only drones in the cells around us can be within R_SENSE
+    for i in _index_for(all_drones).grid.query_radius(current_drone.pos, R_SENSE):
+        drone = all_drones[i]
         # A drone can always see itself, but we skip it for interaction purposes
         if drone.id == current_drone.id:
             continue
-
-        distance = current_drone.distance_to(drone)
-
-        # Only include drones within sensor range
-        if distance < R_SENSE:
-            if drone.is_hostile():
-                local_view['hostiles'].append(drone)
-            else:
-                local_view['friendlies'].append(drone)
+        if drone.is_hostile():
+            local_view['hostiles'].append(drone)
+        else:
+            local_view['friendlies'].append(drone)
 
     return local_view
 
@@ -41,11 +70,10 @@ def is_unattended(hostile_drone: Drone, local_view: dict) -> bool:
     # Find the closest friendly drone (excluding the hostile itself)
     closest_friendly_distance = float('inf')
     
-    # Check all *friendly* drones in the local view
-    for friendly in local_view['friendlies']:
-        dist = friendly.distance_to(hostile_drone)
-        if dist < closest_friendly_distance:
-            closest_friendly_distance = dist
+    # Check all *friendly* drones in the local view (one vectorized distance pass)
+    if local_view['friendlies']:
+        offsets = _positions_of(local_view['friendlies']) - hostile_drone.pos
+        closest_friendly_distance = float(np.sqrt(np.einsum('ij,ij->i', offsets, offsets)).min())
             
     # Check the current drone's distance as well
     if current_drone_id != -1: # Assuming current_drone is one of the friendlies in the loop
@@ -74,18 +102,22 @@ def get_closest_friendly_to_hostile(hostile_drone, all_friendlies: list, exclude
     Finds the friendly drone closest to the given hostile.
     Returns (closest_friendly_drone, distance).
     """
-    closest_friendly = None
-    min_dist = float('inf')
+    global _friendly_index
+    if not all_friendlies:
+        return None, float('inf')
 
-    for friendly in all_friendlies:
-        if friendly.id == exclude_drone_id:
-            continue
+    if _spatial_index is not None and all_friendlies is _spatial_index.friendlies \
+            and _spatial_index.covers(_spatial_index.drones):
+        index = _spatial_index
+    else:
+        # The caller's own list: every entry counts as a candidate, whatever its type
+        if _friendly_index is None or not _friendly_index.covers(all_friendlies):
+            _friendly_index = DroneIndex(all_friendlies, is_friendly=np.ones(len(all_friendlies), dtype=bool))
+        index = _friendly_index
 
-        dist = friendly.distance_to(hostile_drone)
-        if dist < min_dist:
-            min_dist = dist
-            closest_friendly = friendly
-            
-    return closest_friendly, min_dist
+    # Ring search outwards from the hostile's cell on the friendly-only grid
+    exclude = index.friendly_slot.get(exclude_drone_id, -1)
+    i, min_dist = index.friendly_grid.nearest(hostile_drone.pos, exclude=exclude)
+    return (all_friendlies[i] if i != -1 else None), min_dist
 
 # NOTE: This function's output will be crucial for B's decision-making.
\ No newline at end of file
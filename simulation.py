@@ -0,0 +1,308 @@
+# simulation.py - Headless simulation engine (no pygame import)
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from constants import DELTA_TIME, R_SENSE
+from scenario_data import INITIAL_DRONE_DATA
+from drone import Drone, DroneType
+from swarm_state import SwarmState
+from sensing import update_spatial_index
+from coordination import get_move_vectors
+from physics import update_physics, adaptive_step, MAX_ADAPTIVE_STEP
+from assignment import TargetAssigner
+from profiling import Profiler
+from hostile_policies import HostilePolicy, nearest_per_query
+from tuning import Tuning, DEFAULT_TUNING
+from events import EventLog, ENGAGEMENT, LOSS, CLAIM, SCENARIO_END
+
+# Safety cap for run(): hostiles that fly past the swarm would otherwise never end a run
+DEFAULT_MAX_TIME = 300.0
+
+
+def build_drones(scenario_data: list) -> list:
+    """Converts raw scenario tuples (ID, X, Y, TYPE_STRING, [VX, VY]) into Drone objects."""
+    drones = []
+    for data in scenario_data:
+        d_type = DroneType.FRIENDLY if data[3] == 'FRIENDLY' else DroneType.HOSTILE
+        drones.append(Drone(id=data[0], pos=[data[1], data[2]], velocity=data[4], type=d_type))
+    return drones
+
+
+@dataclass
+class SimulationResult:
+    """End-of-run summary returned by Simulation.run()."""
+    cleared: bool                # Every hostile was neutralized
+    time_to_clear: float         # Sim time of the last neutralization (None if not cleared)
+    friendly_losses: int
+    hostiles_neutralized: int
+    leaked_hostiles: int         # Hostiles still flying when the run ended
+    ticks: int
+    sim_time: float
+
+
+class Simulation:
+    """Headless engagement simulation: sensing -> coordination -> physics, one tick per step().
+
+    Runs as fast as the CPU allows; frontends (see master_loop.py) only read
+    `drones` / `swarm` and call step() at their own pace. Pass an enabled
+    Profiler to time the phases of each tick.
+
+    With `adaptive`, a tick may cover several `dt` (up to MAX_ADAPTIVE_STEP)
+    while no hostile can reach R_THREAT of a friendly; ticks near an
+    engagement stay at `dt`. Interception is swept, so long steps cannot skip one.
+
+    `policy` (see hostile_policies.py) steers the hostiles every tick; without
+    one they fly in straight lines. `tuning` (see tuning.py) holds the
+    coordination ranges and weights. `metrics` (an EngagementMetrics, see
+    metrics.py) is updated every tick. `events` (an EventLog, see events.py)
+    receives engagements, losses, target changes and the end of the run.
+    """
+
+    def __init__(self, scenario=INITIAL_DRONE_DATA, dt: float = DELTA_TIME, profiler: Profiler = None,
+                 adaptive: bool = False, max_step: float = MAX_ADAPTIVE_STEP, policy: HostilePolicy = None,
+                 tuning: Tuning = None, metrics=None, events: EventLog = None):
+        if isinstance(scenario, SwarmState):
+            self.swarm = scenario
+        else:
+            self.swarm = SwarmState.from_drones(build_drones(scenario))
+        self.dt = dt
+        self.adaptive = adaptive
+        self.max_step = max_step
+        self.policy = policy
+        self.tuning = tuning or DEFAULT_TUNING
+        self.metrics = metrics
+        self.events = events
+        self.last_dt = dt # Length of the last step (varies when adaptive)
+        self.assigner = TargetAssigner() # Target assignment, warm-started tick to tick
+        self.profiler = profiler or Profiler(enabled=False)
+        self.time = 0.0
+        self.ticks = 0
+        self.finished = False
+        self.end_logged = False
+
+        self.initial_friendlies = int(np.count_nonzero(self.swarm.friendly_mask()))
+        self.initial_hostiles = int(np.count_nonzero(self.swarm.hostile_mask() & ~self.swarm.is_neutralized))
+        self.friendly_losses = 0
+        self.hostiles_neutralized = 0
+        self.last_neutralization_time = None
+
+    @property
+    def drones(self) -> list:
+        """Drone views over the current swarm rows (kept in sync in place)."""
+        return self.swarm.drones
+
+    def live_counts(self):
+        """Returns (live friendlies, live hostiles)."""
+        live = ~self.swarm.is_neutralized
+        return (
+            int(np.count_nonzero(self.swarm.friendly_mask() & live)),
+            int(np.count_nonzero(self.swarm.hostile_mask() & live)),
+        )
+
+    def coordinate(self, index, dt: float) -> np.ndarray:
+        """Coordination phase: returns every row's new velocity (and sets target_id).
+        Subclasses replace it to change how friendlies decide (see agents.py)."""
+        return get_move_vectors(self.swarm, index.grid, self.assigner, dt, self.tuning)
+
+    def steer_hostiles(self, dt: float):
+        """Applies the hostile policy to every live hostile (one batched call)."""
+        swarm = self.swarm
+        hostile = swarm.live_hostiles()
+        distance = None
+        if self.policy.needs_friendlies:
+            i, _, _, pair_distance = swarm.pair_cache().pairs(hostile, swarm.live_friendlies(), self.policy.friendly_range)
+            distance = nearest_per_query(i, pair_distance, hostile.size)
+        swarm.velocity[hostile] = self.policy.steer(
+            swarm.pos[hostile], swarm.velocity[hostile], swarm.ids[hostile], self.time, dt, distance
+        )
+
+    def step(self) -> list:
+        """Advances one tick. Returns that tick's engagements as (hostile_id, friendly_id)."""
+        if self.finished:
+            return []
+
+        # End condition: no hostile left (neutralized ones are removed once they stop blinking)
+        if not np.any(self.swarm.hostile_mask()):
+            self.finished = True
+            self.log_end()
+            return []
+
+        # 1. Perception index (once per tick) + batched coordination for all friendlies
+        profiler = self.profiler
+        swarm = self.swarm
+        count = len(swarm)
+        dt = self.dt
+        # The tick's pair cache (every pair within R_SENSE) is built here and shared by
+        # every stage below until physics moves the drones
+        with profiler.phase('spatial_index', count):
+            index = update_spatial_index(swarm.drones, swarm.pos, swarm.friendly_mask())
+            pairs = swarm.pair_cache(R_SENSE, index.grid)
+        if self.adaptive:
+            with profiler.phase('adaptive_step', count):
+                hostile = swarm.live_hostiles()
+                friendly = swarm.live_friendlies()
+                dt = adaptive_step(swarm.pos[hostile], swarm.velocity[hostile], swarm.pos[friendly],
+                                   self.dt, self.max_step,
+                                   distances=lambda radius: pairs.pairs(hostile, friendly, radius)[3],
+                                   threat_range=self.tuning.r_threat)
+        events = self.events
+        claims = events is not None and events.wants(CLAIM)
+        if claims:
+            previous_targets = swarm.target_id.copy()
+        with profiler.phase('coordination', count):
+            swarm.velocity[:] = self.coordinate(index, dt)
+        if claims:
+            friendly = swarm.live_friendlies()
+            changed = friendly[swarm.target_id[friendly] != previous_targets[friendly]]
+            events.emit_many(CLAIM, self.time, self.ticks, swarm.ids[changed], swarm.target_id[changed],
+                             previous_targets[changed])
+        if self.policy is not None:
+            with profiler.phase('hostiles', count):
+                self.steer_hostiles(dt)
+        if self.metrics is not None:
+            with profiler.phase('metrics', count):
+                self.metrics.observe(swarm, self.time, dt, self.tuning.r_threat)
+
+        # 2. Physics & engagement
+        with profiler.phase('physics', count):
+            engagements = update_physics(swarm, dt)
+        profiler.end_tick()
+        self.ticks += 1
+        self.time += dt
+        self.last_dt = dt
+        if self.metrics is not None:
+            self.metrics.record(engagements, self.time)
+
+        if engagements:
+            self.hostiles_neutralized += len(engagements)
+            self.friendly_losses += len(engagements)
+            self.last_neutralization_time = self.time
+            if events is not None:
+                hostile_ids, friendly_ids = np.array(engagements).T
+                events.emit_many(ENGAGEMENT, self.time, self.ticks, hostile_ids, friendly_ids)
+                events.emit_many(LOSS, self.time, self.ticks, friendly_ids, hostile_ids)
+        return engagements
+
+    def run(self, until=None, max_time: float = DEFAULT_MAX_TIME) -> SimulationResult:
+        """Steps until the run is decided and returns the result.
+
+        `until` is either a sim time (seconds) or a callable(sim) -> bool that
+        stops the run when it returns True. Without it the run ends when all
+        hostiles are gone, when no friendly is left, or at `max_time`.
+        """
+        if until is None:
+            stop = lambda sim: False
+        elif callable(until):
+            stop = until
+        else:
+            stop = lambda sim: sim.time >= until
+
+        while not self.decided(max_time) and not stop(self):
+            self.step()
+
+        return self.result()
+
+    def decided(self, max_time: float = DEFAULT_MAX_TIME) -> bool:
+        """True once the run is over: no hostile left, nothing left to intercept with, or out of time."""
+        if self.finished or self.time >= max_time:
+            self.log_end()
+            return True
+        friendlies, hostiles = self.live_counts()
+        if friendlies == 0 and hostiles > 0:
+            self.log_end()
+            return True
+        return False
+
+    def log_end(self):
+        """Emits the scenario_end event (once) with the run's result."""
+        if self.events is None or self.end_logged:
+            return
+        self.end_logged = True
+        result = self.result()
+        self.events.emit(SCENARIO_END, self.time, self.ticks, result.friendly_losses, result.hostiles_neutralized,
+                         result.leaked_hostiles, np.nan if result.time_to_clear is None else result.time_to_clear)
+
+    def result(self) -> SimulationResult:
+        _, hostiles = self.live_counts()
+        cleared = hostiles == 0
+        return SimulationResult(
+            cleared=cleared,
+            time_to_clear=(self.last_neutralization_time or 0.0) if cleared else None,
+            friendly_losses=self.friendly_losses,
+            hostiles_neutralized=self.hostiles_neutralized,
+            leaked_hostiles=hostiles,
+            ticks=self.ticks,
+            sim_time=self.time,
+        )
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One tick of a simulate() stream.
+
+    The arrays are read-only views of the live state, not copies: they are
+    only guaranteed to hold this tick's values until the generator is resumed.
+    Copy what needs to outlive the next iteration.
+    """
+    tick: int
+    time: float
+    ids: np.ndarray
+    types: np.ndarray
+    pos: np.ndarray
+    velocity: np.ndarray
+    target_id: np.ndarray
+    is_neutralized: np.ndarray
+    events: list                 # (hostile_id, friendly_id) engagements since the previous snapshot
+    finished: bool               # Last snapshot of the run
+
+    @classmethod
+    def of(cls, sim: Simulation, events: list, finished: bool = False):
+        swarm = sim.swarm
+        return cls(
+            tick=sim.ticks,
+            time=sim.time,
+            ids=_read_only(swarm.ids),
+            types=_read_only(swarm.types),
+            pos=_read_only(swarm.pos),
+            velocity=_read_only(swarm.velocity),
+            target_id=_read_only(swarm.target_id),
+            is_neutralized=_read_only(swarm.is_neutralized),
+            events=events,
+            finished=finished,
+        )
+
+
+def simulate(scenario=INITIAL_DRONE_DATA, every: int = 1, max_time: float = DEFAULT_MAX_TIME,
+             dt: float = DELTA_TIME, sim: Simulation = None, adaptive: bool = False):
+    """Runs a simulation as a stream: yields a Snapshot of the initial state and
+    then one every `every` ticks, plus a final one when the run is decided.
+
+    The simulation only advances when the consumer asks for the next snapshot,
+    so a slow consumer throttles it and breaking out of the loop stops it.
+    Memory stays constant however long the run is. Pass `sim` to stream an
+    existing Simulation instead of building one from `scenario`.
+    """
+    if every < 1:
+        raise ValueError("every must be >= 1")
+    sim = sim or Simulation(scenario, dt, adaptive=adaptive)
+    yield Snapshot.of(sim, [])
+
+    events = []
+    since_snapshot = 0
+    while not sim.decided(max_time):
+        events.extend(sim.step())
+        since_snapshot += 1
+        if since_snapshot == every:
+            yield Snapshot.of(sim, events)
+            events = []
+            since_snapshot = 0
+
+    yield Snapshot.of(sim, events, finished=True)
@@ -0,0 +1,340 @@
+import numpy as np
+import drone
+from constants import R_SENSE
+
+# --- UNIFORM GRID ---
+
+class UniformGrid:
+    """Uniform bucket grid over a fixed set of 2D points.
+
+    Points are sorted by cell key (column-major: key = cx * ny + cy), so every
+    vertical run of cells is one contiguous slice of `order`. Build cost is one
+    argsort; radius queries only touch the cells overlapping the query circle.
+    The grid holds a reference to `positions`: rebuild it after they change.
+    """
+
+    def __init__(self, positions: np.ndarray, cell_size: float = R_SENSE):
+        self.positions = positions
+        self.cell_size = float(cell_size)
+        self.size = len(positions)
+
+        if self.size:
+            cells = np.floor(positions / self.cell_size).astype(np.int64)
+            self._origin = cells.min(axis=0)
+            cells -= self._origin
+            self._nx, self._ny = cells.max(axis=0) + 1
+        else:
+            cells = np.zeros((0, 2), dtype=np.int64)
+            self._origin = np.zeros(2, dtype=np.int64)
+            self._nx = self._ny = 0
+
+        keys = cells[:, 0] * self._ny + cells[:, 1]
+        self.order = np.argsort(keys, kind='stable')
+        self._sorted_keys = keys[self.order]
+
+    def _cells_of(self, points):
+        return np.floor(np.asarray(points) / self.cell_size).astype(np.int64) - self._origin
+
+    def _column_ranges(self, cx, cy, reach):
+        """For each query cell (cx, cy) yields (query_mask, lo, hi): the slice of
+        `order` covering cells (cx + dx, cy - reach .. cy + reach), one dx at a time."""
+        cy_lo = np.clip(cy - reach, 0, self._ny - 1)
+        cy_hi = np.clip(cy + reach, 0, self._ny - 1)
+        rows_ok = (cy + reach >= 0) & (cy - reach <= self._ny - 1)
+        for dx in range(-reach, reach + 1):
+            col = cx + dx
+            valid = rows_ok & (col >= 0) & (col < self._nx)
+            lo = np.searchsorted(self._sorted_keys, col * self._ny + cy_lo, side='left')
+            hi = np.searchsorted(self._sorted_keys, col * self._ny + cy_hi, side='right')
+            yield valid, lo, hi
+
+    # --- Queries ---
+
+    def query_radius(self, point, radius: float) -> np.ndarray:
+        """Indices (ascending) of all points strictly closer than `radius` to `point`."""
+        if self.size == 0:
+            return np.zeros(0, dtype=np.intp)
+        cx, cy = self._cells_of(point)
+        reach = int(np.ceil(radius / self.cell_size))
+        chunks = [
+            self.order[lo:hi]
+            for valid, lo, hi in self._column_ranges(cx, cy, reach) if valid
+        ]
+        candidates = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.intp)
+        offsets = self.positions[candidates] - point
+        distances = np.sqrt(np.einsum('ij,ij->i', offsets, offsets))
+        return np.sort(candidates[distances < radius])
+
+    def pairs_within(self, query_points: np.ndarray, radius: float):
+        """All (query i, grid point j) pairs with |query_points[i] - positions[j]| < radius.
+
+        Returns (i, j, offset, distance) with offset = query_points[i] - positions[j],
+        sorted by i, then j. Work is proportional to the points in neighbouring cells,
+        not to len(query_points) * len(positions).
+        """
+        empty = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros((0, 2)), np.zeros(0))
+        if self.size == 0 or len(query_points) == 0:
+            return empty
+
+        cells = self._cells_of(query_points)
+        reach = int(np.ceil(radius / self.cell_size))
+        i_parts, j_parts = [], []
+        for valid, lo, hi in self._column_ranges(cells[:, 0], cells[:, 1], reach):
+            counts = np.where(valid, hi - lo, 0)
+            total = counts.sum()
+            if total == 0:
+                continue
+            # Expand each query's [lo, hi) slice into one entry per candidate
+            query_idx = np.repeat(np.arange(len(query_points)), counts)
+            run_start = np.repeat(np.cumsum(counts) - counts, counts)
+            sorted_pos = np.repeat(lo, counts) + (np.arange(total) - run_start)
+            i_parts.append(query_idx)
+            j_parts.append(self.order[sorted_pos])
+        if not i_parts:
+            return empty
+
+        i = np.concatenate(i_parts)
+        j = np.concatenate(j_parts)
+        offsets = query_points[i] - self.positions[j]
+        distances = np.sqrt(np.einsum('ij,ij->i', offsets, offsets))
+        within = distances < radius
+        i, j, offsets, distances = i[within], j[within], offsets[within], distances[within]
+
+        order = np.lexsort((j, i))
+        return i[order], j[order], offsets[order], distances[order]
+
+    def nearest(self, point, exclude: int = -1):
+        """Returns (index, distance) of the point closest to `point` (lowest index on ties),
+        skipping index `exclude`. Returns (-1, inf) if there is no candidate."""
+        if self.size == 0:
+            return -1, float('inf')
+        cx, cy = self._cells_of(point)
+        # Reach at which the searched square covers the whole grid
+        max_reach = int(max(abs(cx), abs(cx - (self._nx - 1)), abs(cy), abs(cy - (self._ny - 1))))
+        best_idx, best_dist = -1, float('inf')
+        for reach in range(max_reach + 1):
+            chunks = [
+                self.order[lo:hi]
+                for valid, lo, hi in self._column_ranges(cx, cy, reach) if valid
+            ]
+            candidates = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.intp)
+            candidates = candidates[candidates != exclude]
+            if candidates.size:
+                offsets = self.positions[candidates] - point
+                distances = np.sqrt(np.einsum('ij,ij->i', offsets, offsets))
+                best = np.flatnonzero(distances == distances.min())
+                k = best[np.argmin(candidates[best])]
+                best_idx, best_dist = int(candidates[k]), float(distances[k])
+            # Anything outside the searched square is at least reach * cell_size away
+            if best_idx != -1 and best_dist <= reach * self.cell_size:
+                break
+        return best_idx, best_dist
+
+
+# --- PER-TICK PAIR CACHE ---
+
+DENSE_PAIRS_LIMIT = 640 # Up to this many points, blocked brute force beats the grid
+DENSE_BLOCK = 256       # Rows per block of the brute-force distance matrix
+
+
+class PairCache:
+    """Every (anchor, point) pair closer than `radius`, computed once for one set of positions.
+
+    Anchors are the rows whose neighbourhoods the tick needs (all rows by
+    default; the live friendlies for a SwarmState). Pairs come from blocked
+    dense distance matrices for small swarms and from one grid query for
+    large ones, and are stored sparsely as (p, q, offset = pos[p] - pos[q],
+    distance) sorted by p, then q, self-pairs included. pairs() answers the
+    narrower queries of the tick's stages from them: anchors against any
+    rows directly, any rows against anchors by transposing. Each distinct
+    row selection is worked out once; other radii are then a single mask.
+
+    The cache keeps a copy of the positions it was built from; valid_for()
+    tells whether they are still current (any in-place move invalidates it).
+    """
+
+    def __init__(self, positions: np.ndarray, radius: float = R_SENSE, anchors: np.ndarray = None,
+                 grid: UniformGrid = None):
+        self.radius = float(radius)
+        self._positions = positions.copy()
+        count = len(positions)
+        self.anchors = np.arange(count) if anchors is None else anchors
+        self._is_anchor = np.zeros(count, dtype=bool)
+        self._is_anchor[self.anchors] = True
+        self._selections = {}
+
+        anchor_pos = positions[self.anchors]
+        if count <= DENSE_PAIRS_LIMIT:
+            p_parts, q_parts, o_parts, d_parts = [], [], [], []
+            for start in range(0, len(anchor_pos), DENSE_BLOCK):
+                offsets = anchor_pos[start:start + DENSE_BLOCK, None, :] - positions[None, :, :]
+                distances = np.sqrt(np.einsum('ijk,ijk->ij', offsets, offsets))
+                p, q = np.nonzero(distances < self.radius)
+                p_parts.append(p + start)
+                q_parts.append(q)
+                o_parts.append(offsets[p, q])
+                d_parts.append(distances[p, q])
+            if p_parts:
+                p, self.q = np.concatenate(p_parts), np.concatenate(q_parts)
+                self.offset, self.distance = np.concatenate(o_parts), np.concatenate(d_parts)
+            else:
+                p = self.q = np.zeros(0, dtype=np.intp)
+                self.offset, self.distance = np.zeros((0, 2)), np.zeros(0)
+        else:
+            if grid is None or grid.positions is not positions or grid.cell_size < self.radius:
+                grid = UniformGrid(positions, self.radius)
+            p, self.q, self.offset, self.distance = grid.pairs_within(anchor_pos, self.radius)
+        self.p = self.anchors[p]
+
+    def valid_for(self, positions: np.ndarray, anchors: np.ndarray = None) -> bool:
+        if positions.shape != self._positions.shape or not np.array_equal(positions, self._positions):
+            return False
+        return anchors is None or np.array_equal(anchors, self.anchors)
+
+    def _select(self, query_rows, data_rows):
+        """(i, j, offset, distance) at the full radius for one row selection (memoized)."""
+        key = (None if query_rows is None else query_rows.tobytes(),
+               None if data_rows is None else data_rows.tobytes())
+        selection = self._selections.get(key)
+        if selection is not None:
+            return selection
+
+        count = len(self._positions)
+        def slots(rows):
+            slot = np.full(count, -1, dtype=np.intp)
+            slot[rows] = np.arange(len(rows))
+            return slot
+
+        if query_rows is None or self._is_anchor[query_rows].all():
+            # Anchors against data rows: already sorted by query, then data row
+            i, j, offset = self.p, self.q, self.offset
+            keep = np.ones(i.size, dtype=bool)
+            if query_rows is not None:
+                i = slots(query_rows)[i]
+                keep &= i >= 0
+            if data_rows is not None:
+                j = slots(data_rows)[j]
+                keep &= j >= 0
+            selection = i[keep], j[keep], offset[keep], self.distance[keep]
+        else:
+            # Query rows against anchors: the transposed pairs, re-sorted by query
+            i, j = slots(query_rows)[self.q], slots(data_rows)[self.p]
+            keep = (i >= 0) & (j >= 0)
+            i, j = i[keep], j[keep]
+            order = np.lexsort((j, i))
+            selection = i[order], j[order], -self.offset[keep][order], self.distance[keep][order]
+        self._selections[key] = selection
+        return selection
+
+    def pairs(self, query_rows: np.ndarray = None, data_rows: np.ndarray = None, radius: float = None):
+        """Same result as UniformGrid(pos[data_rows]).pairs_within(pos[query_rows], radius):
+        (i, j, offset, distance) with i / j indexing into query_rows / data_rows (None = all
+        rows; otherwise ascending), sorted by i, then j. One side must be made of anchors;
+        other queries, and radii beyond the cache's, fall back to a direct grid query."""
+        radius = self.radius if radius is None else radius
+        data_anchored = data_rows is not None and self._is_anchor[data_rows].all()
+        query_anchored = query_rows is None and len(self.anchors) == len(self._positions) or (
+            query_rows is not None and self._is_anchor[query_rows].all())
+        if radius > self.radius or not (query_anchored or data_anchored):
+            positions = self._positions
+            query = positions if query_rows is None else positions[query_rows]
+            data = positions if data_rows is None else positions[data_rows]
+            return UniformGrid(data, radius).pairs_within(query, radius)
+
+        i, j, offset, distance = self._select(query_rows, data_rows)
+        if radius < self.radius:
+            keep = distance < radius
+            return i[keep], j[keep], offset[keep], distance[keep]
+        return i, j, offset, distance
+
+
+# --- DRONE INDEX (what sensing.py queries) ---
+
+class DroneIndex:
+    """Per-tick index over one list of drones: a grid over all of them plus a
+    grid over the friendly subset (exposed as `friendlies`, in list order).
+
+    The index keeps a snapshot of the positions it was built from and the
+    move counter of the drones' storage (SwarmState.version, or
+    drone.standalone_moves() for drones without a state). covers() compares
+    the counter, so checking an index before every query is O(1) and an index
+    is never reused after the drones moved; lists that mix storages fall back
+    to comparing every position."""
+
+    def __init__(self, drones: list, positions: np.ndarray = None, is_friendly: np.ndarray = None,
+                 cell_size: float = R_SENSE):
+        self.drones = drones
+        self.size = len(drones)
+        self._bind_rows(drones)
+        if positions is None:
+            positions = self.current_positions()
+        if is_friendly is None:
+            is_friendly = np.fromiter((not d.is_hostile() for d in drones), dtype=bool, count=self.size)
+        self.positions = np.array(positions, dtype=float).reshape(-1, 2) # Snapshot (callers pass live arrays)
+        self.grid = UniformGrid(self.positions, cell_size)
+        self.friendly_rows = np.flatnonzero(is_friendly)
+        self._cell_size = cell_size
+        self._friendly_grid = None
+        self._friendlies = None
+        self._friendly_slot = None
+
+    # The friendly-only views are built on first use: the batched tick only needs `grid`
+
+    @property
+    def friendly_grid(self) -> UniformGrid:
+        if self._friendly_grid is None:
+            self._friendly_grid = UniformGrid(self.positions[self.friendly_rows], self._cell_size)
+        return self._friendly_grid
+
+    @property
+    def friendlies(self) -> list:
+        if self._friendlies is None:
+            self._friendlies = [self.drones[i] for i in self.friendly_rows]
+        return self._friendlies
+
+    @property
+    def friendly_slot(self) -> dict:
+        if self._friendly_slot is None:
+            self._friendly_slot = {d.id: k for k, d in enumerate(self.friendlies)}
+        return self._friendly_slot
+
+    def _bind_rows(self, drones: list):
+        """When every drone lives in one SwarmState, remembers its rows there so the current
+        positions are one gather instead of a walk over the drones."""
+        state = drones[0]._state if drones else None
+        self._state, self._state_pos, self._rows = None, None, None
+        self._standalone = state is None and all(d._state is None for d in drones)
+        if state is None:
+            self._version = self._moves()
+            return
+        if drones is state.drones:
+            rows = None
+        else:
+            rows = np.fromiter((d._slot if d._state is state else -1 for d in drones), dtype=np.intp, count=len(drones))
+            if (rows < 0).any():
+                return
+        self._state, self._state_pos, self._rows = state, state.pos, rows
+        self._version = self._moves()
+
+    def _moves(self):
+        """Move counter of the drones' storage, or None if there is no single one to ask."""
+        if self._state is not None:
+            return self._state.version if self._state.pos is self._state_pos else None
+        return drone.standalone_moves() if self._standalone else None
+
+    def current_positions(self) -> np.ndarray:
+        """Where the indexed drones are now."""
+        state = self._state
+        if state is not None and state.pos is self._state_pos: # Rows are only valid until the state is compacted
+            return state.pos if self._rows is None else state.pos[self._rows]
+        return np.array([d.pos for d in self.drones], dtype=float).reshape(-1, 2)
+
+    def covers(self, drones: list) -> bool:
+        """True if this index was built for this list (same object, same length) and
+        none of its drones has moved since."""
+        if drones is not self.drones or len(drones) != self.size:
+            return False
+        if self._version is not None and self._moves() is not None:
+            return self._moves() == self._version
+        positions = self.current_positions()
+        return positions.shape == self.positions.shape and np.array_equal(positions, self.positions)
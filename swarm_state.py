@@ -0,0 +1,186 @@
+import numpy as np
+from drone import Drone, DroneType
+from constants import R_SENSE
+from spatial_index import PairCache
+
+# Type codes stored in SwarmState.types (same values as the DroneType enum)
+FRIENDLY = DroneType.FRIENDLY.value
+HOSTILE = DroneType.HOSTILE.value
+
+
+class DroneRegistry:
+    """Id -> row index over one set of rows (ids must be unique).
+
+    Ids are usually small positive integers, so the index is a dense lookup
+    table and slot_of() is one array gather; sparse or negative ids fall back
+    to a sorted search.
+    """
+
+    DENSE_LIMIT = 4 # Dense table while max id < DENSE_LIMIT * count + 1024
+
+    def __init__(self, ids: np.ndarray):
+        self.ids = ids
+        rows = np.arange(ids.size)
+        if ids.size == 0 or (ids.min() >= 0 and ids.max() < self.DENSE_LIMIT * ids.size + 1024):
+            self._table = np.full(int(ids.max()) + 1 if ids.size else 0, -1, dtype=np.intp)
+            self._table[ids] = rows
+            self._order = None
+        else:
+            self._table = None
+            self._order = np.argsort(ids, kind='stable')
+            self._sorted = ids[self._order]
+
+    def slot_of(self, ids):
+        """Row of each id in `ids` (scalar or array); -1 for ids that are not present."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if self._table is not None:
+            known = (ids >= 0) & (ids < self._table.size)
+            rows = np.where(known, self._table[np.where(known, ids, 0)] if self._table.size else -1, -1)
+        else:
+            k = np.minimum(np.searchsorted(self._sorted, ids), max(self._sorted.size - 1, 0))
+            rows = np.where(self._sorted[k] == ids, self._order[k], -1) if self._sorted.size else np.full(ids.shape, -1)
+        return int(rows) if rows.ndim == 0 else rows
+
+    def __contains__(self, drone_id) -> bool:
+        return self.slot_of(drone_id) >= 0
+
+
+class SwarmState:
+    """Structure-of-arrays storage for the whole swarm.
+
+    Row i of every array describes one drone. Drone objects created through
+    from_drones() stay attached as thin views onto their row, so code that
+    reads or writes drone.pos / drone.velocity / drone.target_id keeps
+    working while batched code operates on the arrays directly.
+    """
+
+    def __init__(self, count=0):
+        self.ids = np.zeros(count, dtype=np.int64)
+        self.types = np.zeros(count, dtype=np.int8)
+        self.pos = np.zeros((count, 2))
+        self.velocity = np.zeros((count, 2))
+        self.target_id = np.full(count, -1, dtype=np.int64)
+        self.is_neutralized = np.zeros(count, dtype=bool)
+        self.is_claimed = np.zeros(count, dtype=bool)
+        self.blink_timer = np.zeros(count)
+        self.drones = [] # Drone views, aligned with the rows above
+        self.version = 0 # Bumped by every in-place position write (update_physics, Drone.pos)
+        self._registry = None
+        self._pairs = None
+
+    @classmethod
+    def from_drones(cls, drones: list):
+        """Copies the drones' current values into a new state and attaches them to it."""
+        state = cls(len(drones))
+        for slot, drone in enumerate(drones):
+            state.ids[slot] = drone.id
+            state.types[slot] = drone.type.value
+            state.pos[slot] = drone.pos
+            state.velocity[slot] = drone.velocity
+            state.target_id[slot] = drone.target_id
+            state.is_neutralized[slot] = drone.is_neutralized
+            state.is_claimed[slot] = drone.is_claimed
+            state.blink_timer[slot] = drone.blink_timer
+        state._attach(drones)
+        return state
+
+    @classmethod
+    def from_arrays(cls, ids, types, pos, velocity):
+        """Builds a state straight from column arrays (no Drone objects; `drones` stays empty)."""
+        state = cls(len(ids))
+        state.ids[:] = ids
+        state.types[:] = types
+        state.pos[:] = pos
+        state.velocity[:] = velocity
+        return state
+
+    def _attach(self, drones):
+        self.drones[:] = drones # In place, so callers holding state.drones stay in sync
+        for slot, drone in enumerate(drones):
+            drone._bind(self, slot)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # --- Masks ---
+
+    def friendly_mask(self):
+        return self.types == FRIENDLY
+
+    def hostile_mask(self):
+        return self.types == HOSTILE
+
+    # --- Lookup and typed views ---
+
+    @property
+    def registry(self) -> DroneRegistry:
+        """Id -> row index, built on first use and dropped when rows are removed."""
+        if self._registry is None:
+            self._registry = DroneRegistry(self.ids)
+        return self._registry
+
+    def pair_cache(self, radius: float = R_SENSE, grid=None) -> PairCache:
+        """The tick's shared PairCache: every (live friendly, drone) pair within `radius`
+        (the friendlies are the sensors; hostile-hostile pairs are never needed). Reused
+        until a position or the live set changes (or a wider radius is asked for), then
+        rebuilt. `grid` is an optional UniformGrid over `pos` built earlier this tick."""
+        cache = self._pairs
+        friendly = self.live_friendlies()
+        if cache is None or radius > cache.radius or not cache.valid_for(self.pos, friendly):
+            cache = self._pairs = PairCache(self.pos, radius, friendly, grid)
+        return cache
+
+    def current_pairs(self):
+        """The pair cache if one is valid for the current state, else None (nothing is built)."""
+        cache = self._pairs
+        return cache if cache is not None and cache.valid_for(self.pos, self.live_friendlies()) else None
+
+    def live_friendlies(self) -> np.ndarray:
+        """Rows of the friendlies still flying."""
+        return np.flatnonzero(self.friendly_mask() & ~self.is_neutralized)
+
+    def live_hostiles(self) -> np.ndarray:
+        """Rows of the hostiles not neutralized yet."""
+        return np.flatnonzero(self.hostile_mask() & ~self.is_neutralized)
+
+    # --- Maintenance ---
+
+    @staticmethod
+    def of(drones: list):
+        """Returns the SwarmState whose rows are exactly `drones` (in order), or None."""
+        state = drones[0]._state if drones else None
+        if state is not None and drones is state.drones:
+            return state
+        if state is None or len(state.drones) != len(drones):
+            return None
+        if any(a is not b for a, b in zip(state.drones, drones)):
+            return None
+        return state
+
+    def retain(self, drones: list):
+        """Keeps only the rows of `drones` (which must be attached to this state),
+        in the given order, and re-attaches them to the compacted arrays."""
+        keep = np.fromiter((d._slot for d in drones), dtype=np.intp, count=len(drones))
+        self._take(keep, list(drones))
+
+    def compact(self, keep: np.ndarray):
+        """Drops every row where the boolean mask `keep` is False, in one pass.
+        Nothing is copied or re-bound when every row is kept."""
+        if keep.all():
+            return
+        rows = np.flatnonzero(keep)
+        self._take(rows, [self.drones[i] for i in rows] if self.drones else [])
+
+    def _take(self, keep, drones):
+        self.ids = self.ids[keep]
+        self.types = self.types[keep]
+        self.pos = self.pos[keep]
+        self.velocity = self.velocity[keep]
+        self.target_id = self.target_id[keep]
+        self.is_neutralized = self.is_neutralized[keep]
+        self.is_claimed = self.is_claimed[keep]
+        self.blink_timer = self.blink_timer[keep]
+        self.version += 1
+        self._registry = None
+        self._pairs = None
+        self._attach(drones)
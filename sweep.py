@@ -0,0 +1,241 @@
+# sweep.py - Parallel parameter sweeps over the coordination Tuning, with a result cache
+#
+# A sweep scores Tuning points (a full grid, or random samples of a search
+# space) on the same seeded Monte Carlo episodes (see monte_carlo.py). Every
+# episode's row is cached on disk under a hash of
+#   (tuning, scenario + run options, episode seed, code version)
+# so rerunning a sweep, adding points or adding episodes only simulates the new
+# ones. The code version hashes the source of the engine modules (ENGINE_MODULES),
+# so any edit to the algorithm starts from an empty cache instead of reusing stale rows.
+# A row does not depend on which episodes shared its batch (BatchedSimulation settles
+# each episode on its own), so a partly cached sweep returns what a fresh one would.
+#
+# A search space maps Tuning parameters to a list of values, or to a (low, high)
+# range: sampled uniformly by random_points(), `steps` evenly spaced values by grid_points().
+#
+# Usage:
+#   results = run_sweep(grid_points({'r_threat': [20, 30, 40], 'cohesion_weight': (0.2, 0.8)}), episodes=500)
+#   python sweep.py r_threat=20,30,40 cohesion_weight=0.2:0.8 --episodes 500
+#   python sweep.py r_threat=20:40 separation_weight=1:4 --random 50 --episodes 200
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from monte_carlo import EPISODE_DTYPE, EPISODE_MAX_TIME, episode_seeds, summarize, _run_chunk
+from tuning import Tuning, DEFAULT_TUNING, PARAMETERS
+
+DEFAULT_CACHE_DIR = '.sweep_cache'
+
+# Modules whose source decides an episode's outcome (hashed into the code version)
+ENGINE_MODULES = (
+    'constants', 'tuning', 'drone', 'swarm_state', 'spatial_index', 'sensing', 'coordination',
+    'assignment', 'intercept', 'physics', 'hostile_policies', 'simulation', 'batch_simulation',
+    'scenario_data', 'scenarios', 'monte_carlo',
+)
+
+SUMMARY_FIELDS = ('episodes', 'win_rate', 'mean_time_to_neutralize', 'mean_friendly_losses', 'mean_leaked_hostiles')
+
+
+def code_version() -> str:
+    """Hash of the engine modules' source."""
+    digest = hashlib.sha256()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name in ENGINE_MODULES:
+        with open(os.path.join(root, name + '.py'), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def episode_key(tuning: Tuning, scenario: dict, seed: int, version: str) -> str:
+    """Cache key of one episode. Parameters are compared as floats (r_threat=40 == 40.0)."""
+    params = {name: float(value) for name, value in tuning.as_dict().items()}
+    text = json.dumps([params, scenario, int(seed), version], sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache:
+    """Content-addressed store of episode rows: one small file per key, in 256 subdirectories.
+    Writes are atomic, so parallel or interrupted sweeps never leave a torn entry."""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.row')
+
+    def get(self, key: str):
+        """The cached row (EPISODE_DTYPE scalar) or None."""
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        if len(data) != EPISODE_DTYPE.itemsize:
+            self.misses += 1 # Written by another row layout
+            return None
+        self.hits += 1
+        return np.frombuffer(data, dtype=EPISODE_DTYPE)[0]
+
+    def put(self, key: str, row):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(np.asarray(row, dtype=EPISODE_DTYPE).tobytes())
+        os.replace(temp, path)
+
+
+# --- Search spaces ---
+
+def _check(space: dict):
+    unknown = set(space) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"unknown tuning parameters {sorted(unknown)}: use {', '.join(PARAMETERS)}")
+
+
+def grid_points(space: dict, steps: int = 5) -> list:
+    """Every combination of the space's values; (low, high) ranges become `steps` values."""
+    _check(space)
+    axes = [
+        np.linspace(values[0], values[1], steps).tolist() if isinstance(values, tuple) else list(values)
+        for values in space.values()
+    ]
+    return [dict(zip(space, combination)) for combination in itertools.product(*axes)]
+
+
+def random_points(space: dict, samples: int, seed: int = 0) -> list:
+    """`samples` random points: uniform over (low, high) ranges, uniform choice from lists."""
+    _check(space)
+    rng = np.random.default_rng(seed)
+    columns = {
+        name: rng.uniform(values[0], values[1], samples).tolist() if isinstance(values, tuple)
+        else [values[k] for k in rng.integers(len(values), size=samples)]
+        for name, values in space.items()
+    }
+    return [{name: columns[name][k] for name in space} for k in range(samples)]
+
+
+# --- Sweep ---
+
+def run_sweep(points: list, episodes: int, base_seed: int = 0, workers: int = None,
+              cache_dir: str = DEFAULT_CACHE_DIR, max_time: float = EPISODE_MAX_TIME, chunk_size: int = None,
+              batched: bool = True, adaptive: bool = False, policy: str = None, **scenario_params) -> list:
+    """Scores every point (a dict of Tuning changes) on the same `episodes` seeded episodes.
+
+    The arguments after `cache_dir` are those of monte_carlo.run_monte_carlo. Cached
+    episodes are read back, the rest are simulated across a process pool (chunks never
+    mix points) and added to the cache. Returns [(tuning, table)] in point order, each
+    table as run_monte_carlo would return it.
+    """
+    if chunk_size is None:
+        chunk_size = 256 if batched else 16
+    cache = ResultCache(cache_dir)
+    version = code_version()
+    scenario = {'params': scenario_params, 'policy': policy, 'max_time': max_time,
+                'batched': batched, 'adaptive': adaptive}
+    seeds = episode_seeds(episodes, base_seed)
+    numbers = np.arange(episodes)
+
+    tunings = [DEFAULT_TUNING.replace(**point) for point in points]
+    tables = [np.zeros(episodes, dtype=EPISODE_DTYPE) for _ in tunings]
+    keys, chunks, owners = [], [], []
+    for p, tuning in enumerate(tunings):
+        keys.append([episode_key(tuning, scenario, seed, version) for seed in seeds])
+        missing = []
+        for k, key in enumerate(keys[p]):
+            row = cache.get(key)
+            if row is None:
+                missing.append(k)
+            else:
+                tables[p][k] = row
+        tables[p]['episode'] = numbers # Cached rows keep the number of the sweep that made them
+        missing = np.array(missing, dtype=np.intp)
+        for i in range(0, missing.size, chunk_size):
+            todo = missing[i:i + chunk_size]
+            chunks.append((numbers[todo], seeds[todo], scenario_params, max_time, batched, adaptive, policy, tuning))
+            owners.append(p)
+
+    def store(results):
+        for p, rows in zip(owners, results):
+            for row in rows:
+                k = row[0]
+                tables[p][k] = row
+                cache.put(keys[p][k], tables[p][k])
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        store(map(_run_chunk, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            store(pool.map(_run_chunk, chunks))
+    return list(zip(tunings, tables))
+
+
+def sweep_table(results: list) -> np.ndarray:
+    """One row per point: its Tuning parameters followed by the monte_carlo.summarize statistics."""
+    dtype = [(name, np.float64) for name in PARAMETERS] + [
+        (name, np.int64 if name == 'episodes' else np.float64) for name in SUMMARY_FIELDS
+    ]
+    table = np.zeros(len(results), dtype=dtype)
+    for r, (tuning, episodes) in enumerate(results):
+        for name, value in tuning.as_dict().items():
+            table[r][name] = value
+        for name, value in summarize(episodes).items():
+            table[r][name] = value
+    return table
+
+
+def _parse_axis(text: str):
+    """'20:40' -> (20.0, 40.0) range; '20,30,40' -> [20.0, 30.0, 40.0]."""
+    if ':' in text:
+        low, high = text.split(':')
+        return float(low), float(high)
+    return [float(value) for value in text.split(',')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the coordination parameters over Monte Carlo episodes.")
+    parser.add_argument('axes', nargs='+', metavar='NAME=VALUES',
+                        help=f"Values as a,b,c or a range low:high ({', '.join(PARAMETERS)})")
+    parser.add_argument('--random', type=int, metavar='N', default=None, help="N random points instead of a grid")
+    parser.add_argument('--steps', type=int, default=5, help="Grid values per low:high range")
+    parser.add_argument('--episodes', type=int, default=200)
+    parser.add_argument('--friendlies', type=int, default=5)
+    parser.add_argument('--hostiles', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--policy', default=None, help="Hostile policy spec, e.g. evasive")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_DIR, help="Result cache directory")
+    parser.add_argument('--out', default=None, help="Save the per-point table (.npy)")
+    args = parser.parse_args()
+
+    space = {}
+    for axis in args.axes:
+        name, _, values = axis.partition('=')
+        space[name.strip()] = _parse_axis(values)
+    if args.random:
+        points = random_points(space, args.random, args.seed)
+    else:
+        points = grid_points(space, args.steps)
+
+    results = run_sweep(points, args.episodes, base_seed=args.seed, workers=args.workers, cache_dir=args.cache,
+                        policy=args.policy, n_friendly=args.friendlies, n_hostile=args.hostiles)
+    table = sweep_table(results)
+    print(f"{len(points)} points x {args.episodes} episodes")
+    if args.out:
+        np.save(args.out, table)
+    order = np.lexsort((table['mean_friendly_losses'], -table['win_rate']))
+    print('  '.join(f"{name:>10.10}" for name in space) + "    win_rate  losses  time")
+    for r in order:
+        row = table[r]
+        print('  '.join(f"{row[name]:10.3f}" for name in space)
+              + f"    {row['win_rate']:8.3f}  {row['mean_friendly_losses']:6.2f}  {row['mean_time_to_neutralize']:5.1f}")
@@ -0,0 +1,57 @@
+# tuning.py - The engagement algorithm's tunable parameters as one config object
+#
+# Tuning holds every knob of the coordination rules: the ranges and the
+# acceleration limit from constants.py (their defaults) plus the weights that
+# used to be literals in coordination.py. Simulation, BatchedSimulation,
+# TiledSimulation and AgentSimulation take one as `tuning=`; without it they
+# use DEFAULT_TUNING, which reproduces the original behaviour exactly.
+#
+# Tuning is frozen and hashable, so it can key caches (see sweep.py) and be
+# sent to worker processes. r_threat may not exceed R_SENSE: every engine finds
+# threats among the drones a friendly senses (pair cache, tile halo, agent sensor).
+#
+# Usage:
+#   sim = Simulation(scenario, tuning=Tuning(r_threat=40.0, separation_weight=3.0))
+#   tuning = make_tuning('r_threat=40,cohesion_weight=0.3')
+
+from dataclasses import dataclass, asdict, fields, replace
+
+from constants import R_SENSE, R_THREAT, R_SAFE_SEP, MAX_ACCELERATION
+from scenarios import parse_spec
+
+
+@dataclass(frozen=True)
+class Tuning:
+    """Coordination parameters (see get_move_vectors for where each one applies)."""
+    r_threat: float = R_THREAT                 # Friendlies only engage hostiles this close
+    r_safe_sep: float = R_SAFE_SEP             # Separation pushes apart friendlies this close
+    max_acceleration: float = MAX_ACCELERATION # Steering limit (units/s^2)
+    separation_weight: float = 2.0             # Formation vector = separation * w_s + cohesion * w_c
+    cohesion_weight: float = 0.5
+    attack_weight: float = 0.95                # Attack velocity = direction * MAX_SPEED * w_a + formation * w_f
+    formation_weight: float = 0.05
+
+    def __post_init__(self):
+        if self.r_threat > R_SENSE:
+            raise ValueError(f"r_threat={self.r_threat:g} exceeds R_SENSE={R_SENSE:g}: friendlies only engage hostiles they sense")
+
+    def replace(self, **changes) -> 'Tuning':
+        """A copy with some parameters changed (unknown names raise TypeError)."""
+        return replace(self, **changes)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+DEFAULT_TUNING = Tuning()
+
+PARAMETERS = tuple(f.name for f in fields(Tuning))
+
+
+def make_tuning(spec: str = '') -> Tuning:
+    """DEFAULT_TUNING with the changes of a 'key=value,...' spec (see scenarios.parse_spec)."""
+    _, params = parse_spec(':' + spec) if spec else ('', {})
+    unknown = set(params) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"unknown tuning parameters {sorted(unknown)}: use {', '.join(PARAMETERS)}")
+    return DEFAULT_TUNING.replace(**{k: float(v) for k, v in params.items()})
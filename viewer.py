@@ -0,0 +1,287 @@
+# viewer.py - Pygame viewer in its own process, fed through a shared-memory frame ring
+#
+# The simulation publishes every tick into a FrameRing: one shared-memory block
+# holding RING_SLOTS frame slots (ids, types, positions, flags and targets of up
+# to `capacity` drones). Publishing is a few numpy slice assignments into the
+# next slot - no pickling, no pipes - and never waits for a viewer, so a slow
+# frame can no longer stall the simulation.
+#
+# A viewer attaches to the ring by name and always draws the newest complete
+# frame, dropping the ones it was too slow for. Every slot carries a sequence
+# number that is odd while the slot is being written, so a frame overwritten
+# while it was being copied is detected and skipped rather than drawn torn.
+# Viewers can attach to a running simulation and detach (close the window) at
+# any time; the simulation never notices. SPACE in the viewer pauses the
+# simulation through a flag in the ring header.
+#
+# Usage:
+#   python viewer.py serve waves:friendlies=500,hostiles=2000 --name swarm   (headless, publishing)
+#   python viewer.py attach swarm                                            (in another terminal)
+#   python master_loop.py --viewer                                           (simulation + viewer process)
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from swarm_state import SwarmState
+from simulation import Simulation
+from scenarios import load_scenario
+from hostile_policies import make_policy
+
+DEFAULT_RING_NAME = 'swarm_view'
+RING_SLOTS = 4       # Frames in flight; a viewer only tears if the writer laps the ring mid-copy
+VIEWER_FPS = 60
+ATTACH_TIMEOUT = 10.0 # Seconds a viewer waits for the ring to appear
+
+# Header words (int64)
+_FRAME, _CAPACITY, _SLOTS, _CLOSED, _PAUSED = range(5)
+_HEADER_WORDS = 8
+
+# Per-slot columns: name -> (dtype, trailing shape)
+FRAME_FIELDS = {
+    'ids': (np.int64, ()),
+    'types': (np.int8, ()),
+    'pos': (np.float64, (2,)),
+    'is_neutralized': (np.bool_, ()),
+    'blink_timer': (np.float64, ()),
+    'target_id': (np.int64, ()),
+}
+
+
+def _layout(capacity: int, slots: int):
+    """name -> (offset, dtype, shape) of every array in the block, and the block size."""
+    arrays = {
+        'header': (np.int64, (_HEADER_WORDS,)),
+        'seq': (np.int64, (slots,)),     # 2 * frame once written, odd while writing
+        'tick': (np.int64, (slots,)),
+        'count': (np.int64, (slots,)),
+        'time': (np.float64, (slots,)),
+    }
+    arrays.update({name: (dtype, (slots, capacity) + shape) for name, (dtype, shape) in FRAME_FIELDS.items()})
+    layout, offset = {}, 0
+    for name, (dtype, shape) in arrays.items():
+        layout[name] = (offset, dtype, shape)
+        offset += -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // 8) * 8 # 8-byte aligned
+    return layout, max(offset, 1)
+
+
+class FrameRing:
+    """Shared-memory ring of swarm frames. create() on the simulation side, attach() in viewers."""
+
+    def __init__(self, block: SharedMemory, owner: bool):
+        self._block = block
+        self.owner = owner
+        self.name = block.name
+        header = np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=block.buf)
+        self.capacity, self.slots = int(header[_CAPACITY]), int(header[_SLOTS])
+        layout, _ = _layout(self.capacity, self.slots)
+        self._a = {name: np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+                   for name, (offset, dtype, shape) in layout.items()}
+        self.header = self._a['header']
+
+    @classmethod
+    def create(cls, capacity: int, name: str = DEFAULT_RING_NAME, slots: int = RING_SLOTS) -> 'FrameRing':
+        """A new ring for swarms of up to `capacity` drones (the initial swarm size: rows only shrink)."""
+        _, size = _layout(capacity, slots)
+        try:
+            block = SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            raise ValueError(f"frame ring {name!r} already exists (another simulation is publishing?)") from None
+        header = np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=block.buf)
+        header[:] = 0
+        header[_CAPACITY], header[_SLOTS] = capacity, slots
+        return cls(block, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_RING_NAME, timeout: float = ATTACH_TIMEOUT) -> 'FrameRing':
+        """Maps an existing ring, waiting up to `timeout` seconds for it to be created."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                block = SharedMemory(name=name)
+                break
+            except FileNotFoundError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        # This process only borrows the block: its resource tracker must not unlink it on exit
+        resource_tracker.unregister(block._name, 'shared_memory')
+        return cls(block, owner=False)
+
+    # --- Simulation side ---
+
+    def publish(self, tick: int, sim_time: float, swarm: SwarmState):
+        """Writes the swarm into the next slot and makes it the newest frame (never blocks)."""
+        count = len(swarm)
+        if count > self.capacity:
+            raise ValueError(f"{count} drones do not fit a frame ring of capacity {self.capacity}")
+        a = self._a
+        frame = int(self.header[_FRAME]) + 1
+        s = frame % self.slots
+        a['seq'][s] = 2 * frame - 1
+        for name in FRAME_FIELDS:
+            a[name][s, :count] = getattr(swarm, name)
+        a['tick'][s], a['time'][s], a['count'][s] = tick, sim_time, count
+        a['seq'][s] = 2 * frame
+        self.header[_FRAME] = frame
+
+    @property
+    def paused(self) -> bool:
+        """Pause requested by a viewer."""
+        return bool(self.header[_PAUSED])
+
+    # --- Viewer side ---
+
+    @property
+    def frame(self) -> int:
+        """Number of the newest published frame (0 before the first)."""
+        return int(self.header[_FRAME])
+
+    @property
+    def closed(self) -> bool:
+        """The simulation has finished publishing."""
+        return bool(self.header[_CLOSED])
+
+    def set_paused(self, paused: bool):
+        self.header[_PAUSED] = int(paused)
+
+    def latest(self, seen: int = 0):
+        """(frame, tick, time, SwarmState copy) of the newest frame after `seen`, or None.
+        Frames overwritten while being copied are dropped and the newer one is read instead."""
+        a = self._a
+        for _ in range(self.slots):
+            frame = self.frame
+            if frame <= seen:
+                return None
+            s = frame % self.slots
+            if a['seq'][s] != 2 * frame:
+                continue # Already being overwritten: a newer frame is on its way
+            count = int(a['count'][s])
+            state = SwarmState(count)
+            for name in FRAME_FIELDS:
+                getattr(state, name)[:] = a[name][s, :count]
+            tick, sim_time = int(a['tick'][s]), float(a['time'][s])
+            if a['seq'][s] == 2 * frame:
+                return frame, tick, sim_time, state
+        return None # The writer keeps lapping the reader; try again next frame
+
+    def close(self):
+        """Detaches; the owner also marks the ring finished and removes it."""
+        if self.owner:
+            self.header[_CLOSED] = 1
+        self.header = None
+        self._a = None
+        self._block.close()
+        if self.owner:
+            self._block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def serve(sim, ring: FrameRing, speed: float = None, max_time: float = None, stop=None):
+    """Steps `sim` until it is decided (or `stop()` returns True), publishing every tick.
+
+    `speed` paces the run at that multiple of real time (None: as fast as the CPU allows).
+    While a viewer holds the pause flag the simulation waits.
+    """
+    ring.publish(sim.ticks, sim.time, sim.swarm)
+    start = time.perf_counter()
+    decided = (lambda: sim.decided()) if max_time is None else (lambda: sim.decided(max_time))
+    while not decided() and not (stop and stop()):
+        if ring.paused:
+            pause_start = time.perf_counter()
+            time.sleep(0.02)
+            start += time.perf_counter() - pause_start
+            continue
+        if speed:
+            ahead = sim.time / speed - (time.perf_counter() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+        sim.step()
+        ring.publish(sim.ticks, sim.time, sim.swarm)
+
+
+def launch_viewer(name: str = DEFAULT_RING_NAME) -> subprocess.Popen:
+    """Starts a viewer for the ring `name` in a separate interpreter."""
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), 'attach', name])
+
+
+def view(name: str = DEFAULT_RING_NAME, fps: int = VIEWER_FPS):
+    """Viewer process main loop: draws the newest frame of the ring until the window is closed.
+
+    Keys: SPACE pause the simulation, R sensor rings, D dirty-rect drawing. Closing the
+    window detaches; the simulation keeps running.
+    """
+    import pygame # Only the viewer process needs pygame
+    import visualization
+    from visualization import draw_simulation, setup_display, set_screen_mode
+
+    ring = FrameRing.attach(name)
+    setup_display()
+    set_screen_mode()
+    pygame.display.set_caption(f"Swarm viewer - {name}")
+    clock = pygame.time.Clock()
+    seen, dropped, latest = 0, 0, None
+    running = True
+    try:
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_SPACE:
+                        ring.set_paused(not ring.paused)
+                    elif event.key == pygame.K_r:
+                        visualization.SHOW_SENSOR_RINGS = not visualization.SHOW_SENSOR_RINGS
+                    elif event.key == pygame.K_d:
+                        visualization.DIRTY_RECTS = not visualization.DIRTY_RECTS
+
+            new = ring.latest(seen)
+            if new is not None:
+                if seen:
+                    dropped += new[0] - seen - 1
+                seen, latest = new[0], new
+            if latest is not None:
+                _, tick, sim_time, state = latest
+                status = f"VIEWER tick {tick}  dropped {dropped}" + ("  FINISHED" if ring.closed else "")
+                draw_simulation(state, is_paused=ring.paused, time=sim_time, status=status)
+            clock.tick(fps)
+    finally:
+        ring.close()
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Out-of-process swarm viewer over a shared-memory frame ring.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    attach = commands.add_parser('attach', help="Open a viewer on a running simulation's ring")
+    attach.add_argument('name', nargs='?', default=DEFAULT_RING_NAME)
+    served = commands.add_parser('serve', help="Run a headless simulation that publishes to a ring")
+    served.add_argument('scenario', nargs='?', default='default', help="Scenario spec (see scenarios.py)")
+    served.add_argument('--name', default=DEFAULT_RING_NAME)
+    served.add_argument('--policy', default=None, help="Hostile policy spec (see hostile_policies.py)")
+    served.add_argument('--speed', type=float, default=None, help="Multiple of real time (default: full speed)")
+    served.add_argument('--max-time', type=float, default=None)
+    served.add_argument('--view', action='store_true', help="Also launch a viewer")
+    args = parser.parse_args()
+
+    if args.command == 'attach':
+        view(args.name)
+    else:
+        sim = Simulation(load_scenario(args.scenario), policy=make_policy(args.policy) if args.policy else None)
+        with FrameRing.create(len(sim.swarm), args.name) as ring:
+            if args.view:
+                launch_viewer(ring.name)
+            started = time.perf_counter()
+            serve(sim, ring, args.speed, args.max_time)
+            print(f"{sim.result()}  ({sim.ticks} ticks in {time.perf_counter() - started:.1f} s)")
@@ -2,9 +2,11 @@
 
 import pygame
 import time
+import numpy as np
 # Ensure constants and drone class are available for drawing
 from constants import R_SENSE, R_THREAT, R_INTERCEPT 
 from drone import Drone, DroneType
+from swarm_state import SwarmState, DroneRegistry
 
 # Define Display Constants (Must be defined globally)
 SCREEN_WIDTH = 1200
@@ -19,29 +21,46 @@ COLOR_HOSTILE = (255, 0, 0)
 COLOR_SENSE = (50, 50, 150)
 COLOR_THREAT = (150, 50, 50)
 COLOR_TARGET_LINE = (255, 255, 255)
+COLOR_NEUTRALIZED = (255, 255, 255)
+
+# Renderer options (large swarms: turn off the rings and redraw only what changed)
+SHOW_SENSOR_RINGS = True
+DIRTY_RECTS = False
 
 screen = None
 FONT = None
+SMALL_FONT = None # Timing overlay
+
+# Render caches
+_sprites = {}     # (kind, color, radius) -> pre-rendered Surface
+_text_cache = {}  # (text, color, font) -> rendered Surface
+_last_dirty = None # Rects drawn last frame (DIRTY_RECTS mode); None forces a full redraw
+TEXT_CACHE_SIZE = 256
 
 # -----------------------------------------------------------------
 # INITIALIZATION FUNCTIONS
 # -----------------------------------------------------------------
 def setup_display():
     """Initializes Pygame subsystems and font."""
-    global FONT
+    global FONT, SMALL_FONT
     pygame.init() 
     
     try:
         FONT = pygame.font.Font(None, 36)
+        SMALL_FONT = pygame.font.Font(None, 20)
     except pygame.error:
         FONT = None
+        SMALL_FONT = None
     return 
 
 def set_screen_mode():
     """Sets the screen mode AFTER a brief delay in the master loop."""
     global screen
     
+    global _last_dirty
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    _sprites.clear()
+    _last_dirty = None
     pygame.display.set_caption("Coordinated Swarm Engagement MVP")
     
     # CRITICAL: Force the display to update the window immediately
@@ -58,15 +77,52 @@ def sim_to_screen(sim_pos):
     py = int(-sim_pos[1] * FIELD_SCALE + SCREEN_HEIGHT / 2)
     return (px, py)
 
-def draw_text(text, position, color=(255, 255, 255)):
-    """Helper function to draw text on the screen."""
+def render_text(text, color=(255, 255, 255), font=None):
+    """Rendered text surface, cached until the text (or color/font) changes."""
+    font = font or FONT
+    key = (text, color, font)
+    surface = _text_cache.get(key)
+    if surface is None:
+        if len(_text_cache) >= TEXT_CACHE_SIZE:
+            _text_cache.clear()
+        surface = _text_cache[key] = font.render(text, True, color)
+    return surface
+
+def draw_text(text, position, color=(255, 255, 255), font=None):
+    """Helper function to draw text on the screen. Returns the drawn rect (None without a font)."""
     global screen
-    if FONT:
-        text_surface = FONT.render(text, True, color)
-        screen.blit(text_surface, position)
+    font = font or FONT
+    if font:
+        return screen.blit(render_text(text, color, font), position)
+
+def draw_timing_overlay(lines: list):
+    """Profiler lines (see profiling.Profiler.overlay_lines) in the bottom-left corner."""
+    line_height = 16
+    y = SCREEN_HEIGHT - 10 - line_height * len(lines)
+    rects = []
+    for line in lines:
+        rects.append(draw_text(line, (10, y), (180, 180, 180), SMALL_FONT))
+        y += line_height
+    return rects
+
+def _sprite(kind, color, radius):
+    """Pre-rendered circle (kind 'ring': 1 px outline, 'dot': filled), transparent outside."""
+    key = (kind, color, radius)
+    sprite = _sprites.get(key)
+    if sprite is None:
+        size = 2 * radius + 1
+        sprite = pygame.Surface((size, size))
+        sprite.fill(COLOR_BACKGROUND if color != COLOR_BACKGROUND else (0, 0, 0))
+        sprite.set_colorkey(sprite.get_at((0, 0)), pygame.RLEACCEL)
+        pygame.draw.circle(sprite, color, (radius, radius), radius, 1 if kind == 'ring' else 0)
+        _sprites[key] = sprite
+    return sprite
 
-def draw_drone(drone: Drone, all_drones: list):
-    """Draws a single drone, its sensor range, and its target line."""
+def draw_drone(drone: Drone, all_drones: list, pos_by_id: dict = None, by_id: dict = None):
+    """Draws a single drone, its sensor range, and its target line.
+    `pos_by_id` overrides the drawn positions (interpolated frames); `by_id`
+    is an id -> drone lookup to reuse across calls (built here otherwise).
+    draw_simulation draws the whole swarm in batch instead."""
     global screen
     
     # --- NEW BLINKING LOGIC ---
@@ -80,7 +136,7 @@ def draw_drone(drone: Drone, all_drones: list):
     else:
         color = COLOR_FRIENDLY
         
-    screen_pos = sim_to_screen(drone.pos)
+    screen_pos = sim_to_screen(pos_by_id[drone.id] if pos_by_id else drone.pos)
 
     # 1. Draw Threat/Sensor Ranges (Simplified, only for live drones)
     if not drone.is_neutralized:
@@ -95,18 +151,78 @@ def draw_drone(drone: Drone, all_drones: list):
     
     # 3. Draw Target Line
     if drone.target_id != -1 and not drone.is_hostile():
-        target_drone = next((d for d in all_drones if d.id == drone.target_id), None)
+        if by_id is None:
+            by_id = {d.id: d for d in all_drones}
+        target_drone = by_id.get(drone.target_id)
         if target_drone and not target_drone.is_neutralized:
-            target_pos = sim_to_screen(target_drone.pos)
+            target_pos = sim_to_screen(pos_by_id[target_drone.id] if pos_by_id else target_drone.pos)
             pygame.draw.line(screen, COLOR_TARGET_LINE, screen_pos, target_pos, 1)
 
 
 # -----------------------------------------------------------------
 # CRITICAL: MAIN DRAWING LOOP FUNCTION
 # -----------------------------------------------------------------
-def draw_simulation(drones: list, is_paused: bool = False, time: float = 0.0):
-    """Clears the screen and draws all elements."""
-    global screen
+def _swarm_arrays(drones):
+    """(ids, pos, is_hostile, is_neutralized, blink_timer, target_id, registry) for the drones,
+    as arrays plus an id -> row index. Read straight from the SwarmState when given one or
+    when the list is backed by one."""
+    state = drones if isinstance(drones, SwarmState) else SwarmState.of(drones)
+    if state is not None:
+        return (state.ids, state.pos, state.hostile_mask(), state.is_neutralized,
+                state.blink_timer, state.target_id, state.registry)
+    count = len(drones)
+    ids = np.fromiter((d.id for d in drones), np.int64, count)
+    return (
+        ids,
+        np.array([d.pos for d in drones], dtype=float).reshape(count, 2),
+        np.fromiter((d.is_hostile() for d in drones), bool, count),
+        np.fromiter((d.is_neutralized for d in drones), bool, count),
+        np.fromiter((d.blink_timer for d in drones), float, count),
+        np.fromiter((d.target_id for d in drones), np.int64, count),
+        DroneRegistry(ids),
+    )
+
+def draw_segments(x0, y0, x1, y1, color) -> list:
+    """Draws 1-pixel line segments between the endpoint arrays in one batched write: every
+    segment is sampled once per pixel step and all the pixels are set through one view of
+    the screen buffer. Returns the segments' bounding rects (for dirty-rect updates)."""
+    x0, y0, x1, y1 = (np.asarray(a, dtype=np.int32) for a in (x0, y0, x1, y1))
+    dx, dy = x1 - x0, y1 - y0
+    rects = [pygame.Rect(l, t, w, h) for l, t, w, h in zip(
+        np.minimum(x0, x1).tolist(), np.minimum(y0, y1).tolist(), (np.abs(dx) + 1).tolist(), (np.abs(dy) + 1).tolist()
+    )]
+    if screen.get_bytesize() != 4: # The buffer write assumes 32-bit pixels: one call per segment
+        for segment in zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist()):
+            pygame.draw.line(screen, color, segment[:2], segment[2:], 1)
+        return rects
+    steps = np.maximum(np.abs(dx), np.abs(dy))
+    count = steps + 1
+    scale = 1.0 / np.maximum(steps, 1)
+    step = np.arange(count.sum(), dtype=np.float32) - np.repeat(np.cumsum(count) - count, count).astype(np.float32)
+    x = (np.repeat((x0 + 0.5).astype(np.float32), count) + step * np.repeat((dx * scale).astype(np.float32), count)).astype(np.int32)
+    y = (np.repeat((y0 + 0.5).astype(np.float32), count) + step * np.repeat((dy * scale).astype(np.float32), count)).astype(np.int32)
+    width, height = screen.get_size()
+    inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+    buffer = screen.get_buffer() # Locks the surface until released
+    np.frombuffer(buffer, dtype=np.uint32)[y[inside] * (screen.get_pitch() // 4) + x[inside]] = screen.map_rgb(color)
+    del buffer
+    return rects
+
+def draw_simulation(drones, is_paused: bool = False, time: float = 0.0, overlay: list = None,
+                    positions=None, status: str = None, sensor_rings: bool = None, dirty_rects: bool = None):
+    """Clears the screen and draws all elements. `drones` is a list of drones or a SwarmState.
+
+    `overlay` is an optional list of timing lines, `positions` (aligned with
+    `drones`) replaces the drawn positions and `status` is a line of playback
+    info (speed, render decimation) under the pause marker. `sensor_rings` and
+    `dirty_rects` override SHOW_SENSOR_RINGS / DIRTY_RECTS for this frame.
+
+    The swarm is drawn in batch: screen positions are computed for all drones
+    at once, rings and dots are blitted from cached sprites, targets are
+    found through one id lookup per frame and all target lines are drawn in
+    one batched pixel write (draw_segments).
+    """
+    global screen, _last_dirty
 
     # ERROR WAS HERE: screen must be initialized by master_loop BEFORE this call.
     if screen is None:
@@ -114,22 +230,79 @@ def draw_simulation(drones: list, is_paused: bool = False, time: float = 0.0):
         print("FATAL DRAWING ERROR: Screen surface not initialized. Cannot draw.")
         return 
 
-    screen.fill(COLOR_BACKGROUND) 
+    sensor_rings = SHOW_SENSOR_RINGS if sensor_rings is None else sensor_rings
+    dirty_rects = DIRTY_RECTS if dirty_rects is None else dirty_rects
+
+    if dirty_rects and _last_dirty is not None:
+        for rect in _last_dirty:
+            screen.fill(COLOR_BACKGROUND, rect) # Erase only what was drawn last frame
+    else:
+        screen.fill(COLOR_BACKGROUND) 
+    drawn = []
     
     # 1. Draw all drones
-    for drone in drones:
-        draw_drone(drone, drones) 
+    ids, pos, hostile, neutralized, blink_timer, target_id, registry = _swarm_arrays(drones)
+    if positions is not None:
+        pos = np.asarray(positions, dtype=float)
+    px = (pos[:, 0] * FIELD_SCALE + SCREEN_WIDTH / 2).astype(int)
+    py = (-pos[:, 1] * FIELD_SCALE + SCREEN_HEIGHT / 2).astype(int)
+
+    # Blinking: neutralized drones are only drawn (white) on alternate tenths of a second
+    visible = ~neutralized | ((blink_timer * 10).astype(int) % 2 == 1)
+    live_friendly = ~hostile & ~neutralized
+
+    # 1a. Sensor ranges (live friendlies)
+    if sensor_rings:
+        ring_radius = int(R_SENSE * FIELD_SCALE)
+        ring = _sprite('ring', COLOR_SENSE, ring_radius)
+        rows = np.flatnonzero(live_friendly)
+        drawn += screen.blits(
+            [(ring, (x, y)) for x, y in zip((px[rows] - ring_radius).tolist(), (py[rows] - ring_radius).tolist())]
+        )
+
+    # 1b. Target lines: one id -> row lookup for the whole frame
+    attacking = np.flatnonzero(live_friendly & (target_id != -1))
+    if attacking.size:
+        target = registry.slot_of(target_id[attacking])
+        keep = target >= 0
+        keep[keep] = ~neutralized[target[keep]]
+        source, target = attacking[keep], target[keep]
+        drawn += draw_segments(px[source], py[source], px[target], py[target], COLOR_TARGET_LINE)
+
+    # 1c. Drone dots
+    for mask, color in (
+        (visible & neutralized, COLOR_NEUTRALIZED),
+        (~neutralized & hostile, COLOR_HOSTILE),
+        (live_friendly, COLOR_FRIENDLY),
+    ):
+        rows = np.flatnonzero(mask)
+        if rows.size:
+            dot = _sprite('dot', color, RADIUS)
+            drawn += screen.blits(
+                [(dot, (x, y)) for x, y in zip((px[rows] - RADIUS).tolist(), (py[rows] - RADIUS).tolist())]
+            )
         
     # 2. Draw HUD (Runs always to show status)
-    friendly_count = sum(1 for d in drones if not d.is_hostile() and not d.is_neutralized)
-    hostile_count = sum(1 for d in drones if d.is_hostile() and not d.is_neutralized)
+    friendly_count = int(np.count_nonzero(live_friendly))
+    hostile_count = int(np.count_nonzero(hostile & ~neutralized))
     
-    draw_text(f"Friendlies: {friendly_count}", (10, 10), COLOR_FRIENDLY)
-    draw_text(f"Hostiles: {hostile_count}", (10, 40), COLOR_HOSTILE)
-    draw_text(f"Time: {time:.2f}s", (10, 70), (200, 200, 200))
+    drawn.append(draw_text(f"Friendlies: {friendly_count}", (10, 10), COLOR_FRIENDLY))
+    drawn.append(draw_text(f"Hostiles: {hostile_count}", (10, 40), COLOR_HOSTILE))
+    drawn.append(draw_text(f"Time: {time:.2f}s", (10, 70), (200, 200, 200)))
     
     if is_paused:
-        draw_text("PAUSED (SPACE)", (SCREEN_WIDTH - 300, 10), (255, 255, 0))
+        drawn.append(draw_text("PAUSED (SPACE)", (SCREEN_WIDTH - 300, 10), (255, 255, 0)))
+    if status:
+        drawn.append(draw_text(status, (SCREEN_WIDTH - 300, 40), (200, 200, 200)))
 
-    # 3. Final display flip to update the monitor
-    pygame.display.flip()
\ No newline at end of file
+    if overlay:
+        drawn += draw_timing_overlay(overlay)
+
+    # 3. Final display update (only the changed regions in dirty-rect mode)
+    drawn = [rect for rect in drawn if rect is not None]
+    if dirty_rects:
+        pygame.display.update(drawn + (_last_dirty or [screen.get_rect()]))
+        _last_dirty = drawn
+    else:
+        pygame.display.flip()
+        _last_dirty = None